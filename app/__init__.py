@@ -3,6 +3,7 @@ from flask import Flask, redirect, request, jsonify, render_template, session, u
 from werkzeug.utils import secure_filename
 
 from flask_sqlalchemy import SQLAlchemy
+from app import http_cache, instrumentation, sqlite_pragmas
 import os
 import sys
 from pathlib import Path
@@ -29,13 +30,30 @@ def create_app(database_uri=None):
         app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # SQLite connection tuning (WAL, synchronous, busy_timeout, cache/mmap size, temp_store)
+    # Override any SQLITE_* key in app config, see app/sqlite_pragmas.py
+    sqlite_pragmas.set_default_config(app)
+
     # Initialize SQLAlchemy with the app
     db.init_app(app)
+    with app.app_context():
+        sqlite_pragmas.configure_engine(app, db.engine)
+        # Per-request query count, SQL time and wall time (Server-Timing, slow log, /metrics)
+        # Configure with SERVER_TIMING and SLOW_REQUEST_MS, see app/instrumentation.py
+        instrumentation.init_app(app, db.engine)
 
     # Import models for SQLAlchemy
     from app.model.recipes import Recipe
     from app.model.users import User
     from app.model.favorites import Favorite
+    from app.model.featured import FeaturedRecipe
+    from app.model.cache import CacheInvalidation
+    from app.model.ingredients import RecipeIngredient
+    from app.model.catalog import CatalogVersion  # registers the catalog_version triggers
+    from app.model.facets import RecipeFacetCount  # registers the recipe_facet_counts triggers
+    from app.model import recipe_search  # registers the recipes_fts index DDL
+    from app.model import popularity  # registers the favorite_count triggers
+    from app.model import recommendations  # registers the recipe_neighbors_pending triggers
     from app.enums import Category  # <-- REQUIRED FIX
 
     # Import and run table creation script
@@ -57,6 +75,28 @@ def create_app(database_uri=None):
         except (TypeError, ValueError):
             return None
 
+    # Helper: read keyset pagination arguments (cursor, limit, include_total)
+    def flag_arg(args, name):
+        return args.get(name, '').lower() in ('1', 'true', 'yes')
+
+    def parse_page_args(args):
+        return {
+            'cursor': args.get('cursor') or None,
+            'limit': args.get('limit', type=int),
+            'include_total': flag_arg(args, 'include_total'),
+        }
+
+    # Helper: parse a list of ids, either a JSON list or a comma separated string ("1,2,3")
+    # Raises ValueError for anything that is not an id
+    def parse_id_list(value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [part for part in value.split(',') if part.strip()]
+        if not isinstance(value, list):
+            raise ValueError(value)
+        return [int(part) for part in value]
+
     # Helper function to check if user is logged in
     def require_login():
         if 'logged_in' not in session or not session['logged_in']:
@@ -199,24 +239,15 @@ def create_app(database_uri=None):
         page = request.args.get('page', 1, type=int)
         per_page = 1
 
-        recipes_query = Recipe.query
-
-        if q:
-            search_term = f"%{q.lower()}%"
-            recipes_query = recipes_query.filter(
-                db.or_(
-                    # Requirement # 3.0.0 searching by ingredient
-                    Recipe.ingredients.ilike(search_term),
-                    # Requirement # 3.0.1 searching by category
-                    Recipe.category.ilike(search_term),
-                    # Requirement # 3.0.2 searching by name
-                    Recipe.name.ilike(search_term)
-                )
-            )
+        # Requirement # 3.0.0 searching by ingredient
+        # Requirement # 3.0.1 searching by category
+        # Requirement # 3.0.2 searching by name
+        recipes_query = RecipeService.search_query(q)
 
         user_id = session.get('user_id')
 
-        paginated_recipes = recipes_query.order_by(Recipe.id).paginate(page=page, per_page=per_page)
+        # count=False: the page only shows one recipe, so skip the COUNT(*) over the matches
+        paginated_recipes = recipes_query.paginate(page=page, per_page=per_page, count=False)
         recipe = paginated_recipes.items[0] if paginated_recipes.items else None
 
         if request.method == "POST":
@@ -233,13 +264,13 @@ def create_app(database_uri=None):
             if "favorite" in request.form:
                 # toggle favorite
                 # Requirement # 2.1.0 - The user should be able to toggle favorites on and off
-                existing_fav = Favorite.query.filter_by(recipe_id=recipe_id, user_id=user_id).first()
-                if existing_fav:
-                    FavoriteService.remove_favorite(recipe_id, user_id)
-                else:
-                    FavoriteService.add_favorite(recipe_id, user_id)
+                # One DELETE tells whether it was a favorite, otherwise one INSERT adds it;
+                # both update the cached favorite set the star render reads
+                removed = FavoriteService.remove_favorite(recipe.id, user_id)
+                if not removed:
+                    FavoriteService.add_favorite(recipe.id, user_id)
 
-                is_favorite = FavoriteService.is_favorite(recipe_id, user_id)
+                is_favorite = not removed
 
                 return render_template(
                     'search_results.html',
@@ -253,11 +284,10 @@ def create_app(database_uri=None):
             return redirect(url_for("search_recipes", q=q, page=page))
 
         # Favorite star is gold if it's a favorite, and gray if it's not
-        # determined by looking in the favorites table
+        # determined by the user's cached favorite set (loaded from the favorites table once)
         is_favorite = False
         if recipe and user_id:
-            from app.model.favorites import Favorite
-            is_favorite = Favorite.query.filter_by(recipe_id=recipe.id, user_id=user_id).first() is not None
+            is_favorite = FavoriteService.is_favorite(recipe.id, user_id)
 
         return render_template(
             'search_results.html',
@@ -338,30 +368,17 @@ def create_app(database_uri=None):
     def get_random_recipe():
         from app.service.recipe import RecipeService
 
-        recipe, message = RecipeService.get_random_recipe()
+        from app.service.featured import FeaturedRecipeService
+
+        # Served from the daily pick (cached until midnight), not a new random query per request
+        recipe = FeaturedRecipeService.get_recipe_of_the_day()
         if recipe:
             return jsonify({
-                'message': message,
-                'recipe': {
-                    'recipe_id': recipe.id,
-                    'name': recipe.name,
-                    'ingredients': recipe.ingredients,
-                    'instructions': recipe.instructions,
-                    'user_id': recipe.user_id,
-                    'owner': (
-                        User.query.get(recipe.user_id).username
-                        if recipe.user_id and User.query.get(recipe.user_id)
-                        else "Anonymous"
-                    ),
-                    'prep_time': recipe.prep_time,
-                    'cook_time': recipe.cook_time,
-                    'total_time': recipe.total_time,
-                    'servings': recipe.servings,
-                    'image': recipe.image_location
-                }
+                'message': RecipeService.RANDOM_RECIPE_MESSAGE,
+                'recipe': recipe
             }), 200
 
-        return jsonify({'error': message}), 404
+        return jsonify({'error': "No recipes found."}), 404
 
     @app.route('/about')
     # Displays About Us page
@@ -413,10 +430,9 @@ def create_app(database_uri=None):
     # uses featured.html to show random recipe of the day
     # Requirement # 1.3.0 - The app should show a “Random Recipe of the Day”
     def featured():
-        from app.model.recipes import Recipe
-        from app import db
+        from app.service.featured import FeaturedRecipeService
 
-        recipe = Recipe.query.order_by(db.func.random()).first()
+        recipe = FeaturedRecipeService.get_recipe_of_the_day()
         return render_template('featured.html', recipe=recipe)
 
     @app.route('/is_favorite/<int:recipe_id>', methods=['GET'])
@@ -462,6 +478,73 @@ def create_app(database_uri=None):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/are_favorites', methods=['GET'])
+    # Batch version of /is_favorite: /are_favorites?ids=1,2,3 returns which of the ids the current user favorited
+    # One query for a whole page of cards, instead of downloading the full favorites list
+    def are_favorites():
+        try:
+            recipe_ids = parse_id_list(request.args.get('ids'))
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma separated list of recipe ids.'}), 400
+        if 'logged_in' not in session or not session['logged_in']:
+            return jsonify({'favorite_ids': []}), 200
+
+        from app.service.favorites import FavoriteService
+        try:
+            favorite_ids = FavoriteService.are_favorites(session['user_id'], recipe_ids)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'favorite_ids': sorted(favorite_ids)}), 200
+
+    # Helper: recipe_ids of a bulk favorites request, a JSON list or a comma separated form field
+    def bulk_favorite_ids():
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            return parse_id_list(data.get('recipe_ids'))
+        return parse_id_list(request.form.get('recipe_ids'))
+
+    @app.route('/bulk_add_favorites', methods=['POST'])
+    # Batch version of /add_favorite for multi-select: {"recipe_ids": [1, 2, 3]}
+    # One INSERT in one transaction, recipe_ids in the response are the favorites actually added
+    def bulk_add_favorites():
+        auth_check = require_login()
+        if auth_check:
+            return auth_check
+        try:
+            recipe_ids = bulk_favorite_ids()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'recipe_ids must be a list of recipe ids.'}), 400
+
+        from app.service.favorites import FavoriteService
+        try:
+            added = FavoriteService.bulk_add(session['user_id'], recipe_ids)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        return jsonify({'message': 'Favorites added', 'recipe_ids': sorted(added)}), 200
+
+    @app.route('/bulk_remove_favorites', methods=['POST'])
+    # Batch version of /remove_favorite for multi-select: {"recipe_ids": [1, 2, 3]}
+    # One DELETE in one transaction, recipe_ids in the response are the favorites actually removed
+    def bulk_remove_favorites():
+        auth_check = require_login()
+        if auth_check:
+            return auth_check
+        try:
+            recipe_ids = bulk_favorite_ids()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'recipe_ids must be a list of recipe ids.'}), 400
+
+        from app.service.favorites import FavoriteService
+        try:
+            removed = FavoriteService.bulk_remove(session['user_id'], recipe_ids)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        return jsonify({'message': 'Favorites removed', 'recipe_ids': sorted(removed)}), 200
+
     @app.route('/favorites_list', methods=['GET'])
     #Helper used by browse_recipes.html, favorites.html, and search_results.html to get a list of favorites
     def favorites_list():
@@ -471,88 +554,209 @@ def create_app(database_uri=None):
         user_id = session['user_id']
 
         from app.service.favorites import FavoriteService
-        from app.model.recipes import Recipe
 
-        favorites = FavoriteService.get_user_favorites(user_id)
-        recipe_list = []
+        # One JOIN returns every card's data (owner included), so pages need no per-recipe fetches
+        # Optional: ?fields=name,owner to trim the payload, ?limit=N&cursor=... to page through
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
 
-        for fav in favorites:
-            recipe = Recipe.query.get(fav.recipe_id)
-            if recipe:
-                recipe_list.append({
-                    'recipe_id': recipe.id,
-                    'name': recipe.name,
-                    'image': getattr(recipe, 'image_location', None),
-                    'prep_time': getattr(recipe, 'prep_time', None),
-                    'cook_time': getattr(recipe, 'cook_time', None),
-                    'total_time': getattr(recipe, 'total_time', None),
-                    'servings': getattr(recipe, 'servings', None),
-                })
+        try:
+            page = FavoriteService.get_user_favorite_recipes(
+                user_id,
+                fields=fields,
+                cursor=request.args.get('cursor') or None,
+                limit=request.args.get('limit', type=int)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        return jsonify({'recipes': recipe_list}), 200
+        return jsonify({'recipes': page.items, **page.to_dict()}), 200
 
     @app.route('/browse_recipes_list', methods=['GET'])
     # Fetches a listing of recipes for the browse_recipes endpoint, to be displayed on the browse_recipes.html page
     # Requirement # 1.0.1 - The app should be able to display a listing of recipes
     def browse_recipes_list():
-        from app.model.recipes import Recipe
-        from app.model.users import User
+        from app.service.recipe import RecipeService
+        from app.service.catalog import CatalogService
+        from app.service.pagination import InvalidCursor
         # Requirement # 1.2.0 - The app should be able to organize recipes by category
         category = request.args.get('category', None)
+        if category and category.lower() == "all":
+            category = None
+
+        # Listings change only when a recipe is written, revalidate against the catalog version
+        version = CatalogService.get_version()
+        validators = http_cache.catalog_validators(version)
+        response = http_cache.not_modified(validators)
+        if response:
+            return response
+
+        # Owner usernames come from a single joined query (no per-recipe lookups)
+        # Results are keyset paginated, follow next_cursor for the following page
+        page_args = parse_page_args(request.args)
+        try:
+            page = RecipeService.browse_recipes(category, **page_args)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Facet counts come from the trigger maintained counts table, cached per catalog version
+        extra = {}
+        if flag_arg(request.args, 'facets') and not page_args['cursor']:
+            from app.service.facets import FacetService
+            extra['facets'] = FacetService.catalog_facets(
+                category, catalog_version=version.version if version else None
+            )
 
-        query = Recipe.query
-        if category and category.lower() != "all":
-            query = query.filter(Recipe.category.ilike(category))
+        response = jsonify({'recipes': [
+            {
+                'recipe_id': r.id,
+                'name': r.name,
+                'image_location': r.image_location,
+                'prep_time': r.prep_time,
+                'cook_time': r.cook_time,
+                'total_time': r.total_time,
+                'servings': r.servings,
+                'category': r.category,
+                'owner': r.owner or "Anonymous"
+            } for r in page.items
+        ], **page.to_dict(), **extra})
+        return http_cache.with_validators(response, validators), 200
+
+    @app.route('/popular', methods=['GET'])
+    # Most favorited recipes: /popular?category=Dessert&limit=10, or every category's leaderboard without category
+    # Read from recipes.favorite_count (kept by triggers on favorites) through the (category, favorite_count) index
+    def popular():
+        from app.service.popularity import PopularityService
 
-        recipes = query.all()
+        category = request.args.get('category', None)
+        if category and category.lower() == "all":
+            category = None
+        limit = request.args.get('limit', type=int)
 
-        return jsonify({'recipes': [
-            {
+        if category:
+            return jsonify({
+                'category': PopularityService.normalize_category(category) or category,
+                'recipes': PopularityService.top_recipes(category, limit=limit)
+            }), 200
+        return jsonify({'categories': PopularityService.top_recipes(limit=limit)}), 200
+
+    @app.route('/recommendations/<int:recipe_id>', methods=['GET'])
+    # "People who liked this also liked": recipes most often favorited together with recipe_id
+    # Precomputed neighbors (RecommendationService.refresh), served with one primary key range read
+    def recipe_recommendations(recipe_id):
+        from app.service.recommendations import RecommendationService
+
+        recipes = RecommendationService.similar_recipes(recipe_id, limit=request.args.get('limit', type=int))
+        if recipes is None:
+            return jsonify({'error': 'Recipe not found'}), 404
+        return jsonify({'recipe_id': recipe_id, 'recipes': recipes}), 200
+
+    @app.route('/recommendations', methods=['GET'])
+    # Recommendations for the current user, from the precomputed neighbors of their favorites
+    def user_recommendations():
+        auth_check = require_login()
+        if auth_check:
+            return auth_check
+
+        from app.service.recommendations import RecommendationService
+        recipes = RecommendationService.recommendations_for_user(
+            session['user_id'], limit=request.args.get('limit', type=int)
+        )
+        return jsonify({'recipes': recipes}), 200
+
+    @app.route('/similar/<int:recipe_id>', methods=['GET'])
+    # Recipes made of similar things (TF-IDF over names and ingredients), for recipes without favorites yet
+    # Served from an in-memory index that new recipes are appended to, no SQL beyond the recipe cache
+    def similar_recipes(recipe_id):
+        from app.service.similar import SimilarService
+
+        recipes = SimilarService.similar_recipes(recipe_id, limit=request.args.get('limit', type=int))
+        if recipes is None:
+            return jsonify({'error': 'Recipe not found'}), 404
+        return jsonify({'recipe_id': recipe_id, 'recipes': recipes}), 200
+
+    @app.route('/search_suggest', methods=['GET'])
+    # Type-ahead for the search box: recipe names, categories and ingredients starting with ?prefix=
+    # Served from an in-memory prefix index, no SQL unless a recipe was written since the last call
+    def search_suggest():
+        from app.service.suggest import SuggestService
+
+        prefix = request.args.get('prefix', '')
+        return jsonify({
+            'prefix': prefix,
+            'suggestions': SuggestService.suggest(prefix, limit=request.args.get('limit', type=int))
+        }), 200
+
+    @app.route('/pantry_search', methods=['GET'])
+    # "What can I cook": recipes ranked by how many of their ingredients the user already has
+    # Pantry items come as ?items=flour,eggs,milk and/or repeated ?item= parameters
+    def pantry_search():
+        from app.service.pantry import PantryService
+        from app.service.recipe import RecipeService
+
+        items = request.args.getlist('item')
+        for value in request.args.getlist('items'):
+            items.extend(value.split(','))
+        max_missing = request.args.get('max_missing', type=int)
+
+        items, ranked = PantryService.find_recipes(
+            items, limit=request.args.get('limit', type=int), max_missing=max_missing
+        )
+        if not items:
+            return jsonify({'error': 'Enter at least one ingredient.'}), 400
+
+        recipe_ids = [recipe_id for recipe_id, _, _ in ranked]
+        summaries = RecipeService.get_recipe_summaries(recipe_ids)
+        missing = PantryService.missing_ingredients(items, recipe_ids)
+        recipes = []
+        for recipe_id, matched, missing_count in ranked:
+            r = summaries.get(recipe_id)
+            if r is None:
+                continue
+            recipes.append({
                 'recipe_id': r.id,
                 'name': r.name,
-                'image_location': getattr(r, 'image_location', None),
-                'prep_time': getattr(r, 'prep_time', None),
-                'cook_time': getattr(r, 'cook_time', None),
-                'total_time': getattr(r, 'total_time', None),
-                'servings': getattr(r, 'servings', None),
-                'category': getattr(r, 'category', 'Uncategorized'),
-                'owner': User.query.get(r.user_id).username if r.user_id and User.query.get(r.user_id) else "Anonymous"
-            } for r in recipes
-        ]}), 200
+                'image_location': r.image_location,
+                'prep_time': r.prep_time,
+                'cook_time': r.cook_time,
+                'total_time': r.total_time,
+                'servings': r.servings,
+                'category': r.category,
+                'owner': r.owner or "Anonymous",
+                'matched': matched,
+                'missing': missing_count,
+                'missing_ingredients': missing[recipe_id],
+            })
+        return jsonify({'items': items, 'recipes': recipes}), 200
 
     @app.route('/search_results', methods=['GET'])
     def search_results_json():
-        from app.model.recipes import Recipe
+        from app.service.recipe import RecipeService
+        from app.service.catalog import CatalogService
+        from app.service.pagination import InvalidCursor
 
         query = request.args.get('q', '').strip().lower()
         if not query:
-            return jsonify({'recipes': []})
+            return jsonify({'recipes': [], 'next_cursor': None})
 
-        recipes = Recipe.query.filter(
-            db.or_(
-                Recipe.name.ilike(f"%{query}%"),
-                Recipe.category.ilike(f"%{query}%"),
-                Recipe.ingredients.ilike(f"%{query}%")
+        # Results change only when a recipe is written, revalidate against the catalog version
+        version = CatalogService.get_version()
+        validators = http_cache.catalog_validators(version)
+        response = http_cache.not_modified(validators)
+        if response:
+            return response
+
+        try:
+            # Pages are cached per catalog version, repeated searches run no SQL until a recipe changes
+            result = RecipeService.search_results_dict(
+                query, catalog_version=version.version if version else None,
+                facets=flag_arg(request.args, 'facets'), **parse_page_args(request.args)
             )
-        ).all()
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
 
-        return jsonify({
-            'recipes': [
-                {
-                    'recipe_id': r.id,
-                    'name': r.name,
-                    'image_location': getattr(r, 'image_location', None),
-                    'prep_time': getattr(r, 'prep_time', None),
-                    'cook_time': getattr(r, 'cook_time', None),
-                    'total_time': getattr(r, 'total_time', None),
-                    'servings': getattr(r, 'servings', None),
-                    'category': getattr(r, 'category', None),
-                    'ingredients': getattr(r, 'ingredients', None),
-                    'instructions': getattr(r, 'instructions', None),
-                    'created_by': r.user.username if r.user else None
-                } for r in recipes
-            ]
-        })
+        response = jsonify(result)
+        return http_cache.with_validators(response, validators)
 
     @app.route('/show_recipe')
     # displays a single, editable recipe on a page
@@ -565,6 +769,15 @@ def create_app(database_uri=None):
             return "Missing recipe_id", 400
 
         from app.model.recipes import Recipe
+        from app.service.recipe import RecipeService
+
+        # Revalidation: answer 304 from the recipe's updated_at alone (cached or one column)
+        if http_cache.is_conditional():
+            updated_at = RecipeService.get_recipe_updated_at(recipe_id)
+            response = http_cache.not_modified(http_cache.recipe_validators(recipe_id, updated_at))
+            if response:
+                return response
+
         recipe = Recipe.query.get(recipe_id)
 
         if not recipe:
@@ -572,42 +785,55 @@ def create_app(database_uri=None):
 
         username = recipe.user.username if recipe.user else "Unknown"
 
-        return render_template('show_recipe.html', recipe=recipe, username=username)
+        response = app.make_response(render_template('show_recipe.html', recipe=recipe, username=username))
+        return http_cache.with_validators(response, http_cache.recipe_validators(recipe.id, recipe.updated_at))
 
     @app.route('/get_recipe/<int:recipe_id>', methods=['GET'])
     # Helper to get data from the recipes table based on recipe_id
     # Used by add_recipes.html, favorites.html, and show_recipe.html web pages
     def get_recipe(recipe_id):
-        from app.model.recipes import Recipe
-        from app.model.users import User
+        from app.service.recipe import RecipeService
 
-        recipe = Recipe.query.get(recipe_id)
+        # Revalidation: answer 304 from the recipe's updated_at alone (cached or one column)
+        if http_cache.is_conditional():
+            updated_at = RecipeService.get_recipe_updated_at(recipe_id)
+            response = http_cache.not_modified(http_cache.recipe_validators(recipe_id, updated_at))
+            if response:
+                return response
+
+        # Hot recipes come from the recipe cache without touching the database
+        recipe, updated_at = RecipeService.get_recipe_dict(recipe_id)
         if not recipe:
             return jsonify({'error': 'Recipe not found'}), 404
 
-        owner_username = "Anonymous"
-        if recipe.user_id:
-            user = User.query.get(recipe.user_id)
-            if user:
-                owner_username = user.username
+        response = jsonify({'recipe': recipe})
+        return http_cache.with_validators(response, http_cache.recipe_validators(recipe_id, updated_at)), 200
 
-        return jsonify({
-            'recipe': {
-                'recipe_id': recipe.id,
-                'name': recipe.name,
-                'ingredients': recipe.ingredients,
-                'instructions': recipe.instructions,
-                'category': getattr(recipe, 'category', 'Uncategorized'),
-                'prep_time': getattr(recipe, 'prep_time', None),
-                'cook_time': getattr(recipe, 'cook_time', None),
-                'total_time': getattr(recipe, 'total_time', None),
-                'servings': getattr(recipe, 'servings', None),
-                'image_location': getattr(recipe, 'image_location', None),
-                'user_id': recipe.user_id,
-                'owner': owner_username,
-                'image': getattr(recipe, 'image_location', None),
-            }
-        }), 200
+    @app.route('/recipes', methods=['GET'])
+    # Batch version of /get_recipe: /recipes?ids=1,2,3 (optionally &fields=name,owner)
+    # Recipes come back in the order asked, ids that do not exist as {'recipe_id': id, 'error': ...}
+    # Cached recipes are read in one batch and the rest with one IN query
+    def get_recipes():
+        from app.service.recipe import RecipeService
+
+        try:
+            recipe_ids = parse_id_list(request.args.get('ids'))
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma separated list of recipe ids.'}), 400
+        if not recipe_ids:
+            return jsonify({'error': 'ids is required.'}), 400
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+        try:
+            recipes = RecipeService.get_recipes_by_ids(recipe_ids, fields=fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({'recipes': [
+            recipe if recipe is not None else {'recipe_id': recipe_id, 'error': 'Recipe not found'}
+            for recipe_id, recipe in zip(recipe_ids, recipes)
+        ]}), 200
 
     @app.route('/update_recipe/<int:recipe_id>', methods=['POST'])
     # Used to update an existing recipe given by recipe_id if owned by the current user
@@ -654,6 +880,9 @@ def create_app(database_uri=None):
 
         if recipe.user_id == user_id:
             recipe.name = name
+            if ingredients != recipe.ingredients:
+                from app.service.ingredients import IngredientService
+                IngredientService.replace_recipe_ingredients(recipe.id, ingredients)
             recipe.ingredients = ingredients
             recipe.instructions = instructions
             recipe.category = category
@@ -666,8 +895,9 @@ def create_app(database_uri=None):
             if image_location:
                 recipe.image_location = image_location
             
-            recipe.updated_at = datetime.now()
+            recipe.updated_at = datetime.utcnow()
             db.session.commit()
+            RecipeService.invalidate_cached_recipe(recipe.id)
 
             return jsonify({'success': True, 'recipe_id': recipe.id}), 200
 
@@ -692,4 +922,19 @@ def create_app(database_uri=None):
 
         return jsonify({'success': True, 'recipe_id': forked.id}), 200
 
+    from app.service.cache import CacheService
+    instrumentation.get_metrics(app).add_collector(CacheService.metrics)
+
+    @app.route('/metrics', methods=['GET'])
+    # Per-endpoint request, latency and SQL totals in the Prometheus text format
+    def metrics():
+        return instrumentation.get_metrics(app).render(), 200, {
+            'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'
+        }
+
+    # Build the search suggestion index now rather than on the first keystroke
+    from app.service.suggest import SuggestService
+    with app.app_context():
+        SuggestService.warm()
+
     return app
@@ -0,0 +1,77 @@
+"""Item-to-item similarity from co-favorites ("people who liked this also liked").
+
+Two recipes are similar when the same users favorited both. With A the
+user x recipe favorites matrix, co-favorite counts are the sparse product
+A^T A: the row of recipe r is the sum of the favorite lists of r's fans,
+counted here with a Counter over array('I') lists. Counts are turned
+into cosine similarities, co / sqrt(favorites of r * favorites of x), so
+recipes everybody favorites do not top every list.
+"""
+import heapq
+import math
+from array import array
+from collections import Counter
+from itertools import chain
+
+# Neighbors kept per recipe
+TOP_K = 20
+# Fans with more favorites than this are left out of co-favorite counts, their
+# lists say little about any one recipe and cost the square of their length
+MAX_FAN_FAVORITES = 1000
+
+
+def similarity(co_count, favorites, other_favorites):
+    """Cosine similarity of two recipes from their co-favorite count and favorite counts."""
+    if not co_count or not favorites or not other_favorites:
+        return 0.0
+    return co_count / math.sqrt(favorites * other_favorites)
+
+
+def co_favorite_counts(recipe_id, fans, favorites_of):
+    """Counter of recipe id -> users who favorited both it and recipe_id.
+
+    fans are the users who favorited recipe_id, favorites_of maps a user to
+    their favorite recipe ids.
+    """
+    lists = (favorites_of.get(user_id, ()) for user_id in fans)
+    counts = Counter(chain.from_iterable(
+        favorites for favorites in lists if len(favorites) <= MAX_FAN_FAVORITES
+    ))
+    counts.pop(recipe_id, None)
+    return counts
+
+
+def top_neighbors(recipe_id, co_counts, favorite_counts, k=TOP_K):
+    """Up to k (neighbor_id, score, co_count) for recipe_id, most similar first.
+
+    favorite_counts maps each recipe to its number of favorites. Ties go to
+    the pair with more co-favorites, then to the lower id.
+    """
+    favorites = favorite_counts.get(recipe_id, 0)
+    scored = (
+        (similarity(co, favorites, favorite_counts.get(other, 0)), co, other)
+        for other, co in co_counts.items()
+    )
+    best = heapq.nsmallest(k, ((-score, -co, other) for score, co, other in scored if score > 0))
+    return [(other, -score, -co) for score, co, other in best]
+
+
+def merge_neighbor(neighbors, neighbor_id, score, co_count, k=TOP_K):
+    """neighbors (a top_neighbors list) with neighbor_id's entry replaced by
+    (score, co_count), or removed when score is 0, kept sorted and cut to k."""
+    merged = [entry for entry in neighbors if entry[0] != neighbor_id]
+    if score > 0:
+        merged.append((neighbor_id, score, co_count))
+    merged.sort(key=lambda entry: (-entry[1], -entry[2], entry[0]))
+    return merged[:k]
+
+
+def group_favorites(rows):
+    """{user_id: array('I') of recipe ids} from (user_id, recipe_id) rows."""
+    favorites_of = {}
+    for user_id, recipe_id in rows:
+        favorites = favorites_of.get(user_id)
+        if favorites is None:
+            favorites = favorites_of[user_id] = array('I')
+        favorites.append(recipe_id)
+    return favorites_of
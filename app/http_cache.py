@@ -0,0 +1,74 @@
+"""
+Conditional request (ETag / Last-Modified) helpers for the recipe routes
+
+Single recipes are validated by their updated_at, listings by the catalog
+version that triggers bump on every recipe write. A route looks up its
+validators first and answers 304 when the client's copy is still current,
+before any recipe is loaded or serialized.
+"""
+
+from datetime import timezone
+from flask import current_app, request
+
+# Browsers may store responses but have to revalidate them on every use
+CACHE_CONTROL = 'no-cache'
+
+
+class Validators:
+    """ETag and Last-Modified of a response"""
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        if last_modified is not None:
+            # Stored as naive UTC, HTTP dates have one second resolution
+            last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        self.last_modified = last_modified
+
+    def matches_request(self):
+        """Whether the request's If-None-Match / If-Modified-Since says the client is up to date"""
+        if request.if_none_match:
+            # If-Modified-Since is ignored when If-None-Match is sent (RFC 9110 13.1.3)
+            return request.if_none_match.contains_weak(self.etag)
+        if request.if_modified_since and self.last_modified is not None:
+            return self.last_modified <= request.if_modified_since
+        return False
+
+    def apply(self, response):
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+
+
+def is_conditional():
+    """Whether the request carries validators worth checking before loading anything"""
+    return bool(request.if_none_match) or request.if_modified_since is not None
+
+
+def recipe_validators(recipe_id, updated_at):
+    """Validators of a single recipe, None when it has no updated_at"""
+    if updated_at is None:
+        return None
+    return Validators(f"recipe-{recipe_id}-{updated_at.isoformat()}", updated_at)
+
+
+def catalog_validators(version):
+    """Validators of a recipe listing from a CatalogService.get_version() row, None without one"""
+    if version is None:
+        return None
+    return Validators(f"catalog-{version.version}", version.updated_at)
+
+
+def not_modified(validators):
+    """A 304 response if the client's copy is current, otherwise None"""
+    if validators is None or not validators.matches_request():
+        return None
+    return validators.apply(current_app.response_class(status=304))
+
+
+def with_validators(response, validators):
+    """Add the validators (if any) to a full response"""
+    if validators is not None:
+        validators.apply(response)
+    return response
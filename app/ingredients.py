@@ -0,0 +1,162 @@
+"""
+Ingredient line parsing for the recipe_ingredients table
+
+Recipe.ingredients is free text with one ingredient per line, for example
+"1 1/2 cups all-purpose flour" or "1/2 onion, diced". Each line is split into
+a quantity, a unit and a normalized ingredient name, so "2 Cups Tomatoes,
+chopped" and "1 can diced tomatoes" can be found by an index seek on the name
+instead of a substring scan over every recipe.
+
+Parsing is deliberately forgiving: anything that is not recognised as a
+quantity or unit stays part of the name, and lines that leave no name behind
+are skipped.
+"""
+
+import re
+from collections import namedtuple
+from fractions import Fraction
+
+ParsedIngredient = namedtuple('ParsedIngredient', ['position', 'quantity', 'unit', 'name', 'line'])
+
+# Longest stored name (matches the recipe_ingredients.name column)
+MAX_NAME_LENGTH = 100
+
+# Spelling of each unit -> the stored unit
+UNITS = {
+    'cup': 'cup', 'cups': 'cup', 'c': 'cup',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'tbsp': 'tbsp', 'tbsps': 'tbsp', 'tbs': 'tbsp', 'tbl': 'tbsp',
+    'teaspoon': 'tsp', 'teaspoons': 'tsp', 'tsp': 'tsp', 'tsps': 'tsp',
+    'ounce': 'oz', 'ounces': 'oz', 'oz': 'oz',
+    'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz', 'fl oz': 'fl oz',
+    'pound': 'lb', 'pounds': 'lb', 'lb': 'lb', 'lbs': 'lb',
+    'gram': 'g', 'grams': 'g', 'g': 'g',
+    'kilogram': 'kg', 'kilograms': 'kg', 'kg': 'kg',
+    'milliliter': 'ml', 'milliliters': 'ml', 'ml': 'ml',
+    'liter': 'l', 'liters': 'l', 'l': 'l',
+    'pint': 'pint', 'pints': 'pint', 'quart': 'quart', 'quarts': 'quart', 'gallon': 'gallon', 'gallons': 'gallon',
+    'clove': 'clove', 'cloves': 'clove',
+    'can': 'can', 'cans': 'can', 'jar': 'jar', 'jars': 'jar',
+    'package': 'package', 'packages': 'package', 'pkg': 'package', 'packet': 'package', 'packets': 'package',
+    'block': 'block', 'blocks': 'block', 'bunch': 'bunch', 'bunches': 'bunch',
+    'slice': 'slice', 'slices': 'slice', 'stick': 'stick', 'sticks': 'stick',
+    'piece': 'piece', 'pieces': 'piece', 'head': 'head', 'heads': 'head',
+    'sprig': 'sprig', 'sprigs': 'sprig', 'stalk': 'stalk', 'stalks': 'stalk',
+    'pinch': 'pinch', 'pinches': 'pinch', 'dash': 'dash', 'dashes': 'dash', 'handful': 'handful',
+}
+# Two word units are tried before one word units
+MULTI_WORD_UNITS = sorted((unit for unit in UNITS if ' ' in unit), key=len, reverse=True)
+
+UNICODE_FRACTIONS = {
+    '¼': '1/4', '½': '1/2', '¾': '3/4', '⅓': '1/3', '⅔': '2/3', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8',
+}
+
+# "1", "1.5", "1/2", "1 1/2", optionally a range such as "2-3" or "2 to 3" (the lower bound is kept)
+NUMBER = r'\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?'
+QUANTITY_PATTERN = re.compile(rf'^(?P<quantity>{NUMBER})(?:\s*(?:-|–|to)\s*(?:{NUMBER}))?\s*')
+# List markers such as "- ", "* ", "• " or "1) "
+BULLET_PATTERN = re.compile(r'^\s*(?:[-*•]+|\d+[.)](?=\s))\s*')
+PARENTHESES_PATTERN = re.compile(r'\([^)]*\)')
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9' -]+")
+
+# Preparation words that say nothing about what the ingredient is
+DESCRIPTORS = {
+    'chopped', 'diced', 'minced', 'sliced', 'grated', 'shredded', 'crumbled', 'mashed', 'melted',
+    'softened', 'peeled', 'crushed', 'cubed', 'beaten', 'cooked', 'uncooked', 'fresh', 'freshly',
+    'large', 'medium', 'small', 'ripe', 'finely', 'roughly', 'thinly', 'chilled', 'room-temperature',
+}
+# Endings of lines such as "salt and pepper to taste"
+TRAILING_PHRASES = (' to taste', ' for serving', ' for garnish', ' as needed', ' optional')
+# Words ending in s that are not plurals
+SINGULAR_EXCEPTIONS = {'molasses', 'grits', 'brussels', 'hummus', 'couscous', 'asparagus'}
+IRREGULAR_PLURALS = {'leaves': 'leaf', 'loaves': 'loaf', 'halves': 'half', 'knives': 'knife'}
+
+
+def parse_quantity(text):
+    """Float value of "1", "1.5", "1/2" or "1 1/2", None if it is not a number"""
+    try:
+        return float(sum(Fraction(part) for part in text.split()))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def singularize(word):
+    """Singular of a plural ingredient word ("tomatoes" -> "tomato", "berries" -> "berry")"""
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word in SINGULAR_EXCEPTIONS or len(word) <= 3:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes') or word.endswith('ches') or word.endswith('shes'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def normalize_name(text):
+    """Lower case ingredient name without notes, descriptors or plural forms.
+
+    "Tomatoes, chopped (fresh)" -> "tomato", "all-purpose Flour" -> "all-purpose flour".
+    Also used on search terms, so they compare equal to the stored names.
+    """
+    name = PARENTHESES_PATTERN.sub(' ', text.lower())
+    # Anything after the first comma is a note ("1 banana, sliced")
+    name = name.split(',', 1)[0]
+    name = NON_WORD_PATTERN.sub(' ', name)
+    for phrase in TRAILING_PHRASES:
+        if name.rstrip().endswith(phrase):
+            name = name.rstrip()[:-len(phrase)]
+    words = [word.strip("'-") for word in name.split()]
+    if words and words[0] == 'of':
+        words = words[1:]
+    words = [word for word in words if word and word not in DESCRIPTORS]
+    if not words:
+        return ''
+    words[-1] = singularize(words[-1])
+    return ' '.join(words)[:MAX_NAME_LENGTH].strip()
+
+
+def parse_line(line, position=0):
+    """ParsedIngredient for one ingredient line, None when the line has no ingredient name"""
+    text = line.strip()
+    for fraction, replacement in UNICODE_FRACTIONS.items():
+        # "1½" -> "1 1/2"
+        text = re.sub(rf'(\d){fraction}', rf'\1 {replacement}', text).replace(fraction, replacement)
+    text = BULLET_PATTERN.sub('', text)
+
+    quantity = None
+    match = QUANTITY_PATTERN.match(text)
+    if match:
+        quantity = parse_quantity(match.group('quantity'))
+        text = text[match.end():]
+
+    unit = None
+    lowered = text.lower()
+    for candidate in MULTI_WORD_UNITS:
+        if lowered.startswith(candidate + ' '):
+            unit = UNITS[candidate]
+            text = text[len(candidate):]
+            break
+    else:
+        first, _, rest = text.partition(' ')
+        candidate = first.lower().rstrip('.')
+        # Single letters are only units right after a number ("2 c flour", not "c" as a name)
+        if rest and candidate in UNITS and (len(candidate) > 1 or quantity is not None):
+            unit = UNITS[candidate]
+            text = rest
+
+    name = normalize_name(text)
+    if not name:
+        return None
+    return ParsedIngredient(position, quantity, unit, name, line.strip()[:255])
+
+
+def parse_ingredients(ingredients):
+    """ParsedIngredient for every line of a recipe's ingredients text, positions numbered from 0"""
+    parsed = []
+    for line in (ingredients or '').splitlines():
+        ingredient = parse_line(line, position=len(parsed))
+        if ingredient is not None:
+            parsed.append(ingredient)
+    return parsed
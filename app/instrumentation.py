@@ -0,0 +1,233 @@
+"""
+Per-request SQL and latency instrumentation applied by create_app
+
+Every request records its query count, total SQL time, slowest statement and
+wall time. These are sent back as a Server-Timing header, logged as a warning
+when the request is slower than SLOW_REQUEST_MS, and added to per-endpoint
+totals served by /metrics in the Prometheus text format.
+"""
+
+import threading
+import time
+from flask import g, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+EXTENSION_KEY = 'instrumentation'
+
+# app config key -> default value
+INSTRUMENTATION_SETTINGS = {
+    # Add the Server-Timing header to every response
+    'SERVER_TIMING': True,
+    # Requests slower than this many milliseconds are logged (None to disable)
+    'SLOW_REQUEST_MS': 500,
+}
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Slowest statements are truncated to this many characters in logs
+STATEMENT_SAMPLE_LENGTH = 300
+
+
+class RequestStats:
+    """What a single request cost, kept on flask.g while it runs"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.wall_time = None
+
+    def record_query(self, statement, duration):
+        self.queries += 1
+        self.sql_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+        return self
+
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        return (
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries", '
+            f'app;dur={self.wall_time * 1000:.2f}'
+        )
+
+
+class EndpointMetrics:
+    """Running totals for one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slow_requests = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+
+class Metrics:
+    """Per-endpoint totals shared by every request of an app"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.collectors = []
+
+    def add_collector(self, collector):
+        """Add metrics from elsewhere (caches, ...) to /metrics.
+
+        collector is called inside the /metrics request and returns a dict of
+        metric name -> (type, help text, value), where value is a number or a
+        list of (labels dict, number) samples.
+        """
+        self.collectors.append(collector)
+
+    def observe(self, endpoint, stats, slow):
+        with self._lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoints[endpoint] = EndpointMetrics()
+            metrics.requests += 1
+            metrics.duration += stats.wall_time
+            metrics.queries += stats.queries
+            metrics.sql_time += stats.sql_time
+            if slow:
+                metrics.slow_requests += 1
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if stats.wall_time <= bound:
+                    metrics.buckets[i] += 1
+
+    def render(self):
+        """All totals in the Prometheus text exposition format"""
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+            def label(endpoint, **extra):
+                return format_labels({'endpoint': endpoint, **extra})
+
+            histogram = []
+            for endpoint, metrics in endpoints:
+                for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+                    histogram.append(f"recipe_box_request_duration_seconds_bucket{{{label(endpoint, le=bound)}}} {count}")
+                histogram.append(f"recipe_box_request_duration_seconds_bucket{{{label(endpoint, le='+Inf')}}} {metrics.requests}")
+                histogram.append(f"recipe_box_request_duration_seconds_sum{{{label(endpoint)}}} {metrics.duration:.6f}")
+                histogram.append(f"recipe_box_request_duration_seconds_count{{{label(endpoint)}}} {metrics.requests}")
+            family('recipe_box_request_duration_seconds', 'histogram',
+                   'Wall time of requests.', histogram)
+
+            family('recipe_box_requests_total', 'counter', 'Requests handled.', [
+                f"recipe_box_requests_total{{{label(endpoint)}}} {metrics.requests}"
+                for endpoint, metrics in endpoints
+            ])
+            family('recipe_box_sql_queries_total', 'counter', 'SQL statements executed by requests.', [
+                f"recipe_box_sql_queries_total{{{label(endpoint)}}} {metrics.queries}"
+                for endpoint, metrics in endpoints
+            ])
+            family('recipe_box_sql_seconds_total', 'counter', 'Time spent executing SQL statements.', [
+                f"recipe_box_sql_seconds_total{{{label(endpoint)}}} {metrics.sql_time:.6f}"
+                for endpoint, metrics in endpoints
+            ])
+            family('recipe_box_slow_requests_total', 'counter', 'Requests slower than SLOW_REQUEST_MS.', [
+                f"recipe_box_slow_requests_total{{{label(endpoint)}}} {metrics.slow_requests}"
+                for endpoint, metrics in endpoints
+            ])
+            collectors = list(self.collectors)
+
+        for collector in collectors:
+            for name, (kind, help_text, value) in collector().items():
+                if not isinstance(value, list):
+                    value = [({}, value)]
+                family(name, kind, help_text, [
+                    f"{name}{{{format_labels(labels)}}} {number}" if labels else f"{name} {number}"
+                    for labels, number in value
+                ])
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items())
+
+
+def set_default_config(app):
+    """Fill in any instrumentation setting the app config does not already have"""
+    for key, default in INSTRUMENTATION_SETTINGS.items():
+        app.config.setdefault(key, default)
+
+
+def get_metrics(app):
+    return app.extensions[EXTENSION_KEY]
+
+
+def current_stats():
+    """RequestStats of the request being handled, or None outside a request"""
+    if not has_request_context():
+        return None
+    return g.get('request_stats')
+
+
+def _request_started(sender, **extra):
+    g.request_stats = RequestStats()
+
+
+def _request_finished(sender, response, **extra):
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.finish()
+
+    if sender.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = stats.server_timing()
+
+    threshold = sender.config['SLOW_REQUEST_MS']
+    slow = threshold is not None and stats.wall_time * 1000 >= threshold
+    if slow:
+        statement = (stats.slowest_statement or '')[:STATEMENT_SAMPLE_LENGTH]
+        sender.logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries, %.1f ms SQL, slowest %.1f ms: %s",
+            request.method, request.path, stats.wall_time * 1000, stats.queries,
+            stats.sql_time * 1000, stats.slowest_time * 1000, ' '.join(statement.split())
+        )
+
+    get_metrics(sender).observe(request.endpoint or 'unmatched', stats, slow)
+
+
+def init_app(app, engine):
+    """Start recording requests of app and the SQL they send to engine"""
+    set_default_config(app)
+    app.extensions[EXTENSION_KEY] = Metrics()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        stats = current_stats()
+        if stats is not None:
+            stats.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def abandon_query(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started'):
+            conn.info['query_started'].pop()
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
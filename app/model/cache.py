@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String
+from app import db
+
+# Cache invalidations broadcast to every worker process (see CacheService.sync).
+# Each row is a version stamp, AUTOINCREMENT keeps them increasing even after
+# old rows are pruned, so a worker only has to read the rows past the last
+# version it has seen.
+CACHE_INVALIDATIONS_TABLE = 'cache_invalidations'
+
+CREATE_CACHE_INVALIDATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_invalidations (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        namespace VARCHAR(50) NOT NULL,
+        key VARCHAR(255),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cache_invalidations_created_at ON cache_invalidations (created_at);",
+]
+
+
+class CacheInvalidation(db.Model):
+    """A cache key (or whole namespace when key is NULL) dropped by some worker"""
+    __tablename__ = CACHE_INVALIDATIONS_TABLE
+    __table_args__ = (
+        db.Index('ix_cache_invalidations_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+    version = Column(Integer, primary_key=True)
+    namespace = Column(String(50), nullable=False)
+    key = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CacheInvalidation {self.version} {self.namespace}:{self.key}>'
@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, event
+from app import db
+
+# Catalog-wide version stamp for cache validators of recipe listings.
+# A single row whose version is bumped by triggers on every insert, update or
+# delete of a recipe, whether it comes from the app, another worker process or
+# a script, so listings can be revalidated with one primary key lookup.
+CATALOG_VERSION_TABLE = 'catalog_version'
+
+# Updates of these recipes columns bump the version. favorite_count is left out,
+# it is kept by triggers on favorites and no listing or recipe page shows it.
+CATALOG_COLUMNS = (
+    'name', 'ingredients', 'instructions', 'category', 'created_at', 'updated_at',
+    'user_id', 'image_location', 'prep_time', 'cook_time', 'total_time', 'servings',
+)
+
+CREATE_CATALOG_VERSION = [
+    """
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    "INSERT OR IGNORE INTO catalog_version (id, version, updated_at) VALUES (1, 0, CURRENT_TIMESTAMP);",
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS catalog_version_{suffix} AFTER {operation} ON recipes BEGIN
+        UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    END;
+    """
+    for suffix, operation in (
+        ('ai', 'INSERT'), ('au', f"UPDATE OF {', '.join(CATALOG_COLUMNS)}"), ('ad', 'DELETE')
+    )
+]
+
+# Triggers to drop before CREATE_CATALOG_VERSION when upgrading (older
+# databases have a catalog_version_au that fires on every column)
+DROP_CATALOG_VERSION_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS catalog_version_{suffix};" for suffix in ('ai', 'au', 'ad')
+]
+
+
+class CatalogVersion(db.Model):
+    """Single row counting writes to the recipes table (maintained by triggers)"""
+    __tablename__ = CATALOG_VERSION_TABLE
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
+
+
+def _create_catalog_version(target, connection, **kw):
+    """Add the version row and the recipes triggers once every table exists."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_CATALOG_VERSION:
+        connection.exec_driver_sql(statement)
+
+
+# After the whole metadata, the triggers need both recipes and catalog_version
+event.listen(db.metadata, 'after_create', _create_catalog_version)
@@ -0,0 +1,117 @@
+from sqlalchemy import Column, Integer, String, event
+from app import db
+
+# Recipe counts per (category, total time bucket, servings bucket).
+# Triggers move a recipe between rows on every insert, update or delete, so
+# the table never holds more than categories x time buckets x servings buckets
+# rows and facet counts for the whole catalog (or one category) are read
+# without touching the recipes table.
+RECIPE_FACET_COUNTS_TABLE = 'recipe_facet_counts'
+
+# (bucket, lower bound) in order; a value falls in the last bucket whose bound it reaches
+TOTAL_TIME_BUCKETS = (('0-15', 0), ('15-30', 15), ('30-60', 30), ('60+', 60))
+SERVINGS_BUCKETS = (('1-2', 0), ('3-4', 3), ('5-6', 5), ('7+', 7))
+# Bucket of recipes without a value
+UNKNOWN_BUCKET = 'unknown'
+# Category of recipes without one
+DEFAULT_CATEGORY = 'Uncategorized'
+
+
+def bucket_sql(column, buckets):
+    """SQL CASE expression putting column's value in one of buckets."""
+    whens = ' '.join(
+        f"WHEN {column} >= {bound} THEN '{bucket}'" for bucket, bound in reversed(buckets[1:])
+    )
+    return f"CASE WHEN {column} IS NULL THEN '{UNKNOWN_BUCKET}' {whens} ELSE '{buckets[0][0]}' END"
+
+
+def facet_values_sql(row):
+    """(category, total_time, servings) SQL expressions for a recipes row alias (new, old, recipes)."""
+    return (
+        f"COALESCE({row}.category, '{DEFAULT_CATEGORY}')",
+        bucket_sql(f'{row}.total_time', TOTAL_TIME_BUCKETS),
+        bucket_sql(f'{row}.servings', SERVINGS_BUCKETS),
+    )
+
+
+def _add_sql(row):
+    category, total_time, servings = facet_values_sql(row)
+    return f"""
+        INSERT INTO recipe_facet_counts (category, total_time, servings, count)
+        VALUES ({category}, {total_time}, {servings}, 1)
+        ON CONFLICT (category, total_time, servings) DO UPDATE SET count = count + 1;"""
+
+
+def _remove_sql(row):
+    category, total_time, servings = facet_values_sql(row)
+    return f"""
+        UPDATE recipe_facet_counts SET count = count - 1
+        WHERE category = {category} AND total_time = {total_time} AND servings = {servings};"""
+
+
+CREATE_RECIPE_FACET_COUNTS = [
+    """
+    CREATE TABLE IF NOT EXISTS recipe_facet_counts (
+        category VARCHAR(50) NOT NULL,
+        total_time VARCHAR(10) NOT NULL,
+        servings VARCHAR(10) NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category, total_time, servings)
+    );
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_facet_counts_ai AFTER INSERT ON recipes BEGIN{_add_sql('new')}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_facet_counts_ad AFTER DELETE ON recipes BEGIN{_remove_sql('old')}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_facet_counts_au
+    AFTER UPDATE OF category, total_time, servings ON recipes BEGIN{_remove_sql('old')}{_add_sql('new')}
+    END;
+    """,
+]
+
+DROP_RECIPE_FACET_COUNTS = [
+    "DROP TRIGGER IF EXISTS recipe_facet_counts_ai;",
+    "DROP TRIGGER IF EXISTS recipe_facet_counts_ad;",
+    "DROP TRIGGER IF EXISTS recipe_facet_counts_au;",
+    "DROP TABLE IF EXISTS recipe_facet_counts;",
+]
+
+# Recounts every recipe with one grouped scan (after bulk loads or an upgrade)
+_category, _total_time, _servings = facet_values_sql('recipes')
+REBUILD_RECIPE_FACET_COUNTS = [
+    "DELETE FROM recipe_facet_counts;",
+    f"""
+    INSERT INTO recipe_facet_counts (category, total_time, servings, count)
+    SELECT {_category}, {_total_time}, {_servings}, COUNT(*) FROM recipes GROUP BY 1, 2, 3;
+    """,
+]
+
+
+class RecipeFacetCount(db.Model):
+    """Number of recipes in one category, total time bucket and servings bucket (maintained by triggers)"""
+    __tablename__ = RECIPE_FACET_COUNTS_TABLE
+
+    category = Column(String(50), primary_key=True)
+    total_time = Column(String(10), primary_key=True)
+    servings = Column(String(10), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<RecipeFacetCount {self.category} {self.total_time} {self.servings}: {self.count}>'
+
+
+def _create_facet_triggers(target, connection, **kw):
+    """Add the recipes triggers once every table exists."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_RECIPE_FACET_COUNTS:
+        connection.exec_driver_sql(statement)
+
+
+# After the whole metadata, the triggers need both recipes and recipe_facet_counts
+event.listen(db.metadata, 'after_create', _create_facet_triggers)
@@ -1,10 +1,16 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app import db
 
 class Favorite(db.Model):
     __tablename__ = 'favorites'
+    __table_args__ = (
+        # One row per (user, recipe), also serves every lookup by user
+        Index('ix_favorites_user_recipe', 'user_id', 'recipe_id', unique=True),
+        # Popularity queries by recipe
+        Index('ix_favorites_recipe_id', 'recipe_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
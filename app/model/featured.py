@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from app import db
+
+class FeaturedRecipe(db.Model):
+    """The recipe chosen as "Recipe of the Day" for a given date"""
+    __tablename__ = 'featured_recipes'
+
+    feature_date = Column(Date, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey('recipes.id'), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __init__(self, feature_date, recipe_id):
+        self.feature_date = feature_date
+        self.recipe_id = recipe_id
+
+    def to_dict(self):
+        return {
+            'feature_date': self.feature_date.isoformat(),
+            'recipe_id': self.recipe_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<FeaturedRecipe {self.feature_date} recipe_id={self.recipe_id}>'
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String
+from app import db
+
+# One parsed row per ingredient line of a recipe (see app/ingredients.py).
+# The (name, recipe_id) index turns "which recipes use X" into an index seek,
+# and the (recipe_id, position) primary key keeps a recipe's rows together.
+RECIPE_INGREDIENTS_TABLE = 'recipe_ingredients'
+
+CREATE_RECIPE_INGREDIENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS recipe_ingredients (
+        recipe_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        quantity FLOAT,
+        unit VARCHAR(20),
+        name VARCHAR(100) NOT NULL,
+        line VARCHAR(255) NOT NULL,
+        PRIMARY KEY (recipe_id, position),
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id) ON DELETE CASCADE
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_recipe_ingredients_name ON recipe_ingredients (name, recipe_id);",
+]
+
+
+class RecipeIngredient(db.Model):
+    """Quantity, unit and normalized name parsed from one line of Recipe.ingredients"""
+    __tablename__ = RECIPE_INGREDIENTS_TABLE
+    __table_args__ = (
+        Index('ix_recipe_ingredients_name', 'name', 'recipe_id'),
+    )
+
+    recipe_id = Column(Integer, ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    quantity = Column(Float, nullable=True)
+    unit = Column(String(20), nullable=True)
+    name = Column(String(100), nullable=False)
+    line = Column(String(255), nullable=False)
+
+    def to_dict(self):
+        return {
+            'quantity': self.quantity,
+            'unit': self.unit,
+            'name': self.name,
+            'line': self.line,
+        }
+
+    def __repr__(self):
+        return f'<RecipeIngredient {self.recipe_id}:{self.position} {self.name!r}>'
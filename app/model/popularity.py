@@ -0,0 +1,58 @@
+from sqlalchemy import event
+from app import db
+
+# Denormalized favorites count per recipe (recipes.favorite_count).
+# Triggers on favorites move the count with every insert or delete, from the
+# app, another worker process or a script, so the "most favorited" recipes of
+# a category are a backwards range read of ix_recipes_category_favorite_count
+# instead of a GROUP BY over the whole favorites table.
+FAVORITE_COUNT_INDEX = 'ix_recipes_category_favorite_count'
+
+CREATE_FAVORITE_COUNTS = [
+    f"CREATE INDEX IF NOT EXISTS {FAVORITE_COUNT_INDEX} ON recipes (category, favorite_count);",
+    """
+    CREATE TRIGGER IF NOT EXISTS favorite_count_ai AFTER INSERT ON favorites BEGIN
+        UPDATE recipes SET favorite_count = favorite_count + 1 WHERE id = new.recipe_id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS favorite_count_ad AFTER DELETE ON favorites BEGIN
+        UPDATE recipes SET favorite_count = favorite_count - 1 WHERE id = old.recipe_id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS favorite_count_au AFTER UPDATE OF recipe_id ON favorites BEGIN
+        UPDATE recipes SET favorite_count = favorite_count - 1 WHERE id = old.recipe_id;
+        UPDATE recipes SET favorite_count = favorite_count + 1 WHERE id = new.recipe_id;
+    END;
+    """,
+]
+
+DROP_FAVORITE_COUNT_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS favorite_count_ai;",
+    "DROP TRIGGER IF EXISTS favorite_count_ad;",
+    "DROP TRIGGER IF EXISTS favorite_count_au;",
+]
+
+# For databases created before favorite_count existed (run by --upgrade)
+ADD_FAVORITE_COUNT_COLUMN = "ALTER TABLE recipes ADD COLUMN favorite_count INTEGER NOT NULL DEFAULT 0;"
+
+# Recounts every recipe from favorites (ix_favorites_recipe_id) and rewrites
+# only the counts that drifted, after bulk loads or writes made without the triggers
+RECONCILE_FAVORITE_COUNTS = """
+    UPDATE recipes
+    SET favorite_count = (SELECT COUNT(*) FROM favorites WHERE favorites.recipe_id = recipes.id)
+    WHERE favorite_count IS NOT (SELECT COUNT(*) FROM favorites WHERE favorites.recipe_id = recipes.id);
+"""
+
+
+def _create_favorite_count_triggers(target, connection, **kw):
+    """Add the favorites triggers once every table exists."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_FAVORITE_COUNTS:
+        connection.exec_driver_sql(statement)
+
+
+# After the whole metadata, the triggers need both favorites and recipes
+event.listen(db.metadata, 'after_create', _create_favorite_count_triggers)
@@ -0,0 +1,73 @@
+from sqlalchemy import event
+from app.model.recipes import Recipe
+
+# Full-text index over the searchable recipe columns.
+# The FTS5 table stores no copy of the text (content='recipes'), it only keeps
+# the trigram index, and the triggers below keep it in sync with every write.
+# The trigram tokenizer keeps the old ILIKE '%term%' behaviour (substring and
+# case-insensitive matches) while letting SQLite answer from the index.
+# Requires SQLite 3.34+ for the trigram tokenizer.
+RECIPES_FTS_TABLE = 'recipes_fts'
+
+CREATE_RECIPES_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+        name,
+        category,
+        ingredients,
+        content='recipes',
+        content_rowid='id',
+        tokenize='trigram'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts (rowid, name, category, ingredients)
+        VALUES (new.id, new.name, new.category, new.ingredients);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts (recipes_fts, rowid, name, category, ingredients)
+        VALUES ('delete', old.id, old.name, old.category, old.ingredients);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE OF name, category, ingredients ON recipes BEGIN
+        INSERT INTO recipes_fts (recipes_fts, rowid, name, category, ingredients)
+        VALUES ('delete', old.id, old.name, old.category, old.ingredients);
+        INSERT INTO recipes_fts (rowid, name, category, ingredients)
+        VALUES (new.id, new.name, new.category, new.ingredients);
+    END;
+    """,
+]
+
+DROP_RECIPES_FTS = [
+    "DROP TRIGGER IF EXISTS recipes_fts_ai;",
+    "DROP TRIGGER IF EXISTS recipes_fts_ad;",
+    "DROP TRIGGER IF EXISTS recipes_fts_au;",
+    "DROP TABLE IF EXISTS recipes_fts;",
+]
+
+# Re-reads every row of the recipes table into the index
+REBUILD_RECIPES_FTS = "INSERT INTO recipes_fts (recipes_fts) VALUES ('rebuild');"
+
+
+def _create_recipes_fts(target, connection, **kw):
+    """Create the search index whenever SQLAlchemy creates the recipes table."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_RECIPES_FTS:
+        connection.exec_driver_sql(statement)
+
+
+def _drop_recipes_fts(target, connection, **kw):
+    """Drop the search index before SQLAlchemy drops the recipes table."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in DROP_RECIPES_FTS:
+        connection.exec_driver_sql(statement)
+
+
+event.listen(Recipe.__table__, 'after_create', _create_recipes_fts)
+event.listen(Recipe.__table__, 'before_drop', _drop_recipes_fts)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey
+from sqlalchemy import Column, DateTime, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app import db
 
 class Recipe(db.Model):
     __tablename__ = 'recipes'
+    __table_args__ = (
+        # Most favorited recipes of a category, read backwards (see app/model/popularity.py)
+        Index('ix_recipes_category_favorite_count', 'category', 'favorite_count'),
+    )
     id = Column(Integer, primary_key=True)
     name = Column(String(50), unique=True)
     ingredients = Column(String(500), nullable=False)
@@ -18,6 +22,8 @@ class Recipe(db.Model):
     cook_time = Column(Integer, nullable=True)   
     total_time = Column(Integer, nullable=True) 
     servings = Column(Integer, nullable=True)    
+    # Number of favorites rows for this recipe, kept by triggers on favorites
+    favorite_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     user = relationship('User', back_populates='recipes')
     favorites = relationship('Favorite', back_populates='recipe', cascade='all, delete-orphan')
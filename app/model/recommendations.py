@@ -0,0 +1,105 @@
+from sqlalchemy import Column, Float, Index, Integer, event
+from app import db
+
+# Precomputed "people who liked this also liked" neighbors (see app/cofavorites.py).
+# recipe_neighbors holds each recipe's top neighbors in rank order, so serving
+# a recipe's recommendations is a primary key range read. The neighbor_id
+# index finds the lists a recipe appears in when its favorites change.
+# Triggers on favorites queue the recipes whose favorites changed in
+# recipe_neighbors_pending for the next RecommendationService.refresh().
+RECIPE_NEIGHBORS_TABLE = 'recipe_neighbors'
+RECIPE_NEIGHBORS_PENDING_TABLE = 'recipe_neighbors_pending'
+
+CREATE_RECIPE_NEIGHBORS = [
+    """
+    CREATE TABLE IF NOT EXISTS recipe_neighbors (
+        recipe_id INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        neighbor_id INTEGER NOT NULL,
+        score FLOAT NOT NULL,
+        co_count INTEGER NOT NULL,
+        PRIMARY KEY (recipe_id, rank)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_recipe_neighbors_neighbor_id ON recipe_neighbors (neighbor_id);",
+    """
+    CREATE TABLE IF NOT EXISTS recipe_neighbors_pending (
+        recipe_id INTEGER PRIMARY KEY
+    );
+    """,
+]
+
+# Triggers are created after the whole schema, they need favorites too
+CREATE_RECIPE_NEIGHBORS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS recipe_neighbors_pending_ai AFTER INSERT ON favorites BEGIN
+        INSERT OR IGNORE INTO recipe_neighbors_pending (recipe_id) VALUES (new.recipe_id);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipe_neighbors_pending_ad AFTER DELETE ON favorites BEGIN
+        INSERT OR IGNORE INTO recipe_neighbors_pending (recipe_id) VALUES (old.recipe_id);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipe_neighbors_pending_au AFTER UPDATE OF user_id, recipe_id ON favorites BEGIN
+        INSERT OR IGNORE INTO recipe_neighbors_pending (recipe_id) VALUES (old.recipe_id);
+        INSERT OR IGNORE INTO recipe_neighbors_pending (recipe_id) VALUES (new.recipe_id);
+    END;
+    """,
+]
+
+DROP_RECIPE_NEIGHBORS_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS recipe_neighbors_pending_ai;",
+    "DROP TRIGGER IF EXISTS recipe_neighbors_pending_ad;",
+    "DROP TRIGGER IF EXISTS recipe_neighbors_pending_au;",
+]
+
+DROP_RECIPE_NEIGHBORS = DROP_RECIPE_NEIGHBORS_TRIGGERS + [
+    "DROP TABLE IF EXISTS recipe_neighbors_pending;",
+    "DROP TABLE IF EXISTS recipe_neighbors;",
+]
+
+# Queues every favorited recipe, the next refresh recomputes them all (after bulk loads)
+QUEUE_ALL_RECIPE_NEIGHBORS = (
+    "INSERT OR IGNORE INTO recipe_neighbors_pending (recipe_id) SELECT DISTINCT recipe_id FROM favorites;"
+)
+
+
+class RecipeNeighbor(db.Model):
+    """One of a recipe's most similar recipes by co-favorites, rank 0 first"""
+    __tablename__ = RECIPE_NEIGHBORS_TABLE
+    __table_args__ = (
+        Index('ix_recipe_neighbors_neighbor_id', 'neighbor_id'),
+    )
+
+    recipe_id = Column(Integer, primary_key=True, autoincrement=False)
+    rank = Column(Integer, primary_key=True, autoincrement=False)
+    neighbor_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    co_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<RecipeNeighbor {self.recipe_id}#{self.rank} -> {self.neighbor_id} ({self.score:.3f})>'
+
+
+class RecipeNeighborPending(db.Model):
+    """A recipe whose favorites changed since its neighbors were computed (queued by triggers)"""
+    __tablename__ = RECIPE_NEIGHBORS_PENDING_TABLE
+
+    recipe_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f'<RecipeNeighborPending {self.recipe_id}>'
+
+
+def _create_recipe_neighbors_triggers(target, connection, **kw):
+    """Add the favorites triggers once every table exists."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_RECIPE_NEIGHBORS_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+# After the whole metadata, the triggers need both favorites and recipe_neighbors_pending
+event.listen(db.metadata, 'after_create', _create_recipe_neighbors_triggers)
@@ -0,0 +1,644 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, text
+from app.model.cache import CACHE_INVALIDATIONS_TABLE, CacheInvalidation
+from app import db
+
+
+def encode(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+class CacheBackend:
+    """Interface of the stores behind CacheService.
+
+    Keys are strings, values anything JSON can encode. Implementations bound
+    their size to max_bytes (measured as encoded JSON) and drop entries after
+    their time to live. shared is True when every worker process sees the
+    same entries, so invalidating in one process is enough for all of them.
+
+    Deletes are remembered for DELETION_TTL seconds so a cache-aside fill can
+    be refused when the key was deleted after the value was loaded: a reader
+    that loaded a row just before a writer committed and invalidated it
+    would otherwise store the old row again after the invalidation.
+    """
+
+    shared = False
+    # Seconds deletes are remembered for set(loaded_at=...), longer than any database read
+    DELETION_TTL = 60
+
+    def now(self):
+        """Reading of this backend's clock, for set(loaded_at=...)"""
+        return self.clock()
+
+    def get(self, key):
+        """Cached value for key, or None on a miss"""
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """{key: value} of the keys that are cached"""
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set(self, key, value, ttl=None, loaded_at=None):
+        """Store value under key for ttl seconds (the backend default when None).
+
+        loaded_at is a now() reading taken before value was loaded; the value
+        is not stored (returns False) if key was deleted since, or a prefix of
+        it with delete_prefix.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        """Drop every key starting with prefix"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """Dict of hits, misses, evictions, expirations, entries, bytes and max_bytes"""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Bounded in-process LRU cache with a time to live.
+
+    The least recently used entries are evicted once the total size goes over
+    max_bytes. Entries older than their ttl are treated as misses.
+    """
+
+    def __init__(self, max_bytes, ttl, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._deleted = {}  # key or (prefix,) -> when it was deleted
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def size_of(value):
+        return len(encode(value).encode('utf-8'))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if self.clock() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, loaded_at=None):
+        """Store value, evicting least recently used entries to stay within max_bytes"""
+        size = self.size_of(value)
+        with self._lock:
+            if loaded_at is not None and self._deleted_since(key, loaded_at):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return False
+            while self.bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = (value, size, self.clock() + (self.ttl if ttl is None else ttl))
+            self.bytes += size
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._remember_delete(key)
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self._remember_delete((prefix,))
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._remember_delete(('',))
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remember_delete(self, key):
+        now = self.clock()
+        self._deleted[key] = now
+        # Forget old deletes now and then, no fill takes DELETION_TTL
+        if len(self._deleted) > 1024:
+            cutoff = now - self.DELETION_TTL
+            self._deleted = {key: at for key, at in self._deleted.items() if at >= cutoff}
+
+    def _deleted_since(self, key, loaded_at):
+        if self._deleted.get(key, loaded_at - 1) >= loaded_at:
+            return True
+        return any(
+            isinstance(deleted, tuple) and at >= loaded_at and key.startswith(deleted[0])
+            for deleted, at in self._deleted.items()
+        )
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a SQLite file shared by every worker process on the host.
+
+    Entries are evicted oldest written first once their total size goes over
+    max_bytes. The total is kept in cache_meta by triggers, so writes never scan
+    the whole table. Hit and miss counters are per process.
+    """
+
+    shared = True
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        """,
+        "CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY, entries INTEGER NOT NULL, bytes INTEGER NOT NULL);",
+        "INSERT OR IGNORE INTO cache_meta (id, entries, bytes) VALUES (1, 0, 0);",
+        """
+        CREATE TRIGGER IF NOT EXISTS cache_entries_ai AFTER INSERT ON cache_entries BEGIN
+            UPDATE cache_meta SET entries = entries + 1, bytes = bytes + new.size WHERE id = 1;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cache_entries_ad AFTER DELETE ON cache_entries BEGIN
+            UPDATE cache_meta SET entries = entries - 1, bytes = bytes - old.size WHERE id = 1;
+        END;
+        """,
+        # Recent deletes of keys (prefix = 0) and of prefixes (prefix = 1), see set(loaded_at=...)
+        """
+        CREATE TABLE IF NOT EXISTS cache_deletions (
+            key TEXT NOT NULL,
+            prefix INTEGER NOT NULL,
+            deleted_at REAL NOT NULL,
+            PRIMARY KEY (key, prefix)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_cache_deletions_deleted_at ON cache_deletions (deleted_at);",
+    ]
+    # Rows deleted per statement while making room
+    EVICTION_BATCH = 16
+    # Keys looked up per get_many statement (SQLite's default host parameter limit is 999)
+    MAX_VARIABLES = 500
+
+    def __init__(self, path, max_bytes, ttl, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connection() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self):
+        """This thread's connection in a write transaction, see _Transaction"""
+        return _Transaction(self._raw_connection())
+
+    def _raw_connection(self):
+        """This thread's autocommit connection (sqlite3 connections cannot be shared between threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Losing the last writes of a cache on power failure is harmless
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        # Reads take no write lock, WAL lets them run next to other workers' writes
+        conn = self._raw_connection()
+        row = conn.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.clock() >= row[1]:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at = ?", (key, row[1]))
+            self.expirations += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def get_many(self, keys):
+        # One primary key IN read instead of a statement per key
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        conn = self._raw_connection()
+        now = self.clock()
+        values = {}
+        for start in range(0, len(keys), self.MAX_VARIABLES):
+            chunk = keys[start:start + self.MAX_VARIABLES]
+            rows = conn.execute(
+                f"SELECT key, value, expires_at FROM cache_entries WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for key, value, expires_at in rows:
+                if now >= expires_at:
+                    conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at = ?", (key, expires_at))
+                    self.expirations += 1
+                else:
+                    values[key] = json.loads(value)
+        self.hits += len(values)
+        self.misses += len(keys) - len(values)
+        return values
+
+    def set(self, key, value, ttl=None, loaded_at=None):
+        encoded = encode(value)
+        size = len(encoded.encode('utf-8'))
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._connection() as conn:
+            # Deleted by any worker since the value was loaded, it may be the old value
+            if loaded_at is not None and conn.execute(
+                "SELECT 1 FROM cache_deletions WHERE deleted_at >= ? "
+                "AND ((prefix = 0 AND key = ?) OR (prefix = 1 AND substr(?, 1, length(key)) = key)) LIMIT 1",
+                (loaded_at, key, key)
+            ).fetchone() is not None:
+                return False
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            if size > self.max_bytes:
+                return False
+            conn.execute(
+                "INSERT INTO cache_entries (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, size, expires_at)
+            )
+            while conn.execute("SELECT bytes FROM cache_meta WHERE id = 1").fetchone()[0] > self.max_bytes:
+                evicted = conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN "
+                    "(SELECT rowid FROM cache_entries WHERE key != ? ORDER BY rowid LIMIT ?)",
+                    (key, self.EVICTION_BATCH)
+                ).rowcount
+                self.evictions += evicted
+        return True
+
+    def _remember_delete(self, conn, key, prefix):
+        now = self.clock()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_deletions (key, prefix, deleted_at) VALUES (?, ?, ?)", (key, prefix, now)
+        )
+        conn.execute("DELETE FROM cache_deletions WHERE deleted_at < ?", (now - self.DELETION_TTL,))
+
+    def delete(self, key):
+        with self._connection() as conn:
+            self._remember_delete(conn, key, 0)
+            return conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount > 0
+
+    def delete_prefix(self, prefix):
+        with self._connection() as conn:
+            self._remember_delete(conn, prefix, 1)
+            # Range scan on the primary key instead of LIKE over every row
+            conn.execute("DELETE FROM cache_entries WHERE key >= ? AND key < ?", (prefix, prefix + '\uffff'))
+
+    def clear(self):
+        with self._connection() as conn:
+            self._remember_delete(conn, '', 1)
+            conn.execute("DELETE FROM cache_entries")
+
+    def stats(self):
+        entries, size = self._raw_connection().execute(
+            "SELECT entries, bytes FROM cache_meta WHERE id = 1"
+        ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+class _Transaction:
+    """Run a block of statements on an autocommit sqlite3 connection as one write transaction"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class CacheService:
+    """Namespaced cache shared by the recipe, search and featured recipe paths.
+
+    The backend is chosen with CACHE_BACKEND: 'memory' (one MemoryCache per
+    process) or 'sqlite' (a SQLiteCache file at CACHE_SQLITE_PATH shared by
+    every worker). Invalidations are applied to the local backend and appended
+    to the cache_invalidations table; every process reads the rows added since
+    its last look (at most once per CACHE_SYNC_INTERVAL seconds) and drops the
+    same keys, so caches stay consistent across workers.
+    """
+
+    EXTENSION_KEY = 'cache'
+
+    # app config key -> default value
+    SETTINGS = {
+        'CACHE_BACKEND': 'memory',
+        'CACHE_MAX_BYTES': 8 * 1024 * 1024,
+        'CACHE_TTL': 300,  # seconds
+        'CACHE_SQLITE_PATH': None,  # defaults to <instance folder>/recipe_box_cache.sqlite
+        'CACHE_SYNC_INTERVAL': 1.0,  # seconds between reads of cache_invalidations
+    }
+    # Invalidation rows are kept this long (at least CACHE_TTL), older ones are pruned
+    INVALIDATION_RETENTION = 3600
+    # Prune old invalidation rows once every this many invalidations
+    PRUNE_EVERY = 500
+
+    # Engines known to have the cache_invalidations table (only positive answers are cached)
+    _broadcast_engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def create_backend(config, instance_path):
+        """Build the backend described by the CACHE_* settings"""
+        settings = {key: config.get(key, default) for key, default in CacheService.SETTINGS.items()}
+        if settings['CACHE_BACKEND'] == 'memory':
+            return MemoryCache(settings['CACHE_MAX_BYTES'], settings['CACHE_TTL'])
+        if settings['CACHE_BACKEND'] == 'sqlite':
+            path = settings['CACHE_SQLITE_PATH'] or os.path.join(instance_path, 'recipe_box_cache.sqlite')
+            return SQLiteCache(path, settings['CACHE_MAX_BYTES'], settings['CACHE_TTL'])
+        raise ValueError(f"Unknown CACHE_BACKEND {settings['CACHE_BACKEND']!r}, use 'memory' or 'sqlite'")
+
+    @staticmethod
+    def _state():
+        # One backend per app, so apps pointed at different databases never share entries
+        state = current_app.extensions.get(CacheService.EXTENSION_KEY)
+        if state is None:
+            state = current_app.extensions.setdefault(CacheService.EXTENSION_KEY, {
+                'backend': CacheService.create_backend(current_app.config, current_app.instance_path),
+                'lock': threading.Lock(),
+                'seen_version': None,
+                'synced_at': None,
+                'counters': {},
+                'listeners': {},
+            })
+        return state
+
+    @staticmethod
+    def backend():
+        return CacheService._state()['backend']
+
+    @staticmethod
+    def _count(namespace, counter, amount=1):
+        counters = CacheService._state()['counters'].setdefault(
+            namespace, {'hits': 0, 'misses': 0, 'invalidations': 0, 'remote_invalidations': 0}
+        )
+        counters[counter] += amount
+
+    @staticmethod
+    def add_listener(namespace, callback):
+        """Call callback(key) after a key of namespace is invalidated, by this or any other worker.
+
+        key is the string form of the invalidated key, or None when the whole
+        namespace was dropped (including after a gap too long to replay).
+        """
+        CacheService._state()['listeners'].setdefault(namespace, []).append(callback)
+
+    @staticmethod
+    def _notify(state, namespace, key):
+        for callback in state['listeners'].get(namespace, ()):
+            callback(None if key is None else str(key))
+
+    @staticmethod
+    def make_key(namespace, key=None):
+        return f"{namespace}:" if key is None else f"{namespace}:{key}"
+
+    @staticmethod
+    def get(namespace, key):
+        """Cached value, or None on a miss"""
+        CacheService.sync()
+        value = CacheService.backend().get(CacheService.make_key(namespace, key))
+        CacheService._count(namespace, 'misses' if value is None else 'hits')
+        return value
+
+    @staticmethod
+    def get_many(namespace, keys):
+        """{key: value} of the keys of namespace that are cached, in one backend read"""
+        CacheService.sync()
+        keys = list(dict.fromkeys(keys))
+        cache_keys = {CacheService.make_key(namespace, key): key for key in keys}
+        found = CacheService.backend().get_many(list(cache_keys))
+        CacheService._count(namespace, 'hits', len(found))
+        CacheService._count(namespace, 'misses', len(keys) - len(found))
+        return {cache_keys[cache_key]: value for cache_key, value in found.items()}
+
+    @staticmethod
+    def fill_started():
+        """Token to take before loading a value from the database, for set(loaded_at=...)"""
+        return CacheService.backend().now()
+
+    @staticmethod
+    def set(namespace, key, value, ttl=None, loaded_at=None):
+        """Store value. With loaded_at (from fill_started) the value is dropped instead when the key
+        was invalidated after it was loaded, so a fill racing a write never brings back the old value."""
+        return CacheService.backend().set(CacheService.make_key(namespace, key), value, ttl=ttl, loaded_at=loaded_at)
+
+    @staticmethod
+    def invalidate(namespace, key=None):
+        """Drop one key (or the whole namespace) here and in every other worker process."""
+        CacheService._drop(namespace, key)
+        CacheService._count(namespace, 'invalidations')
+        CacheService._notify(CacheService._state(), namespace, key)
+        if not CacheService.has_invalidation_table():
+            return
+        version = db.session.execute(
+            insert(CacheInvalidation).values(
+                namespace=namespace,
+                key=None if key is None else str(key),
+                created_at=datetime.utcnow()
+            ).returning(CacheInvalidation.version)
+        ).scalar()
+        state = CacheService._state()
+        with state['lock']:
+            # Our own invalidation is already applied, skip it at the next sync
+            if state['seen_version'] == version - 1:
+                state['seen_version'] = version
+        if version % CacheService.PRUNE_EVERY == 0:
+            cutoff = datetime.utcnow() - timedelta(seconds=CacheService.retention())
+            db.session.execute(delete(CacheInvalidation).where(CacheInvalidation.created_at < cutoff))
+        db.session.commit()
+
+    @staticmethod
+    def _drop(namespace, key):
+        backend = CacheService.backend()
+        if key is None:
+            backend.delete_prefix(CacheService.make_key(namespace))
+        else:
+            backend.delete(CacheService.make_key(namespace, key))
+
+    @staticmethod
+    def retention():
+        return max(CacheService.INVALIDATION_RETENTION, current_app.config.get('CACHE_TTL', CacheService.SETTINGS['CACHE_TTL']))
+
+    @staticmethod
+    def has_invalidation_table():
+        """Check whether the current database has the cache_invalidations table."""
+        engine = db.engine
+        if CacheService._broadcast_engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': CACHE_INVALIDATIONS_TABLE}
+        ).first() is not None
+        if found:
+            CacheService._broadcast_engines[engine] = True
+        return found
+
+    @staticmethod
+    def sync(force=False):
+        """Apply invalidations other processes added since the last sync.
+
+        Runs at most once per CACHE_SYNC_INTERVAL seconds unless forced. Each run
+        is one primary key range read that returns nothing when no recipe changed.
+        """
+        state = CacheService._state()
+        now = time.monotonic()
+        interval = current_app.config.get('CACHE_SYNC_INTERVAL', CacheService.SETTINGS['CACHE_SYNC_INTERVAL'])
+        if not force and state['synced_at'] is not None and now - state['synced_at'] < interval:
+            return
+        with state['lock']:
+            if not force and state['synced_at'] is not None and now - state['synced_at'] < interval:
+                return
+            previous_sync = state['synced_at']
+            state['synced_at'] = now
+            if not CacheService.has_invalidation_table():
+                return
+
+            if state['seen_version'] is None:
+                # Nothing cached yet in this process (or shared backends already applied them)
+                state['seen_version'] = db.session.execute(
+                    select(func.coalesce(func.max(CacheInvalidation.version), 0))
+                ).scalar()
+                return
+
+            backend = state['backend']
+            if now - previous_sync > CacheService.retention():
+                # Invalidations may have been pruned since the last look, start over
+                if not backend.shared:
+                    backend.clear()
+                for namespace in state['listeners']:
+                    CacheService._notify(state, namespace, None)
+
+            rows = db.session.execute(
+                select(CacheInvalidation.version, CacheInvalidation.namespace, CacheInvalidation.key)
+                .where(CacheInvalidation.version > state['seen_version'])
+                .order_by(CacheInvalidation.version)
+            ).all()
+            for row in rows:
+                if not backend.shared:
+                    CacheService._drop(row.namespace, row.key)
+                CacheService._count(row.namespace, 'remote_invalidations')
+                CacheService._notify(state, row.namespace, row.key)
+                state['seen_version'] = row.version
+
+    @staticmethod
+    def stats():
+        """Backend totals plus per-namespace hits, misses and invalidations of this process"""
+        state = CacheService._state()
+        namespaces = {}
+        for namespace, counters in state['counters'].items():
+            lookups = counters['hits'] + counters['misses']
+            namespaces[namespace] = dict(counters, hit_ratio=round(counters['hits'] / lookups, 4) if lookups else None)
+        return {'backend': state['backend'].stats(), 'namespaces': namespaces}
+
+    @staticmethod
+    def metrics():
+        """Cache counters for /metrics (see instrumentation.Metrics.add_collector)."""
+        stats = CacheService.stats()
+        backend = stats['backend']
+        namespaces = sorted(stats['namespaces'].items())
+
+        def per_namespace(counter):
+            return [({'namespace': namespace}, counters[counter]) for namespace, counters in namespaces]
+
+        return {
+            'recipe_box_cache_hits_total': ('counter', 'Cache hits.', per_namespace('hits')),
+            'recipe_box_cache_misses_total': ('counter', 'Cache misses.', per_namespace('misses')),
+            'recipe_box_cache_hit_ratio': (
+                'gauge', 'Share of lookups answered from the cache.',
+                [({'namespace': namespace}, counters['hit_ratio'])
+                 for namespace, counters in namespaces if counters['hit_ratio'] is not None]
+            ),
+            'recipe_box_cache_invalidations_total': (
+                'counter', 'Keys invalidated by this process.', per_namespace('invalidations')
+            ),
+            'recipe_box_cache_remote_invalidations_total': (
+                'counter', 'Invalidations read from cache_invalidations.', per_namespace('remote_invalidations')
+            ),
+            'recipe_box_cache_evictions_total': (
+                'counter', 'Entries evicted to stay within CACHE_MAX_BYTES.', backend['evictions']
+            ),
+            'recipe_box_cache_expirations_total': ('counter', 'Entries dropped after their TTL.', backend['expirations']),
+            'recipe_box_cache_entries': ('gauge', 'Entries in the cache.', backend['entries']),
+            'recipe_box_cache_bytes': ('gauge', 'Size of the cached values as JSON.', backend['bytes']),
+        }
@@ -0,0 +1,42 @@
+import weakref
+from sqlalchemy import select, text
+from app.model.catalog import CATALOG_VERSION_TABLE, CatalogVersion
+from app.model.recipes import Recipe
+from app import db
+
+
+class CatalogService:
+    # Engines known to have the catalog_version table (only positive answers are cached)
+    _versioned_engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def has_version_table():
+        """Check whether the current database has the catalog_version table."""
+        engine = db.engine
+        if CatalogService._versioned_engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': CATALOG_VERSION_TABLE}
+        ).first() is not None
+        if found:
+            CatalogService._versioned_engines[engine] = True
+        return found
+
+    @staticmethod
+    def get_version():
+        """(version, updated_at) of the recipe catalog, or None on databases without the table."""
+        if not CatalogService.has_version_table():
+            return None
+        return db.session.execute(
+            select(CatalogVersion.version, CatalogVersion.updated_at).where(CatalogVersion.id == 1)
+        ).first()
+
+    @staticmethod
+    def get_recipe_updated_at(recipe_id):
+        """(updated_at,) row of a recipe without loading it, or None if it does not exist."""
+        return db.session.execute(
+            select(Recipe.updated_at).where(Recipe.id == recipe_id)
+        ).first()
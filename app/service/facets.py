@@ -0,0 +1,98 @@
+import weakref
+from collections import Counter
+from sqlalchemy import func, literal_column, select, text
+from app.model.facets import (
+    RECIPE_FACET_COUNTS_TABLE, SERVINGS_BUCKETS, TOTAL_TIME_BUCKETS, UNKNOWN_BUCKET,
+    RecipeFacetCount, facet_values_sql
+)
+from app.model.recipes import Recipe
+from app.service.cache import CacheService
+from app.service.search import SearchService
+from app import db
+
+
+class FacetService:
+    # CacheService namespace of the catalog's facet count rows, keyed by catalog version
+    CACHE_NAMESPACE = 'facets'
+
+    # Engines known to have the recipe_facet_counts table (only positive answers are cached)
+    _counted_engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def has_counts_table():
+        """Check whether the current database has the recipe_facet_counts table."""
+        engine = db.engine
+        if FacetService._counted_engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': RECIPE_FACET_COUNTS_TABLE}
+        ).first() is not None
+        if found:
+            FacetService._counted_engines[engine] = True
+        return found
+
+    @staticmethod
+    def grouped_counts_query():
+        """(category, total_time, servings, count) of recipes grouped by their facet values (add filters before running)."""
+        values = [literal_column(sql) for sql in facet_values_sql(Recipe.__tablename__)]
+        return db.session.query(*values, func.count()).select_from(Recipe).group_by(*values)
+
+    @staticmethod
+    def _ordered(counts, buckets):
+        order = [bucket for bucket, _ in buckets] + [UNKNOWN_BUCKET]
+        return {bucket: counts[bucket] for bucket in order if counts[bucket]}
+
+    @staticmethod
+    def summarize(rows, category=None):
+        """Facet counts from (category, total_time, servings, count) rows.
+
+        The category facet counts every row, so other categories stay
+        selectable; the time and servings facets only count rows of category
+        when one is given. Categories come most used first, buckets in order,
+        and empty buckets are left out.
+        """
+        categories, total_times, servings = Counter(), Counter(), Counter()
+        for row_category, total_time, serving, count in rows:
+            if not count:
+                continue
+            categories[row_category] += count
+            if category is None or row_category.lower() == category.lower():
+                total_times[total_time] += count
+                servings[serving] += count
+        return {
+            'category': dict(sorted(categories.items(), key=lambda item: (-item[1], item[0]))),
+            'total_time': FacetService._ordered(total_times, TOTAL_TIME_BUCKETS),
+            'servings': FacetService._ordered(servings, SERVINGS_BUCKETS),
+        }
+
+    @staticmethod
+    def catalog_facets(category=None, catalog_version=None):
+        """Facet counts of the whole catalog, time and servings restricted to category if given.
+
+        Reads the trigger maintained recipe_facet_counts rows (a few dozen), or
+        groups the recipes table on databases that have not been upgraded. With a
+        catalog version the rows are cached under it.
+        """
+        key = str(catalog_version) if catalog_version is not None else None
+        rows = CacheService.get(FacetService.CACHE_NAMESPACE, key) if key is not None else None
+        if rows is None:
+            if FacetService.has_counts_table():
+                query = select(
+                    RecipeFacetCount.category, RecipeFacetCount.total_time,
+                    RecipeFacetCount.servings, RecipeFacetCount.count
+                ).where(RecipeFacetCount.count > 0)
+                rows = [list(row) for row in db.session.execute(query)]
+            else:
+                rows = [list(row) for row in FacetService.grouped_counts_query()]
+            if key is not None:
+                CacheService.set(FacetService.CACHE_NAMESPACE, key, rows)
+        return FacetService.summarize(rows, category)
+
+    @staticmethod
+    def search_facets(query):
+        """Facet counts of the recipes matching a search query, from one grouped query."""
+        rows = SearchService.filter_matches(FacetService.grouped_counts_query(), query)
+        return FacetService.summarize(rows)
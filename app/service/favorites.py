@@ -1,21 +1,186 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.model.favorites import Favorite
+from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.pagination import Page, PaginationService
 from app import db
 import random
 
+
+class FavoriteSetCache:
+    """Favorite recipe ids per user, as sorted array('I'), least recently used evicted first.
+
+    Membership is a bisect into a user's array, 4 bytes per favorite. Arrays
+    are never modified, a write drops the user's entry and the next check
+    loads a new one, so readers holding the old array (without the lock)
+    never see it change; max_bytes bounds the memory of all cached users
+    together.
+    """
+
+    # Rough cost of one cached user besides the ids themselves
+    ENTRY_OVERHEAD = 100
+
+    def __init__(self, max_bytes):
+        self.sets = OrderedDict()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.sets)
+
+    @staticmethod
+    def size_of(ids):
+        return FavoriteSetCache.ENTRY_OVERHEAD + ids.itemsize * len(ids)
+
+    @staticmethod
+    def contains(ids, recipe_id):
+        position = bisect_left(ids, recipe_id)
+        return position < len(ids) and ids[position] == recipe_id
+
+    def get(self, user_id):
+        """Cached sorted ids of a user, or None"""
+        ids = self.sets.get(user_id)
+        if ids is not None:
+            self.sets.move_to_end(user_id)
+        return ids
+
+    def put(self, user_id, ids):
+        self.discard(user_id)
+        self.sets[user_id] = ids
+        self.bytes += FavoriteSetCache.size_of(ids)
+        # The newest entry is always kept, even when it alone is over the limit
+        while self.bytes > self.max_bytes and len(self.sets) > 1:
+            _, evicted = self.sets.popitem(last=False)
+            self.bytes -= FavoriteSetCache.size_of(evicted)
+
+    def discard(self, user_id):
+        ids = self.sets.pop(user_id, None)
+        if ids is not None:
+            self.bytes -= FavoriteSetCache.size_of(ids)
+
+    def clear(self):
+        self.sets.clear()
+        self.bytes = 0
+
+
 class FavoriteService:
+    # Fields get_user_favorite_recipes can return, mapped to the column they come from
+    RECIPE_FIELDS = {
+        'recipe_id': Recipe.id,
+        'name': Recipe.name,
+        'category': Recipe.category,
+        'image_location': Recipe.image_location,
+        # The key /favorites_list returned before image_location, kept for existing clients
+        'image': Recipe.image_location,
+        'prep_time': Recipe.prep_time,
+        'cook_time': Recipe.cook_time,
+        'total_time': Recipe.total_time,
+        'servings': Recipe.servings,
+        'ingredients': Recipe.ingredients,
+        'instructions': Recipe.instructions,
+        'user_id': Recipe.user_id,
+        'owner': User.username,
+        'favorited_at': Favorite.created_at,
+    }
+    # Everything a favorites page card needs
+    DEFAULT_RECIPE_FIELDS = (
+        'recipe_id', 'name', 'category', 'image_location', 'image',
+        'prep_time', 'cook_time', 'total_time', 'servings', 'owner',
+    )
+    # Most recipe ids bulk_add, bulk_remove and are_favorites take at once (a page of cards)
+    MAX_BATCH_IDS = 100
+
+    EXTENSION_KEY = 'favorites'
+    # Invalidations of this namespace name the user whose favorites changed
+    CACHE_NAMESPACE = 'favorites'
+    # Memory for cached favorite sets, 16MB holds about 4 million favorites
+    SET_CACHE_BYTES = 16 * 1024 * 1024
+
+    @staticmethod
+    def _state():
+        state = current_app.extensions.get(FavoriteService.EXTENSION_KEY)
+        if state is None:
+            state = current_app.extensions.setdefault(FavoriteService.EXTENSION_KEY, {
+                'lock': threading.Lock(),
+                'sets': FavoriteSetCache(FavoriteService.SET_CACHE_BYTES),
+            })
+            CacheService.add_listener(
+                FavoriteService.CACHE_NAMESPACE, lambda key: FavoriteService._user_changed(state, key)
+            )
+        return state
+
+    @staticmethod
+    def _user_changed(state, key):
+        with state['lock']:
+            if key is None:
+                state['sets'].clear()
+            else:
+                state['sets'].discard(int(key))
+
+    @staticmethod
+    def favorite_ids(user_id):
+        """Sorted array('I') of the recipe ids a user favorited.
+
+        Loaded with one index-only query on first use, then served from this
+        process's FavoriteSetCache until another worker changes the user's
+        favorites (seen through cache_invalidations) or the user is evicted.
+        The array is shared and never modified, writes drop it instead.
+        """
+        CacheService.sync()
+        state = FavoriteService._state()
+        user_id = int(user_id)
+        with state['lock']:
+            ids = state['sets'].get(user_id)
+            if ids is None:
+                ids = array('I', db.session.scalars(
+                    select(Favorite.recipe_id).where(Favorite.user_id == user_id).order_by(Favorite.recipe_id)
+                ))
+                state['sets'].put(user_id, ids)
+            return ids
+
+    @staticmethod
+    def _commit_change(user_id, added=(), removed=()):
+        """Commit a favorites write together with its invalidation for other workers,
+        then drop this process's cached set so the next check reloads it."""
+        if not added and not removed:
+            db.session.commit()
+            return
+        user_id = int(user_id)
+        state = FavoriteService._state()
+        # Adds the invalidation to the open transaction and commits both (dropping our own entry)
+        CacheService.invalidate(FavoriteService.CACHE_NAMESPACE, user_id)
+        db.session.commit()
+        # Again after the commit: a check between the two may have loaded the set without this write
+        with state['lock']:
+            state['sets'].discard(user_id)
+
     @staticmethod
     def add_favorite(recipe_id, user_id):
         """Add a recipe to user's favorites (avoids duplicates)."""
         try:
-            # Check if already favorited
-            existing = Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
-            if existing:
-                return existing  # Already favorited, do nothing
+            # One INSERT ... ON CONFLICT DO NOTHING, the unique (user_id, recipe_id)
+            # index makes concurrent adds safe without reading first
+            new_favorite = db.session.scalars(
+                sqlite_insert(Favorite).values(
+                    user_id=user_id, recipe_id=recipe_id, created_at=datetime.utcnow()
+                ).on_conflict_do_nothing(
+                    index_elements=['user_id', 'recipe_id']
+                ).returning(Favorite)
+            ).first()
+            FavoriteService._commit_change(user_id, added=[int(recipe_id)] if new_favorite else ())
+            if new_favorite:
+                return new_favorite
 
-            new_favorite = Favorite(user_id=user_id, recipe_id=recipe_id)
-            db.session.add(new_favorite)
-            db.session.commit()
-            return new_favorite
+            # Already favorited, return the existing row
+            return Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
         except Exception as e:
             db.session.rollback()
             print(f"Error adding favorite: {str(e)}")
@@ -25,12 +190,12 @@ class FavoriteService:
     def remove_favorite(recipe_id, user_id):
         """Remove a recipe from user's favorites."""
         try:
-            favorite = Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
-            if favorite:
-                db.session.delete(favorite)
-                db.session.commit()
-                return True
-            return False
+            result = db.session.execute(
+                delete(Favorite).where(Favorite.user_id == user_id, Favorite.recipe_id == recipe_id)
+            )
+            removed = result.rowcount > 0
+            FavoriteService._commit_change(user_id, removed=[int(recipe_id)] if removed else ())
+            return removed
         except Exception as e:
             db.session.rollback()
             print(f"Error removing favorite: {str(e)}")
@@ -38,10 +203,110 @@ class FavoriteService:
 
     @staticmethod
     def is_favorite(recipe_id, user_id):
-        """Check if a recipe is favorited by a user."""
-        favorite = Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
-        return favorite is not None
+        """Check if a recipe is favorited by a user (from the cached favorite set)."""
+        return FavoriteSetCache.contains(FavoriteService.favorite_ids(user_id), int(recipe_id))
+
+    @staticmethod
+    def _batch_ids(recipe_ids):
+        """Distinct recipe ids of a batch in request order, raises ValueError past MAX_BATCH_IDS."""
+        recipe_ids = list(dict.fromkeys(int(recipe_id) for recipe_id in recipe_ids))
+        if len(recipe_ids) > FavoriteService.MAX_BATCH_IDS:
+            raise ValueError(f"At most {FavoriteService.MAX_BATCH_IDS} recipes can be changed or checked at once.")
+        return recipe_ids
+
+    @staticmethod
+    def bulk_add(user_id, recipe_ids):
+        """Add many recipes to user's favorites, returns the set of recipe ids newly added.
+
+        One INSERT ... SELECT over the recipes that exist, skipping the ones already
+        favorited through the unique (user_id, recipe_id) index, in one transaction.
+        """
+        recipe_ids = FavoriteService._batch_ids(recipe_ids)
+        if not recipe_ids:
+            return set()
+        try:
+            added = db.session.scalars(
+                sqlite_insert(Favorite).from_select(
+                    ['user_id', 'recipe_id', 'created_at'],
+                    select(literal(user_id), Recipe.id, literal(datetime.utcnow())).where(Recipe.id.in_(recipe_ids))
+                ).on_conflict_do_nothing(
+                    index_elements=['user_id', 'recipe_id']
+                ).returning(Favorite.recipe_id)
+            ).all()
+            FavoriteService._commit_change(user_id, added=added)
+            return set(added)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error adding favorites: {str(e)}")
+            raise
+
+    @staticmethod
+    def bulk_remove(user_id, recipe_ids):
+        """Remove many recipes from user's favorites with one DELETE, returns the set of recipe ids removed."""
+        recipe_ids = FavoriteService._batch_ids(recipe_ids)
+        if not recipe_ids:
+            return set()
+        try:
+            removed = db.session.scalars(
+                delete(Favorite).where(
+                    Favorite.user_id == user_id, Favorite.recipe_id.in_(recipe_ids)
+                ).returning(Favorite.recipe_id)
+            ).all()
+            FavoriteService._commit_change(user_id, removed=removed)
+            return set(removed)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error removing favorites: {str(e)}")
+            raise
+
+    @staticmethod
+    def are_favorites(user_id, recipe_ids):
+        """Set of the recipe_ids favorited by a user, from the cached favorite set."""
+        recipe_ids = FavoriteService._batch_ids(recipe_ids)
+        if not recipe_ids:
+            return set()
+        ids = FavoriteService.favorite_ids(user_id)
+        return {recipe_id for recipe_id in recipe_ids if FavoriteSetCache.contains(ids, recipe_id)}
 
     @staticmethod
     def get_user_favorites(user_id):
-        return Favorite.query.filter_by(user_id=user_id).all()
\ No newline at end of file
+        return Favorite.query.filter_by(user_id=user_id).all()
+
+    @staticmethod
+    def get_user_favorite_recipes(user_id, fields=None, cursor=None, limit=None):
+        """Hydrated recipe summaries for a user's favorites, oldest favorite first.
+
+        Favorites, recipes and owners are read with a single JOIN. fields picks from
+        RECIPE_FIELDS (defaults to DEFAULT_RECIPE_FIELDS). Without cursor or limit every
+        favorite is returned, otherwise the result is keyset paginated. Returns a Page
+        whose items are dicts. Raises ValueError for unknown fields.
+        """
+        fields = list(fields or FavoriteService.DEFAULT_RECIPE_FIELDS)
+        unknown = [field for field in fields if field not in FavoriteService.RECIPE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}. Valid fields are: {list(FavoriteService.RECIPE_FIELDS)}")
+
+        query = db.session.query(
+            *[FavoriteService.RECIPE_FIELDS[field].label(field) for field in fields],
+            Favorite.id.label('fav_id')
+        ).select_from(Favorite).join(
+            Recipe, Recipe.id == Favorite.recipe_id
+        ).filter(Favorite.user_id == user_id)
+        if 'owner' in fields:
+            query = query.outerjoin(User, User.id == Recipe.user_id)
+
+        # Ids follow insertion order; created_at is not a safe key, rows written through raw SQL
+        # store it without the fraction and compare below any cursor from the same second
+        keys = [('fav_id', Favorite.id)]
+        if cursor is None and limit is None:
+            page = Page(query.order_by(*[column for _, column in keys]).all())
+        else:
+            page = PaginationService.paginate(query, keys, cursor=cursor, limit=limit)
+
+        page.items = [
+            {
+                field: value.isoformat() if isinstance(value, datetime) else value
+                for field, value in zip(fields, row)
+            } for row in page.items
+        ]
+        return page
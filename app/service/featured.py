@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, time, timedelta
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.model.featured import FeaturedRecipe
+from app.service.cache import CacheService
+from app.service.recipe import RecipeService
+from app import db
+
+
+class FeaturedRecipeService:
+    """Serves the "Recipe of the Day".
+
+    The recipe is picked once per day with a seed derived from the date, so every
+    worker process picks the same one, and the pick is persisted in featured_recipes.
+    The day's recipe id is cached until midnight and the recipe itself comes from
+    the recipe cache, so repeat requests for the featured recipe run no SQL at all
+    and edits to it show up right away.
+    """
+
+    # CacheService namespace of the picked recipe id, keyed by date
+    CACHE_NAMESPACE = 'featured'
+
+    @staticmethod
+    def seed_for(day):
+        """Deterministic random seed for a date"""
+        return f"recipe-of-the-day:{day.isoformat()}"
+
+    @staticmethod
+    def next_midnight(now):
+        return datetime.combine(now.date() + timedelta(days=1), time.min)
+
+    @staticmethod
+    def choose_recipe_id(day):
+        """Return the featured recipe id for day, picking and persisting it if needed."""
+        chosen = db.session.get(FeaturedRecipe, day)
+        if chosen:
+            return chosen.recipe_id
+
+        recipe_id = RecipeService.pick_recipe_id(random.Random(FeaturedRecipeService.seed_for(day)))
+        if recipe_id is None:
+            return None
+
+        # Another worker may be storing the same pick, the first insert wins
+        db.session.execute(
+            sqlite_insert(FeaturedRecipe.__table__).values(
+                feature_date=day, recipe_id=recipe_id, created_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=['feature_date'])
+        )
+        db.session.commit()
+        return db.session.get(FeaturedRecipe, day).recipe_id
+
+    @staticmethod
+    def get_recipe_of_the_day(now=None):
+        """Serialized recipe of the day (see RecipeService.recipe_details_dict), or None."""
+        now = now or datetime.now()
+        day = now.date()
+        cached = CacheService.get(FeaturedRecipeService.CACHE_NAMESPACE, day.isoformat())
+        if cached is not None:
+            recipe_id = cached['recipe_id']
+        else:
+            recipe_id = FeaturedRecipeService.choose_recipe_id(day)
+            if recipe_id is None:
+                return None
+            CacheService.set(
+                FeaturedRecipeService.CACHE_NAMESPACE, day.isoformat(), {'recipe_id': recipe_id},
+                ttl=(FeaturedRecipeService.next_midnight(now) - now).total_seconds()
+            )
+
+        recipe, _ = RecipeService.get_recipe_dict(recipe_id)
+        return recipe
+
+    @staticmethod
+    def invalidate():
+        """Forget the cached picks in every worker, so the next request reads featured_recipes again."""
+        CacheService.invalidate(FeaturedRecipeService.CACHE_NAMESPACE)
@@ -0,0 +1,79 @@
+import weakref
+from sqlalchemy import delete, insert, select, text
+from app.ingredients import normalize_name, parse_ingredients
+from app.model.ingredients import RECIPE_INGREDIENTS_TABLE, RecipeIngredient
+from app import db
+
+
+class IngredientService:
+    # Engines known to have the recipe_ingredients table (only positive answers are cached)
+    _indexed_engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def has_ingredient_table():
+        """Check whether the current database has the recipe_ingredients table."""
+        engine = db.engine
+        if IngredientService._indexed_engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': RECIPE_INGREDIENTS_TABLE}
+        ).first() is not None
+        if found:
+            IngredientService._indexed_engines[engine] = True
+        return found
+
+    @staticmethod
+    def ingredient_rows(recipe_id, ingredients):
+        """recipe_ingredients rows (as dicts) for a recipe's ingredients text"""
+        return [
+            {
+                'recipe_id': recipe_id,
+                'position': parsed.position,
+                'quantity': parsed.quantity,
+                'unit': parsed.unit,
+                'name': parsed.name,
+                'line': parsed.line,
+            }
+            for parsed in parse_ingredients(ingredients)
+        ]
+
+    @staticmethod
+    def replace_recipe_ingredients(recipe_id, ingredients):
+        """Re-parse a recipe's ingredients into recipe_ingredients, in the caller's transaction.
+
+        Does nothing on databases that have not been upgraded with the table yet.
+        """
+        if not IngredientService.has_ingredient_table():
+            return
+        db.session.execute(delete(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id))
+        rows = IngredientService.ingredient_rows(recipe_id, ingredients)
+        if rows:
+            db.session.execute(insert(RecipeIngredient), rows)
+
+    @staticmethod
+    def get_recipe_ingredients(recipe_id):
+        """Parsed ingredients of a recipe in the order they are written."""
+        return [
+            ingredient.to_dict()
+            for ingredient in RecipeIngredient.query.filter_by(recipe_id=recipe_id).order_by(RecipeIngredient.position)
+        ]
+
+    @staticmethod
+    def find_recipe_ids(name, limit=None):
+        """Ids of recipes using an ingredient, in id order.
+
+        name is normalized like the stored names ("Tomatoes" finds "1 can diced
+        tomatoes"), so the lookup is a seek on the (name, recipe_id) index.
+        """
+        normalized = normalize_name(name)
+        if not normalized or not IngredientService.has_ingredient_table():
+            return []
+        query = select(RecipeIngredient.recipe_id).where(
+            RecipeIngredient.name == normalized
+        ).distinct().order_by(RecipeIngredient.recipe_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return list(db.session.execute(query).scalars())
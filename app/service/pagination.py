@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import DateTime, func, select, tuple_
+from app import db
+
+
+class InvalidCursor(ValueError):
+    """Raised when a next_cursor token is malformed or belongs to a different listing."""
+
+
+class Page:
+    """One page of a keyset-paginated listing."""
+
+    def __init__(self, items, next_cursor=None, total=None, total_exact=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_exact = total_exact
+
+    def to_dict(self):
+        page = {'next_cursor': self.next_cursor}
+        if self.total is not None:
+            page['total'] = self.total
+            page['total_exact'] = self.total_exact
+        return page
+
+
+class PaginationService:
+    DEFAULT_LIMIT = 24
+    MAX_LIMIT = 100
+    # Totals are counted up to this many rows, past that they are reported as a lower bound
+    TOTAL_COUNT_CAP = 1000
+
+    @staticmethod
+    def encode_cursor(key_names, values):
+        """Pack the sort key of the last row on a page into an opaque token."""
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        payload = json.dumps({'k': list(key_names), 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token, key_names):
+        """Unpack a token made by encode_cursor for the same sort keys."""
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values = payload['v']
+            valid = payload['k'] == list(key_names) and len(values) == len(key_names)
+        except (ValueError, TypeError, KeyError, UnicodeError):
+            raise InvalidCursor("Invalid cursor.")
+        if not valid:
+            raise InvalidCursor("Cursor does not match this listing.")
+        # Only what encode_cursor writes: numbers, and strings (DateTime keys as ISO strings)
+        if not all(isinstance(value, (int, float, str)) and not isinstance(value, bool) for value in values):
+            raise InvalidCursor("Invalid cursor.")
+        return values
+
+    @staticmethod
+    def clamp_limit(limit):
+        """Default a missing page size and keep it between 1 and MAX_LIMIT."""
+        if limit is None:
+            return PaginationService.DEFAULT_LIMIT
+        return max(1, min(limit, PaginationService.MAX_LIMIT))
+
+    @staticmethod
+    def estimate_total(query):
+        """Count matching rows, stopping at TOTAL_COUNT_CAP. Returns (total, exact)."""
+        cap = PaginationService.TOTAL_COUNT_CAP
+        capped = query.order_by(None).limit(cap + 1).subquery()
+        total = db.session.execute(select(func.count()).select_from(capped)).scalar()
+        if total > cap:
+            return cap, False
+        return total, True
+
+    @staticmethod
+    def paginate(query, keys, cursor=None, limit=None, include_total=False):
+        """Keyset pagination over a column query.
+
+        keys is a list of (label, column) pairs forming a unique ascending sort order,
+        each label must also be present on the returned rows. Every page costs one
+        index range read of limit + 1 rows no matter how deep into the listing it is.
+        """
+        limit = PaginationService.clamp_limit(limit)
+        key_names = [name for name, _ in keys]
+        key_columns = [column for _, column in keys]
+
+        total, total_exact = None, None
+        if include_total:
+            total, total_exact = PaginationService.estimate_total(query)
+
+        if cursor:
+            values = PaginationService.decode_cursor(cursor, key_names)
+            try:
+                values = [
+                    datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                    for column, value in zip(key_columns, values)
+                ]
+            except (TypeError, ValueError):
+                raise InvalidCursor("Invalid cursor.")
+            if len(key_columns) == 1:
+                query = query.filter(key_columns[0] > values[0])
+            else:
+                query = query.filter(tuple_(*key_columns) > tuple_(*values))
+
+        rows = query.order_by(*key_columns).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = PaginationService.encode_cursor(
+                key_names, [getattr(last, name) for name in key_names]
+            )
+
+        return Page(rows, next_cursor=next_cursor, total=total, total_exact=total_exact)
@@ -0,0 +1,371 @@
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import groupby
+from flask import current_app
+from sqlalchemy import func, select
+from app.ingredients import normalize_name
+from app.model.cache import CacheInvalidation
+from app.model.ingredients import RecipeIngredient
+from app.service.cache import CacheService
+from app.service.ingredients import IngredientService
+from app import db
+
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+class PantryIndex:
+    """Ingredient name -> recipe ids, as sorted arrays (posting lists) and bitmaps.
+
+    The posting lists are the source of truth and cheap to update. Queries work
+    on bitmaps (Python ints, bit n = recipe id n) so counting how many of each
+    recipe's ingredients a pantry covers is a few dozen C-speed AND/XOR passes
+    instead of a Python step per recipe. Name bitmaps are built from the
+    posting lists on demand and kept in an LRU limited to max_bitmap_bytes;
+    by_size[n] holds the recipes with n distinct ingredients, and words maps
+    each word to the names containing it for matching pantry items. names
+    keeps each recipe's names, so removing a recipe touches only its own
+    posting lists.
+
+    Not thread safe: PantryService reads and updates it under one lock.
+    """
+
+    def __init__(self, max_bitmap_bytes=64 * 1024 * 1024):
+        self.postings = {}
+        self.names = {}
+        self.words = {}
+        self.sizes = array('H')
+        self.by_size = {}
+        self.bitmaps = OrderedDict()
+        self.max_bitmap_bytes = max_bitmap_bytes
+
+    def __len__(self):
+        return sum(1 for size in self.sizes if size)
+
+    def _grow(self, recipe_id):
+        if recipe_id >= len(self.sizes):
+            self.sizes.extend([0] * (recipe_id + 1 - len(self.sizes)))
+
+    def _add_name(self, name):
+        for word in name.split():
+            self.words.setdefault(word, set()).add(name)
+
+    def _remove_name(self, name):
+        for word in name.split():
+            names = self.words.get(word)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.words[word]
+
+    def _bitmap_bytes(self):
+        return (len(self.sizes) + 7) // 8
+
+    def load(self, rows):
+        """Add (recipe_id, name) rows sorted by name then recipe_id (an index scan of recipe_ingredients)"""
+        for name, group in groupby(rows, key=lambda row: row[1]):
+            ids = array('I')
+            previous = None
+            for recipe_id, _ in group:
+                if recipe_id != previous:
+                    ids.append(recipe_id)
+                    previous = recipe_id
+            self.postings[name] = ids
+            self._add_name(name)
+            if ids:
+                self._grow(ids[-1])
+            for recipe_id in ids:
+                self.sizes[recipe_id] += 1
+                self.names.setdefault(recipe_id, []).append(name)
+
+        buffers = {}
+        for recipe_id, size in enumerate(self.sizes):
+            if size:
+                buffer = buffers.get(size)
+                if buffer is None:
+                    buffer = buffers[size] = bytearray(self._bitmap_bytes())
+                buffer[recipe_id >> 3] |= 1 << (recipe_id & 7)
+        self.by_size = {size: int.from_bytes(buffer, 'little') for size, buffer in buffers.items()}
+        self.bitmaps.clear()
+
+    def _flip(self, bitmaps, key, recipe_id):
+        bitmap = bitmaps.get(key, 0) ^ (1 << recipe_id)
+        if bitmap:
+            bitmaps[key] = bitmap
+        else:
+            bitmaps.pop(key, None)
+
+    def remove(self, recipe_id):
+        """Drop a recipe from its names' posting lists and bitmaps"""
+        names = self.names.pop(recipe_id, None)
+        if names is None:
+            return
+        for name in names:
+            ids = self.postings[name]
+            index = bisect_left(ids, recipe_id)
+            if index < len(ids) and ids[index] == recipe_id:
+                del ids[index]
+                if not ids:
+                    del self.postings[name]
+                    self._remove_name(name)
+                if name in self.bitmaps:
+                    self._flip(self.bitmaps, name, recipe_id)
+        self._flip(self.by_size, self.sizes[recipe_id], recipe_id)
+        self.sizes[recipe_id] = 0
+
+    def add(self, recipe_id, names):
+        """Index a recipe's ingredient names (after remove, when it was indexed before)"""
+        names = set(names)
+        self._grow(recipe_id)
+        self.names[recipe_id] = list(names)
+        for name in names:
+            if name not in self.postings:
+                self._add_name(name)
+            insort(self.postings.setdefault(name, array('I')), recipe_id)
+            if name in self.bitmaps:
+                self._flip(self.bitmaps, name, recipe_id)
+        self.sizes[recipe_id] = len(names)
+        self._flip(self.by_size, len(names), recipe_id)
+
+    def bitmap(self, name):
+        """Bitmap of the recipes using name, built from its posting list on a miss"""
+        bitmap = self.bitmaps.get(name)
+        if bitmap is not None:
+            self.bitmaps.move_to_end(name)
+            return bitmap
+        buffer = bytearray(self._bitmap_bytes())
+        for recipe_id in self.postings.get(name, ()):
+            buffer[recipe_id >> 3] |= 1 << (recipe_id & 7)
+        bitmap = int.from_bytes(buffer, 'little')
+        if bitmap:
+            self.bitmaps[name] = bitmap
+            while len(self.bitmaps) * len(buffer) > self.max_bitmap_bytes and len(self.bitmaps) > 1:
+                self.bitmaps.popitem(last=False)
+        return bitmap
+
+    @staticmethod
+    def covers(item, name):
+        """Whether a pantry item covers an ingredient: the same name, or one containing it as whole words.
+
+        "flour" covers "all-purpose flour" and "oat flour", "olive oil" covers only itself.
+        """
+        return name == item or f' {item} ' in f' {name} '
+
+    def matching_names(self, item):
+        """Indexed names a pantry item covers, looked up through the names sharing its words"""
+        candidates = None
+        for word in item.split():
+            names = self.words.get(word, set())
+            candidates = names if candidates is None else candidates & names
+            if not candidates:
+                return []
+        return sorted(name for name in candidates or () if PantryIndex.covers(item, name))
+
+    @staticmethod
+    def ids_of(bitmap, limit):
+        """Up to limit recipe ids set in bitmap, lowest first"""
+        ids = []
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        for match in NONZERO_BYTE.finditer(data):
+            byte, base = match.group()[0], match.start() * 8
+            for bit in range(8):
+                if byte >> bit & 1:
+                    ids.append(base + bit)
+                    if len(ids) == limit:
+                        return ids
+        return ids
+
+    def rank(self, items, limit, max_missing=None):
+        """Top recipes for the pantry items as (recipe_id, matched, missing), fewest missing first.
+
+        Ties go to recipes using more of the pantry, then to lower ids.
+        """
+        covered = set()
+        for item in items:
+            covered.update(self.matching_names(item))
+        if not covered:
+            return []
+
+        # Bit-sliced counter: bit n of planes[j] is bit j of how many covered names recipe n uses
+        planes = []
+        candidates = 0
+        for name in covered:
+            carry = self.bitmap(name)
+            candidates |= carry
+            for j, plane in enumerate(planes):
+                planes[j], carry = plane ^ carry, plane & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        everything = (1 << len(self.sizes)) - 1
+        matched_masks = {}
+
+        def matched_exactly(count):
+            mask = matched_masks.get(count)
+            if mask is None:
+                mask = candidates
+                for j, plane in enumerate(planes):
+                    mask &= plane if count >> j & 1 else plane ^ everything
+                matched_masks[count] = mask
+            return mask
+
+        ranked = []
+        sizes = sorted(self.by_size, reverse=True)
+        highest_missing = sizes[0] - 1 if max_missing is None else min(max_missing, sizes[0] - 1)
+        for missing in range(highest_missing + 1):
+            # Within the same number missing, larger recipes use more of the pantry
+            for size in sizes:
+                matched = size - missing
+                if matched < 1 or matched > len(covered):
+                    continue
+                selected = self.by_size[size] & matched_exactly(matched)
+                if selected:
+                    for recipe_id in PantryIndex.ids_of(selected, limit - len(ranked)):
+                        ranked.append((recipe_id, matched, missing))
+                    if len(ranked) == limit:
+                        return ranked
+        return ranked
+
+
+class PantryService:
+    """"What can I cook" search over an in-memory ingredient index.
+
+    The index is built from recipe_ingredients on first use in each process and
+    then kept current from the 'recipe' rows of cache_invalidations, which every
+    recipe write (from any worker) appends, so only changed recipes are reloaded.
+    """
+
+    EXTENSION_KEY = 'pantry'
+    DEFAULT_LIMIT = 24
+    MAX_LIMIT = 100
+    # Longest pantry accepted by one request
+    MAX_ITEMS = 50
+    # Memory for cached ingredient bitmaps, 64MB holds 512 bitmaps at a million recipes
+    BITMAP_CACHE_BYTES = 64 * 1024 * 1024
+
+    @staticmethod
+    def _state():
+        state = current_app.extensions.get(PantryService.EXTENSION_KEY)
+        if state is None:
+            state = current_app.extensions.setdefault(PantryService.EXTENSION_KEY, {
+                'lock': threading.Lock(),
+                'index': None,
+                'seen_version': 0,
+                'refreshed_at': None,
+            })
+        return state
+
+    @staticmethod
+    def _build(state):
+        """Load the whole index, remembering the last invalidation that it already includes"""
+        if CacheService.has_invalidation_table():
+            state['seen_version'] = db.session.execute(
+                select(func.coalesce(func.max(CacheInvalidation.version), 0))
+            ).scalar()
+        index = PantryIndex(max_bitmap_bytes=PantryService.BITMAP_CACHE_BYTES)
+        if IngredientService.has_ingredient_table():
+            index.load(db.session.execute(
+                select(RecipeIngredient.recipe_id, RecipeIngredient.name)
+                .order_by(RecipeIngredient.name, RecipeIngredient.recipe_id)
+            ))
+        state['index'] = index
+
+    @staticmethod
+    def _refresh(state):
+        """Reload the recipes written since the last look, or everything after a long gap"""
+        if not CacheService.has_invalidation_table():
+            return
+        rows = db.session.execute(
+            select(CacheInvalidation.version, CacheInvalidation.key)
+            .where(CacheInvalidation.version > state['seen_version'])
+            .where(CacheInvalidation.namespace == 'recipe')
+            .order_by(CacheInvalidation.version)
+        ).all()
+        if not rows:
+            return
+        if any(row.key is None for row in rows):
+            PantryService._build(state)
+            return
+        recipe_ids = {int(row.key) for row in rows}
+        names = {recipe_id: [] for recipe_id in recipe_ids}
+        for recipe_id, name in db.session.execute(
+            select(RecipeIngredient.recipe_id, RecipeIngredient.name)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        ):
+            names[recipe_id].append(name)
+        index = state['index']
+        for recipe_id, recipe_names in names.items():
+            index.remove(recipe_id)
+            if recipe_names:
+                index.add(recipe_id, recipe_names)
+        state['seen_version'] = rows[-1].version
+
+    @staticmethod
+    def _current(state):
+        """The index, built or brought up to date first (call with state['lock'] held)"""
+        now = time.monotonic()
+        # Invalidation rows older than the retention may have been pruned, start over
+        stale = state['refreshed_at'] is not None and now - state['refreshed_at'] > CacheService.retention()
+        if state['index'] is None or stale:
+            PantryService._build(state)
+        else:
+            PantryService._refresh(state)
+        state['refreshed_at'] = now
+        return state['index']
+
+    @staticmethod
+    def index():
+        """This process's PantryIndex, built or brought up to date first.
+
+        Other request threads update it in place, read it under
+        PantryService._state()['lock'] (find_recipes does).
+        """
+        state = PantryService._state()
+        with state['lock']:
+            return PantryService._current(state)
+
+    @staticmethod
+    def normalize_items(items):
+        """Distinct normalized pantry items, in the order given"""
+        normalized = []
+        for item in items[:PantryService.MAX_ITEMS]:
+            name = normalize_name(item)
+            if name and name not in normalized:
+                normalized.append(name)
+        return normalized
+
+    @staticmethod
+    def find_recipes(items, limit=None, max_missing=None):
+        """Recipes ranked by how much of them the pantry covers.
+
+        Returns (normalized items, [(recipe_id, matched, missing)]), best first.
+        """
+        items = PantryService.normalize_items(items)
+        limit = min(max(1, limit or PantryService.DEFAULT_LIMIT), PantryService.MAX_LIMIT)
+        if not items:
+            return items, []
+        state = PantryService._state()
+        # Ranking reads the posting lists and reorders the bitmap LRU, other threads refresh them
+        with state['lock']:
+            return items, PantryService._current(state).rank(items, limit, max_missing=max_missing)
+
+    @staticmethod
+    def missing_ingredients(items, recipe_ids):
+        """recipe_id -> ingredient lines (as written) that none of the pantry items cover, in recipe order"""
+        missing = {recipe_id: [] for recipe_id in recipe_ids}
+        if not recipe_ids or not IngredientService.has_ingredient_table():
+            return missing
+        rows = db.session.execute(
+            select(RecipeIngredient.recipe_id, RecipeIngredient.name, RecipeIngredient.line)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+            .order_by(RecipeIngredient.recipe_id, RecipeIngredient.position)
+        )
+        for recipe_id, name, line in rows:
+            if not any(PantryIndex.covers(item, name) for item in items):
+                missing[recipe_id].append(line)
+        return missing
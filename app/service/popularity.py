@@ -0,0 +1,99 @@
+from sqlalchemy import select, text, union_all
+from app.enums import Category
+from app.model.popularity import RECONCILE_FAVORITE_COUNTS
+from app.model.recipes import Recipe
+from app.model.users import User
+from app import db
+
+
+class PopularityService:
+    """Most favorited recipes, read from the trigger maintained recipes.favorite_count.
+
+    Each category's leaderboard is a backwards range read of the
+    (category, favorite_count) index that stops after limit rows, however
+    many recipes or favorites there are.
+    """
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 100
+
+    COLUMNS = (
+        Recipe.id,
+        Recipe.name,
+        Recipe.category,
+        Recipe.image_location,
+        Recipe.total_time,
+        Recipe.servings,
+        Recipe.favorite_count,
+        User.username.label('owner'),
+    )
+
+    @staticmethod
+    def normalize_category(category):
+        """The Category value matching category in any case, or None"""
+        for value in (cat.value for cat in Category):
+            if value.lower() == (category or '').strip().lower():
+                return value
+        return None
+
+    @staticmethod
+    def _top_query(category, limit):
+        return select(*PopularityService.COLUMNS).outerjoin(User, User.id == Recipe.user_id).where(
+            Recipe.category == category, Recipe.favorite_count > 0
+        ).order_by(Recipe.favorite_count.desc(), Recipe.id.desc()).limit(limit)
+
+    @staticmethod
+    def top_recipes(category=None, limit=None):
+        """Most favorited recipes, favorite_count then newest first.
+
+        With a category returns a list of recipe dicts (empty for unknown
+        categories). Without one returns {category: list} for every category
+        with a favorited recipe, all read with one UNION ALL of per-category
+        index range reads. Recipes nobody favorited are left out.
+        """
+        limit = min(max(1, limit or PopularityService.DEFAULT_LIMIT), PopularityService.MAX_LIMIT)
+        if category:
+            category = PopularityService.normalize_category(category)
+            if category is None:
+                return []
+            categories = [category]
+        else:
+            categories = [cat.value for cat in Category]
+
+        # Each branch keeps its own ORDER BY and LIMIT inside a subquery
+        branches = [PopularityService._top_query(name, limit).subquery() for name in categories]
+        rows = db.session.execute(union_all(*[select(*branch.c) for branch in branches])).all()
+
+        leaderboards = {}
+        for row in sorted(rows, key=lambda row: (-row.favorite_count, -row.id)):
+            leaderboards.setdefault(row.category, []).append({
+                'recipe_id': row.id,
+                'name': row.name,
+                'category': row.category,
+                'image_location': row.image_location,
+                'total_time': row.total_time,
+                'servings': row.servings,
+                'favorite_count': row.favorite_count,
+                'owner': row.owner or "Anonymous",
+            })
+        if category:
+            return leaderboards.get(category, [])
+        return {name: leaderboards[name] for name in categories if name in leaderboards}
+
+    @staticmethod
+    def reconcile():
+        """Recount every recipe's favorites and repair the counts that drifted.
+
+        The triggers keep favorite_count exact for every write made through
+        SQLite; this repairs counts after writes made with the triggers
+        dropped (bulk loads) or restored backups. Returns the number of
+        recipes whose count was wrong.
+        """
+        try:
+            result = db.session.execute(text(RECONCILE_FAVORITE_COUNTS))
+            db.session.commit()
+            return result.rowcount
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error reconciling favorite counts: {str(e)}")
+            raise
@@ -1,9 +1,18 @@
+from bisect import bisect_right
 from datetime import datetime
 from flask import Flask, request, jsonify, current_app
 from flask_sqlalchemy import SQLAlchemy
 from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.search import SearchService
+from app.service.pagination import InvalidCursor, Page, PaginationService
+from app.service.cache import CacheService
+from app.service.facets import FacetService
+from app.service.ingredients import IngredientService
+from app.service.suggest import SuggestService
 from app.enums import Category
 from werkzeug.utils import secure_filename
+from sqlalchemy import func, select
 import os 
 from app import db
 
@@ -13,6 +22,49 @@ class RecipeService:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
+    RANDOM_RECIPE_MESSAGE = "Hello there! Your random kitchen adventure awaits. Try it before it vanishes!\n"
+    # Random id probes to try before walking forward from a random id
+    RANDOM_PROBE_ATTEMPTS = 8
+    # Ids read per step when the random probes all missed
+    RANDOM_SCAN_BATCH = 100
+
+    # CacheService namespace of serialized recipe details, keyed by id
+    CACHE_NAMESPACE = 'recipe'
+    # CacheService namespace of ranked search matches (sort keys only), keyed by catalog version and query
+    SEARCH_CACHE_NAMESPACE = 'search'
+
+    # Column projections used by the JSON endpoints (no ORM objects are loaded)
+    SUMMARY_COLUMNS = (
+        Recipe.id,
+        Recipe.name,
+        Recipe.category,
+        Recipe.image_location,
+        Recipe.prep_time,
+        Recipe.cook_time,
+        Recipe.total_time,
+        Recipe.servings,
+    )
+    DETAIL_COLUMNS = SUMMARY_COLUMNS + (
+        Recipe.ingredients,
+        Recipe.instructions,
+        Recipe.user_id,
+        Recipe.updated_at,
+    )
+    # Keys of recipe_details_dict, the serialization shared by /get_recipe and /recipes
+    RECIPE_FIELDS = (
+        'recipe_id', 'name', 'ingredients', 'instructions', 'category', 'prep_time', 'cook_time',
+        'total_time', 'servings', 'image_location', 'user_id', 'owner', 'image',
+    )
+    # Keys of a /search_results recipe ('owner' is sent as 'created_by')
+    SEARCH_RESULT_FIELDS = (
+        'recipe_id', 'name', 'image_location', 'prep_time', 'cook_time', 'total_time', 'servings',
+        'category', 'ingredients', 'instructions', 'owner',
+    )
+    # Keys of a recipe card in recommendation lists (/recommendations, /similar)
+    CARD_FIELDS = ('recipe_id', 'name', 'category', 'image_location', 'total_time', 'servings', 'owner')
+    # Most ids get_recipes_by_ids resolves per call
+    MAX_BATCH_IDS = 100
+
     @staticmethod
     def allowed_file(filename):
         """Check if file has allowed extension"""
@@ -77,7 +129,10 @@ class RecipeService:
             )
             
             db.session.add(new_recipe)
-            db.session.commit()  # Commit the recipe first to get the ID
+            db.session.flush()  # Get the ID for the parsed ingredient rows
+            IngredientService.replace_recipe_ingredients(new_recipe.id, ingredients)
+            db.session.commit()
+            RecipeService.invalidate_cached_recipe(new_recipe.id)
 
             message = f"Your recipe '{name}' is added."
             return new_recipe, message
@@ -154,10 +209,13 @@ class RecipeService:
             )
 
             db.session.add(new_recipe)
+            db.session.flush()
+            IngredientService.replace_recipe_ingredients(new_recipe.id, ingredients)
             db.session.commit()
 
             # IMPORTANT FIX: refresh so SQLAlchemy loads new_recipe.user
             db.session.refresh(new_recipe)
+            RecipeService.invalidate_cached_recipe(new_recipe.id)
 
             message = f"Your updated recipe '{name}' has been created as a duplicate."
             return new_recipe, message
@@ -168,31 +226,331 @@ class RecipeService:
             raise
 
     @staticmethod
-    def search_recipes(query=None, category=None):
-        """Modern search: searches across ingredients, category, and recipe name."""
+    def search_query(query=None, category=None):
+        """Build the recipe search query, best full-text matches first."""
         recipes_query = Recipe.query
         if query:
-            search_term = f"%{query.lower()}%"
-            recipes_query = recipes_query.filter(
-                db.or_(
-                    Recipe.ingredients.ilike(search_term),
-                    Recipe.category.ilike(search_term),
-                    Recipe.name.ilike(search_term)
-                )
-            )
+            recipes_query = SearchService.filter_recipes(recipes_query, query)
+        else:
+            recipes_query = recipes_query.order_by(Recipe.id)
         if category:
             recipes_query = recipes_query.filter(Recipe.category.ilike(f"%{category}%"))
-        return recipes_query.all()
+        return recipes_query
+
+    @staticmethod
+    def search_recipes(query=None, category=None):
+        """Modern search: searches across ingredients, category, and recipe name."""
+        return RecipeService.search_query(query=query, category=category).all()
+
+    @staticmethod
+    def recipe_rows_query(columns=SUMMARY_COLUMNS):
+        """Column-only recipe query with the owner's username joined in as 'owner'."""
+        return db.session.query(*columns, User.username.label('owner')).outerjoin(
+            User, User.id == Recipe.user_id
+        )
+
+    @staticmethod
+    def browse_recipes(category=None, cursor=None, limit=None, include_total=False):
+        """Page of recipe summary rows in id order, optionally restricted to one category."""
+        query = RecipeService.recipe_rows_query()
+        if category:
+            query = query.filter(Recipe.category.ilike(category))
+        return PaginationService.paginate(
+            query, [('id', Recipe.id)], cursor=cursor, limit=limit, include_total=include_total
+        )
+
+    @staticmethod
+    def get_recipe_summaries(recipe_ids, columns=SUMMARY_COLUMNS):
+        """recipe_id -> summary (or columns) row with owner for the given ids, one IN query."""
+        if not recipe_ids:
+            return {}
+        rows = RecipeService.recipe_rows_query(columns).filter(Recipe.id.in_(recipe_ids)).all()
+        return {row.id: row for row in rows}
+
+    @staticmethod
+    def search_recipe_rows(query, cursor=None, limit=None, include_total=False):
+        """Page of recipe detail rows matching query, best matches first."""
+        rows_query, keys = SearchService.filter_rows(
+            RecipeService.recipe_rows_query(RecipeService.DETAIL_COLUMNS), query
+        )
+        return PaginationService.paginate(
+            rows_query, keys, cursor=cursor, limit=limit, include_total=include_total
+        )
+
+    @staticmethod
+    def search_matches(query, catalog_version=None, correct=True):
+        """Ranked matches of a normalized query, cached per catalog version.
+
+        Returns {'keys': sort key names, 'rows': sort key values of the best
+        TOTAL_COUNT_CAP matches in order, 'complete': whether rows holds every
+        match}, plus 'corrected_query' when nothing matched but a spelling
+        correction does. Only sort keys (rank and id) are stored, so one entry
+        serves every page size and page of the term until a recipe changes.
+        """
+        key = f"{catalog_version}:{query}" if catalog_version is not None else None
+        if key is not None:
+            cached = CacheService.get(RecipeService.SEARCH_CACHE_NAMESPACE, key)
+            if cached is not None:
+                return cached
+
+        rows_query, keys = SearchService.filter_rows(db.session.query(Recipe.id), query)
+        key_columns = [column for _, column in keys]
+        cap = PaginationService.TOTAL_COUNT_CAP
+        rows = rows_query.with_entities(*key_columns).order_by(*key_columns).limit(cap + 1).all()
+        matches = {
+            'keys': [name for name, _ in keys],
+            'rows': [list(row) for row in rows[:cap]],
+            'complete': len(rows) <= cap,
+        }
+        if not rows and correct:
+            corrected = SuggestService.correct(query)
+            if corrected and RecipeService.search_matches(corrected, catalog_version, correct=False)['rows']:
+                matches['corrected_query'] = corrected
+
+        if key is not None:
+            CacheService.set(RecipeService.SEARCH_CACHE_NAMESPACE, key, matches)
+        return matches
+
+    @staticmethod
+    def search_page(query, matches, cursor=None, limit=None, include_total=False):
+        """Page of recipe ids for query, cut from its cached matches.
+
+        Cursors are the same keyset tokens search_recipe_rows makes, so a page
+        past the cached matches simply continues in the index.
+        """
+        limit = PaginationService.clamp_limit(limit)
+        key_names, rows = matches['keys'], matches['rows']
+        start = 0
+        if cursor:
+            values = PaginationService.decode_cursor(cursor, key_names)
+            # rank and id are numbers, anything else cannot be compared with the cached rows
+            if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+                raise InvalidCursor("Invalid cursor.")
+            start = bisect_right(rows, values)
+        end = start + limit
+        if end >= len(rows) and not matches['complete']:
+            page = RecipeService.search_recipe_rows(query, cursor=cursor, limit=limit, include_total=include_total)
+            page.items = [row.id for row in page.items]
+            return page
+
+        total, total_exact = None, None
+        if include_total:
+            total, total_exact = len(rows), matches['complete']
+        return Page(
+            [row[-1] for row in rows[start:end]],
+            next_cursor=PaginationService.encode_cursor(key_names, rows[end - 1]) if end < len(rows) else None,
+            total=total,
+            total_exact=total_exact
+        )
+
+    @staticmethod
+    def search_results_dict(query, catalog_version=None, cursor=None, limit=None, include_total=False, facets=False):
+        """Serialized /search_results page for query.
+
+        The query's ranked matches are cached per catalog version (see
+        search_matches), so popular terms skip the full-text search and any
+        recipe write moves readers to new keys while stale entries age out.
+        Recipes are read through the recipe cache like /recipes, so a hot term
+        runs no SQL at all. When a first page finds nothing but a spelling
+        correction does, the corrected query's recipes are returned with
+        'corrected_query' (later pages should then be requested for it). With
+        facets, a first page also carries the facet counts of all matches,
+        cached with the matches.
+        """
+        query = SearchService.normalize_query(query)
+        matches = RecipeService.search_matches(query, catalog_version)
+        searched = query
+        if not cursor and matches.get('corrected_query'):
+            searched = matches['corrected_query']
+            matches = RecipeService.search_matches(searched, catalog_version, correct=False)
+
+        page = RecipeService.search_page(searched, matches, cursor=cursor, limit=limit, include_total=include_total)
+        # Recipes come from the recipe cache, the misses from one batched id lookup
+        recipes = RecipeService.get_recipes_by_ids(page.items, fields=RecipeService.SEARCH_RESULT_FIELDS)
+        result = {
+            'recipes': [
+                dict(recipe, created_by=recipe.pop('owner')) for recipe in recipes if recipe is not None
+            ],
+            **page.to_dict()
+        }
+        if searched != query:
+            result['corrected_query'] = searched
+        if facets and not cursor:
+            if 'facets' not in matches:
+                matches['facets'] = FacetService.search_facets(searched)
+                if catalog_version is not None:
+                    CacheService.set(RecipeService.SEARCH_CACHE_NAMESPACE, f"{catalog_version}:{searched}", matches)
+            result['facets'] = matches['facets']
+        return result
+
+    @staticmethod
+    def get_recipe_details(recipe_id):
+        """Fetch a single recipe detail row (with owner), or None if it does not exist."""
+        return RecipeService.recipe_rows_query(RecipeService.DETAIL_COLUMNS).filter(
+            Recipe.id == recipe_id
+        ).first()
+
+    @staticmethod
+    def _cached_recipe_entries(recipe_ids):
+        """recipe_id -> cache entry {'recipe': details dict, 'updated_at': isoformat} of the ids that exist.
+
+        Cached entries are read in one batch, the misses are loaded with one IN
+        query and written back to the cache unless invalidated meanwhile.
+        """
+        entries = CacheService.get_many(RecipeService.CACHE_NAMESPACE, recipe_ids)
+        missing = [recipe_id for recipe_id in dict.fromkeys(recipe_ids) if recipe_id not in entries]
+        if not missing:
+            return entries
+        # A write committed while the rows are read invalidates after this point, the fill is then skipped
+        loaded_at = CacheService.fill_started()
+        rows = RecipeService.get_recipe_summaries(missing, columns=RecipeService.DETAIL_COLUMNS)
+        for recipe_id, row in rows.items():
+            entry = {
+                'recipe': RecipeService.recipe_details_dict(row),
+                'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            }
+            CacheService.set(RecipeService.CACHE_NAMESPACE, recipe_id, entry, loaded_at=loaded_at)
+            entries[recipe_id] = entry
+        return entries
+
+    @staticmethod
+    def _cached_recipe_entry(recipe_id):
+        """Cache entry of one recipe (see _cached_recipe_entries), or None if it does not exist."""
+        return RecipeService._cached_recipe_entries([recipe_id]).get(recipe_id)
+
+    @staticmethod
+    def get_recipe_dict(recipe_id):
+        """Serialized recipe details and updated_at, or (None, None) if it does not exist.
+
+        Served from the recipe cache when possible, so hot recipes run no SQL.
+        """
+        entry = RecipeService._cached_recipe_entry(recipe_id)
+        if entry is None:
+            return None, None
+        updated_at = datetime.fromisoformat(entry['updated_at']) if entry['updated_at'] else None
+        return dict(entry['recipe']), updated_at
+
+    @staticmethod
+    def get_recipes_by_ids(recipe_ids, fields=None):
+        """Serialized recipes (as /get_recipe returns them) in the order of recipe_ids, None where an id does not exist.
+
+        Shares the recipe cache with get_recipe_dict: cached recipes are read in
+        one batch and the rest with one IN query, owners joined. fields picks
+        keys of the serialization. Raises ValueError for unknown fields or more
+        than MAX_BATCH_IDS ids.
+        """
+        if len(recipe_ids) > RecipeService.MAX_BATCH_IDS:
+            raise ValueError(f"At most {RecipeService.MAX_BATCH_IDS} ids can be looked up at once.")
+        fields = list(fields or RecipeService.RECIPE_FIELDS)
+        unknown = [field for field in fields if field not in RecipeService.RECIPE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}. Valid fields are: {list(RecipeService.RECIPE_FIELDS)}")
+
+        entries = RecipeService._cached_recipe_entries(recipe_ids)
+        recipes = []
+        for recipe_id in recipe_ids:
+            entry = entries.get(recipe_id)
+            recipes.append(None if entry is None else {field: entry['recipe'][field] for field in fields})
+        return recipes
+
+    @staticmethod
+    def get_recipe_updated_at(recipe_id):
+        """updated_at of a recipe from the cache, or a single-column lookup (None if missing)."""
+        entry = CacheService.get(RecipeService.CACHE_NAMESPACE, recipe_id)
+        if entry is not None:
+            return datetime.fromisoformat(entry['updated_at']) if entry['updated_at'] else None
+        from app.service.catalog import CatalogService
+        row = CatalogService.get_recipe_updated_at(recipe_id)
+        return row.updated_at if row else None
+
+    @staticmethod
+    def invalidate_cached_recipe(recipe_id):
+        """Drop a recipe from the cache of every worker after it is written, so the next read reloads it."""
+        CacheService.invalidate(RecipeService.CACHE_NAMESPACE, recipe_id)
+
+    @staticmethod
+    def recipe_details_dict(recipe):
+        """Serialize a recipe detail row (DETAIL_COLUMNS plus owner) for the JSON endpoints."""
+        return {
+            'recipe_id': recipe.id,
+            'name': recipe.name,
+            'ingredients': recipe.ingredients,
+            'instructions': recipe.instructions,
+            'category': recipe.category,
+            'prep_time': recipe.prep_time,
+            'cook_time': recipe.cook_time,
+            'total_time': recipe.total_time,
+            'servings': recipe.servings,
+            'image_location': recipe.image_location,
+            'user_id': recipe.user_id,
+            'owner': recipe.owner or "Anonymous",
+            'image': recipe.image_location,
+        }
+
+    @staticmethod
+    def pick_recipe_id(rng):
+        """Pick a recipe id using the given random.Random, so equal seeds give equal picks."""
+        max_id = db.session.query(func.max(Recipe.id)).scalar()
+        if max_id is None:
+            return None
+        candidate = None
+        for _ in range(RecipeService.RANDOM_PROBE_ATTEMPTS):
+            candidate = rng.randint(1, max_id)
+            if db.session.query(Recipe.id).filter(Recipe.id == candidate).scalar() is not None:
+                return candidate
+        return db.session.query(func.min(Recipe.id)).filter(Recipe.id >= candidate).scalar()
+
+    @staticmethod
+    def _random_id():
+        """SQL scalar for a random id in 1..max(id), evaluated once per statement."""
+        max_id = select(func.max(Recipe.id)).scalar_subquery()
+        positive_random = func.random().op('&')(0x7FFFFFFFFFFFFFFF)
+        return select(positive_random % max_id + 1).scalar_subquery()
+
+    @staticmethod
+    def _pick_random(query, exclude_ids=None):
+        """Pick a uniformly random row without sorting the table.
+
+        Each attempt is one primary key lookup of a random id up to max(id) (an O(1)
+        read of the rowid b-tree). Ids that are missing or excluded are retried, which
+        keeps the pick uniform. If every attempt misses (tiny table, huge exclusion
+        set) fall back to the first allowed id after a random id, wrapping around,
+        reading ids only in RANDOM_SCAN_BATCH batches and then the one chosen row.
+        """
+        exclude_ids = set(exclude_ids or ())
+        for _ in range(RecipeService.RANDOM_PROBE_ATTEMPTS):
+            row = query.filter(Recipe.id == RecipeService._random_id()).first()
+            if row is not None and row.id not in exclude_ids:
+                return row
+
+        start = db.session.execute(select(RecipeService._random_id())).scalar()
+        if start is None:
+            return None  # no recipes at all
+        # Walk the ids (not whole rows) from start in fixed-size batches, wrapping around once
+        ids = query.with_entities(Recipe.id)
+        for low, high in ((start, None), (None, start)):
+            last = low - 1 if low is not None else None
+            while True:
+                window = ids
+                if last is not None:
+                    window = window.filter(Recipe.id > last)
+                if high is not None:
+                    window = window.filter(Recipe.id < high)
+                batch = [row.id for row in window.order_by(Recipe.id).limit(RecipeService.RANDOM_SCAN_BATCH)]
+                chosen = next((recipe_id for recipe_id in batch if recipe_id not in exclude_ids), None)
+                if chosen is not None:
+                    return query.filter(Recipe.id == chosen).first()
+                if len(batch) < RecipeService.RANDOM_SCAN_BATCH:
+                    break
+                last = batch[-1]
+        return None
 
     @staticmethod
     def get_random_recipe(exclude_ids=None):
         """Fetch one random recipe from the database."""
-        query = Recipe.query
-        if exclude_ids:
-            query = query.filter(~Recipe.id.in_(exclude_ids))
-        recipe = query.order_by(db.func.random()).first()
+        recipe = RecipeService._pick_random(Recipe.query, exclude_ids)
         if recipe:
-            return recipe, "Hello there! Your random kitchen adventure awaits. Try it before it vanishes!\n"
+            return recipe, RecipeService.RANDOM_RECIPE_MESSAGE
         else:
             return None, "No recipes found."
 
@@ -226,6 +584,7 @@ class RecipeService:
 
             if ingredients:
                 recipe.ingredients = ingredients
+                IngredientService.replace_recipe_ingredients(recipe.id, ingredients)
 
             if instructions:
                 recipe.instructions = instructions
@@ -250,6 +609,8 @@ class RecipeService:
 
             recipe.updated_at = datetime.utcnow()
             db.session.commit()
+            RecipeService.invalidate_cached_recipe(recipe.id)
+
             message = f"Your recipe '{recipe.name}' has been updated."
             return recipe, message
 
@@ -0,0 +1,268 @@
+import heapq
+import weakref
+from sqlalchemy import delete, insert, select, text
+from app.cofavorites import TOP_K, co_favorite_counts, group_favorites, merge_neighbor, similarity, top_neighbors
+from app.model.favorites import Favorite
+from app.model.recipes import Recipe
+from app.model.recommendations import (
+    QUEUE_ALL_RECIPE_NEIGHBORS, RECIPE_NEIGHBORS_TABLE, RecipeNeighbor, RecipeNeighborPending
+)
+from app.service.favorites import FavoriteService, FavoriteSetCache
+from app.service.recipe import RecipeService
+from app import db
+
+
+class RecommendationService:
+    """"People who liked this also liked" recommendations from co-favorites.
+
+    Neighbors are computed offline (rebuild, refresh) into recipe_neighbors
+    and only read when serving: a recipe's recommendations are one primary
+    key range read, a user's are one read of the neighbors of their
+    favorites. Favorite writes queue the recipes they touch through
+    triggers, and refresh recomputes just those, so the table can follow new
+    favorites from a frequent job instead of full rebuilds.
+    """
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = TOP_K
+    # Queued recipes recomputed per transaction by refresh
+    REFRESH_BATCH = 500
+    # Ids per IN (...) statement (SQLite's default host parameter limit is 999)
+    MAX_VARIABLES = 500
+    # Favorites of a user whose neighbors are combined (the most recently added recipes)
+    MAX_SEEDS = 100
+
+    # Engines known to have the recipe_neighbors table (only positive answers are cached)
+    _engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def has_neighbor_table():
+        """Check whether the current database has the recipe_neighbors table."""
+        engine = db.engine
+        if RecommendationService._engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': RECIPE_NEIGHBORS_TABLE}
+        ).first() is not None
+        if found:
+            RecommendationService._engines[engine] = True
+        return found
+
+    @staticmethod
+    def _chunks(ids):
+        ids = sorted(ids)
+        for start in range(0, len(ids), RecommendationService.MAX_VARIABLES):
+            yield ids[start:start + RecommendationService.MAX_VARIABLES]
+
+    @staticmethod
+    def _fans(recipe_ids):
+        """recipe_id -> users who favorited it (ix_favorites_recipe_id)"""
+        fans = {}
+        for chunk in RecommendationService._chunks(recipe_ids):
+            for recipe_id, user_id in db.session.execute(
+                select(Favorite.recipe_id, Favorite.user_id).where(Favorite.recipe_id.in_(chunk))
+            ):
+                fans.setdefault(recipe_id, []).append(user_id)
+        return fans
+
+    @staticmethod
+    def _load_favorites(user_ids, favorites_of):
+        """Add the favorite lists of user_ids not loaded yet to favorites_of (ix_favorites_user_recipe)"""
+        missing = [user_id for user_id in user_ids if user_id not in favorites_of]
+        for chunk in RecommendationService._chunks(missing):
+            favorites_of.update(group_favorites(db.session.execute(
+                select(Favorite.user_id, Favorite.recipe_id).where(Favorite.user_id.in_(chunk))
+            )))
+
+    @staticmethod
+    def _favorite_counts(recipe_ids):
+        """recipe_id -> recipes.favorite_count"""
+        counts = {}
+        for chunk in RecommendationService._chunks(recipe_ids):
+            counts.update(db.session.execute(
+                select(Recipe.id, Recipe.favorite_count).where(Recipe.id.in_(chunk))
+            ).all())
+        return counts
+
+    @staticmethod
+    def _neighbor_lists(recipe_ids):
+        """recipe_id -> [(neighbor_id, score, co_count)] in rank order, as stored"""
+        lists = {}
+        for chunk in RecommendationService._chunks(recipe_ids):
+            for row in db.session.execute(
+                select(RecipeNeighbor.recipe_id, RecipeNeighbor.neighbor_id, RecipeNeighbor.score, RecipeNeighbor.co_count)
+                .where(RecipeNeighbor.recipe_id.in_(chunk))
+                .order_by(RecipeNeighbor.recipe_id, RecipeNeighbor.rank)
+            ):
+                lists.setdefault(row.recipe_id, []).append((row.neighbor_id, row.score, row.co_count))
+        return lists
+
+    @staticmethod
+    def _listed_by(recipe_ids):
+        """neighbor_id -> recipes whose stored list contains it (ix_recipe_neighbors_neighbor_id)"""
+        listed_by = {}
+        for chunk in RecommendationService._chunks(recipe_ids):
+            for recipe_id, neighbor_id in db.session.execute(
+                select(RecipeNeighbor.recipe_id, RecipeNeighbor.neighbor_id).where(RecipeNeighbor.neighbor_id.in_(chunk))
+            ):
+                listed_by.setdefault(neighbor_id, []).append(recipe_id)
+        return listed_by
+
+    @staticmethod
+    def _write(lists):
+        """Replace the stored neighbors of every recipe in lists"""
+        for chunk in RecommendationService._chunks(lists):
+            db.session.execute(delete(RecipeNeighbor).where(RecipeNeighbor.recipe_id.in_(chunk)))
+        rows = [
+            {'recipe_id': recipe_id, 'rank': rank, 'neighbor_id': neighbor_id, 'score': score, 'co_count': co_count}
+            for recipe_id, neighbors in lists.items()
+            for rank, (neighbor_id, score, co_count) in enumerate(neighbors)
+        ]
+        if rows:
+            db.session.execute(insert(RecipeNeighbor), rows)
+
+    @staticmethod
+    def _refresh_batch(batch, queued, favorites_of):
+        # Exact lists for the batch: co-favorite counts summed over each recipe's fans
+        fans = RecommendationService._fans(batch)
+        RecommendationService._load_favorites({user_id for users in fans.values() for user_id in users}, favorites_of)
+        co_counts = {
+            recipe_id: co_favorite_counts(recipe_id, fans.get(recipe_id, ()), favorites_of) for recipe_id in batch
+        }
+        counts = RecommendationService._favorite_counts(
+            set(batch).union(*(counts.keys() for counts in co_counts.values()))
+        )
+        lists = {
+            recipe_id: top_neighbors(recipe_id, co_counts[recipe_id], counts) for recipe_id in batch
+        }
+
+        # Recipes that are not queued keep their lists, with each batch recipe's entry
+        # rescored (co-favorite counts are symmetric) or dropped when nothing is shared anymore
+        patches = {}
+        for recipe_id, others in RecommendationService._listed_by(batch).items():
+            for other in others:
+                patches.setdefault(other, set()).add(recipe_id)
+        for recipe_id in batch:
+            for other in co_counts[recipe_id]:
+                patches.setdefault(other, set()).add(recipe_id)
+        patches = {other: recipe_ids for other, recipe_ids in patches.items() if other not in queued}
+
+        stored = RecommendationService._neighbor_lists(patches)
+        for other, recipe_ids in patches.items():
+            neighbors = stored.get(other, [])
+            patched = neighbors
+            for recipe_id in recipe_ids:
+                co_count = co_counts[recipe_id].get(other, 0)
+                patched = merge_neighbor(
+                    patched, recipe_id, similarity(co_count, counts.get(other, 0), counts.get(recipe_id, 0)), co_count
+                )
+            if patched != neighbors:
+                lists[other] = patched
+
+        RecommendationService._write(lists)
+        for chunk in RecommendationService._chunks(batch):
+            db.session.execute(delete(RecipeNeighborPending).where(RecipeNeighborPending.recipe_id.in_(chunk)))
+
+    @staticmethod
+    def refresh():
+        """Recompute the neighbors of every queued recipe, REFRESH_BATCH per transaction.
+
+        Queued recipes get exact lists. A recipe that is not queued but shares
+        fans with one (or lists it) has that one entry rescored in place, so its
+        list stays current without recounting its own fans. Returns the number
+        of queued recipes recomputed.
+        """
+        if not RecommendationService.has_neighbor_table():
+            return 0
+        order = db.session.scalars(
+            select(RecipeNeighborPending.recipe_id).order_by(RecipeNeighborPending.recipe_id)
+        ).all()
+        queued = set(order)
+        favorites_of = {}
+        refreshed = 0
+        for start in range(0, len(order), RecommendationService.REFRESH_BATCH):
+            batch = order[start:start + RecommendationService.REFRESH_BATCH]
+            try:
+                RecommendationService._refresh_batch(batch, queued, favorites_of)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error refreshing recommendations: {str(e)}")
+                raise
+            queued.difference_update(batch)
+            refreshed += len(batch)
+        return refreshed
+
+    @staticmethod
+    def rebuild():
+        """Drop every stored neighbor list and recompute all favorited recipes."""
+        if not RecommendationService.has_neighbor_table():
+            return 0
+        try:
+            db.session.execute(delete(RecipeNeighbor))
+            db.session.execute(text(QUEUE_ALL_RECIPE_NEIGHBORS))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding recommendations: {str(e)}")
+            raise
+        return RecommendationService.refresh()
+
+    @staticmethod
+    def _recipes(entries, extra_ids=()):
+        """Recipe summaries for extra_ids (None when missing), and for [(recipe_id, keys)]
+        with keys added, skipping recipes that no longer exist. One batched lookup."""
+        ids = list(extra_ids) + [recipe_id for recipe_id, _ in entries]
+        recipes = RecipeService.get_recipes_by_ids(ids, fields=RecipeService.CARD_FIELDS) if ids else []
+        results = [
+            dict(recipe, **keys)
+            for (_, keys), recipe in zip(entries, recipes[len(extra_ids):]) if recipe is not None
+        ]
+        return recipes[:len(extra_ids)], results
+
+    @staticmethod
+    def similar_recipes(recipe_id, limit=None):
+        """Recipes most often favorited together with recipe_id, most similar first.
+
+        Each carries its score (cosine similarity of the two recipes' fans) and
+        co_count (users who favorited both). Returns None when the recipe does
+        not exist.
+        """
+        limit = min(max(1, limit or RecommendationService.DEFAULT_LIMIT), RecommendationService.MAX_LIMIT)
+        rows = []
+        if RecommendationService.has_neighbor_table():
+            rows = db.session.execute(
+                select(RecipeNeighbor.neighbor_id, RecipeNeighbor.score, RecipeNeighbor.co_count)
+                .where(RecipeNeighbor.recipe_id == recipe_id)
+                .order_by(RecipeNeighbor.rank)
+                .limit(limit)
+            ).all()
+        (recipe,), recipes = RecommendationService._recipes(
+            [(row.neighbor_id, {'score': round(row.score, 4), 'co_count': row.co_count}) for row in rows],
+            extra_ids=[recipe_id]
+        )
+        return None if recipe is None else recipes
+
+    @staticmethod
+    def recommendations_for_user(user_id, limit=None):
+        """Recipes a user has not favorited, scored by summing their similarity
+        to the user's favorites (the MAX_SEEDS newest recipes), best first."""
+        limit = min(max(1, limit or RecommendationService.DEFAULT_LIMIT), RecommendationService.MAX_LIMIT)
+        favorites = FavoriteService.favorite_ids(user_id)
+        if not favorites or not RecommendationService.has_neighbor_table():
+            return []
+        seeds = list(favorites[-RecommendationService.MAX_SEEDS:])
+        scores = {}
+        for neighbor_id, score in db.session.execute(
+            select(RecipeNeighbor.neighbor_id, RecipeNeighbor.score).where(RecipeNeighbor.recipe_id.in_(seeds))
+        ):
+            if not FavoriteSetCache.contains(favorites, neighbor_id):
+                scores[neighbor_id] = scores.get(neighbor_id, 0.0) + score
+        best = heapq.nsmallest(limit, ((-score, neighbor_id) for neighbor_id, score in scores.items()))
+        _, recipes = RecommendationService._recipes(
+            [(neighbor_id, {'score': round(-score, 4)}) for score, neighbor_id in best]
+        )
+        return recipes
@@ -0,0 +1,103 @@
+import weakref
+from sqlalchemy import Float, Integer, text
+from app.model.recipes import Recipe
+from app.model.recipe_search import RECIPES_FTS_TABLE
+from app import db
+
+
+class SearchService:
+    # The trigram index cannot match terms shorter than a single trigram
+    MIN_TERM_LENGTH = 3
+    # bm25() column weights, in index column order: name, category, ingredients
+    BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+    # Engines known to have the recipes_fts table (only positive answers are cached)
+    _indexed_engines = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def has_index():
+        """Check whether the current database has the recipes_fts index."""
+        engine = db.engine
+        if SearchService._indexed_engines.get(engine):
+            return True
+        if engine.dialect.name != 'sqlite':
+            return False
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': RECIPES_FTS_TABLE}
+        ).first() is not None
+        if found:
+            SearchService._indexed_engines[engine] = True
+        return found
+
+    @staticmethod
+    def normalize_query(query):
+        """Lowercase query with runs of whitespace collapsed, so equivalent searches share cache entries."""
+        return ' '.join((query or '').lower().split())
+
+    @staticmethod
+    def match_expression(term):
+        """Quote a user supplied term as a single FTS5 phrase (substring match with trigrams)."""
+        return '"' + term.replace('"', '""') + '"'
+
+    @staticmethod
+    def ranked_matches(term):
+        """Subquery of (id, rank) for recipes matching term, lower rank is a better match."""
+        weights = ', '.join(str(weight) for weight in SearchService.BM25_WEIGHTS)
+        return text(
+            f"SELECT rowid AS id, bm25(recipes_fts, {weights}) AS rank "
+            "FROM recipes_fts WHERE recipes_fts MATCH :match"
+        ).bindparams(
+            match=SearchService.match_expression(term)
+        ).columns(id=Integer, rank=Float).subquery('recipe_matches')
+
+    @staticmethod
+    def _indexed_matches(term):
+        """Ranked matches subquery for term, or None when the index cannot answer it."""
+        if len(term) < SearchService.MIN_TERM_LENGTH or not SearchService.has_index():
+            return None
+        return SearchService.ranked_matches(term)
+
+    @staticmethod
+    def _substring_condition(term):
+        search_term = f"%{term.lower()}%"
+        return db.or_(
+            Recipe.ingredients.ilike(search_term),
+            Recipe.category.ilike(search_term),
+            Recipe.name.ilike(search_term)
+        )
+
+    @staticmethod
+    def filter_recipes(recipes_query, term):
+        """Restrict a Recipe query to rows whose name, category or ingredients contain term.
+
+        Uses the full-text index ordered by bm25 when possible, and falls back to the
+        ILIKE scan for very short terms or databases that have not been indexed yet.
+        """
+        matches = SearchService._indexed_matches(term)
+        if matches is None:
+            return recipes_query.filter(SearchService._substring_condition(term)).order_by(Recipe.id)
+        return recipes_query.join(matches, Recipe.id == matches.c.id).order_by(matches.c.rank, Recipe.id)
+
+    @staticmethod
+    def filter_matches(query, term):
+        """Restrict any query over recipes (a grouped count, say) to matches of term, without ordering."""
+        matches = SearchService._indexed_matches(term)
+        if matches is None:
+            return query.filter(SearchService._substring_condition(term))
+        return query.join(matches, Recipe.id == matches.c.id)
+
+    @staticmethod
+    def filter_rows(rows_query, term):
+        """Column-query version of filter_recipes for keyset pagination.
+
+        Returns (query, keys) where keys are the (label, column) sort keys, and a
+        'rank' column is added to the rows when the full-text index is used.
+        """
+        matches = SearchService._indexed_matches(term)
+        if matches is None:
+            return rows_query.filter(SearchService._substring_condition(term)), [('id', Recipe.id)]
+        rows_query = rows_query.join(matches, Recipe.id == matches.c.id).add_columns(
+            matches.c.rank.label('rank')
+        )
+        return rows_query, [('rank', matches.c.rank), ('id', Recipe.id)]
@@ -0,0 +1,121 @@
+import threading
+from flask import current_app
+from sqlalchemy import select
+from app.model.ingredients import RecipeIngredient
+from app.model.recipes import Recipe
+from app.service.cache import CacheService
+from app.service.ingredients import IngredientService
+from app.service.recipe import RecipeService
+from app.tfidf import TfidfIndex, document_terms
+from app import db
+
+
+class SimilarService:
+    """Recipes similar by content (TF-IDF over names and ingredients), served from memory.
+
+    The TfidfIndex is built on first use and follows recipe writes of every
+    worker like SuggestService does: CacheService listeners on the 'recipe'
+    namespace queue changed recipe ids, which are re-indexed before the next
+    lookup. A recipe added through RecipeService.add_recipe is appended to
+    the index without rebuilding it; the idf weights are recomputed once
+    the index says they went stale.
+    """
+
+    EXTENSION_KEY = 'similar'
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+
+    @staticmethod
+    def _state():
+        state = current_app.extensions.get(SimilarService.EXTENSION_KEY)
+        if state is None:
+            state = current_app.extensions.setdefault(SimilarService.EXTENSION_KEY, {
+                'lock': threading.Lock(),
+                'index': None,
+                'pending': set(),
+                'rebuild': False,
+            })
+            CacheService.add_listener(
+                'recipe', lambda key: SimilarService._recipe_changed(state, key)
+            )
+        return state
+
+    @staticmethod
+    def _recipe_changed(state, key):
+        if key is None:
+            state['rebuild'] = True
+        else:
+            state['pending'].add(int(key))
+
+    @staticmethod
+    def _documents(recipe_ids=None):
+        """(recipe_id, terms) of some or all recipes"""
+        ingredients = {}
+        if IngredientService.has_ingredient_table():
+            query = select(RecipeIngredient.recipe_id, RecipeIngredient.name)
+            if recipe_ids is not None:
+                query = query.where(RecipeIngredient.recipe_id.in_(recipe_ids))
+            for recipe_id, name in db.session.execute(query):
+                ingredients.setdefault(recipe_id, []).append(name)
+        query = select(Recipe.id, Recipe.name)
+        if recipe_ids is not None:
+            query = query.where(Recipe.id.in_(recipe_ids))
+        return [
+            (recipe_id, document_terms(name, ingredients.get(recipe_id, ())))
+            for recipe_id, name in db.session.execute(query)
+        ]
+
+    @staticmethod
+    def _build(state):
+        # Start following invalidations before reading, so no write is missed in between
+        CacheService.sync(force=True)
+        state['pending'].clear()
+        state['rebuild'] = False
+        index = TfidfIndex()
+        index.load(SimilarService._documents())
+        state['index'] = index
+
+    @staticmethod
+    def _apply_pending(state):
+        recipe_ids = set(state['pending'])
+        state['pending'].difference_update(recipe_ids)
+        index = state['index']
+        for recipe_id in recipe_ids:
+            index.remove(recipe_id)
+        for recipe_id, terms in SimilarService._documents(recipe_ids):
+            index.add(recipe_id, terms)
+
+    @staticmethod
+    def _similar_ids(recipe_id, limit):
+        """(recipe ids with scores, whether recipe_id is indexed) from this process's index, brought up to date first"""
+        CacheService.sync()
+        state = SimilarService._state()
+        with state['lock']:
+            if state['index'] is None or state['rebuild']:
+                SimilarService._build(state)
+            elif state['pending']:
+                SimilarService._apply_pending(state)
+                if state['index'].stale():
+                    SimilarService._build(state)
+            index = state['index']
+            return index.similar(recipe_id, limit), recipe_id in index
+
+    @staticmethod
+    def similar_recipes(recipe_id, limit=None):
+        """Recipes sharing the most (rarest) name words and ingredients with recipe_id, most similar first.
+
+        Each carries its score, the cosine similarity of the two TF-IDF
+        vectors. Works for new recipes nobody has favorited. Returns None when
+        the recipe does not exist.
+        """
+        limit = min(max(1, limit or SimilarService.DEFAULT_LIMIT), SimilarService.MAX_LIMIT)
+        similar, found = SimilarService._similar_ids(recipe_id, limit)
+        if not found:
+            return None
+        recipes = RecipeService.get_recipes_by_ids(
+            [other for other, _ in similar], fields=RecipeService.CARD_FIELDS
+        ) if similar else []
+        return [
+            dict(recipe, score=round(score, 4))
+            for (_, score), recipe in zip(similar, recipes) if recipe is not None
+        ]
@@ -0,0 +1,284 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from flask import current_app
+from sqlalchemy import select, text
+from app.model.ingredients import RecipeIngredient
+from app.model.recipes import Recipe
+from app.service.cache import CacheService
+from app.service.ingredients import IngredientService
+from app.trigrams import TrigramIndex
+from app import db
+
+# Suggestion kinds, in the order they are listed
+CATEGORY, INGREDIENT, RECIPE = 0, 1, 2
+KIND_NAMES = {CATEGORY: 'category', INGREDIENT: 'ingredient', RECIPE: 'recipe'}
+
+
+class PrefixIndex:
+    """Sorted (key, kind, ref) entries searched with bisect.
+
+    Every word of a recipe name, category or ingredient name starts a key
+    ("tomato basil soup", "basil soup", "soup"), so a prefix matches the start
+    of any word. ref is the recipe id for recipes and the text otherwise.
+    Categories and ingredients are counted per recipe and only listed while
+    some recipe uses them; terms remembers what each recipe contributed so a
+    rewrite can take exactly that back out.
+    """
+
+    # Longest name whose words are all indexed
+    MAX_WORDS = 8
+
+    def __init__(self):
+        self.entries = []
+        self.counts = {}
+        self.terms = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    @staticmethod
+    def keys(text):
+        words = text.lower().split()[:PrefixIndex.MAX_WORDS]
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def _insert(self, text, kind, ref):
+        for key in PrefixIndex.keys(text):
+            insort(self.entries, (key, kind, ref))
+
+    def _delete(self, text, kind, ref):
+        for key in PrefixIndex.keys(text):
+            index = bisect_left(self.entries, (key, kind, ref))
+            if index < len(self.entries) and self.entries[index] == (key, kind, ref):
+                del self.entries[index]
+
+    def _count(self, kind, term, change):
+        count = self.counts.get((kind, term), 0) + change
+        if count > 0:
+            if change > 0 and count == change:
+                self._insert(term, kind, term)
+            self.counts[(kind, term)] = count
+        else:
+            self.counts.pop((kind, term), None)
+            self._delete(term, kind, term)
+
+    def remove(self, recipe_id):
+        """Take a recipe's name, category and ingredients out of the index"""
+        terms = self.terms.pop(recipe_id, None)
+        if terms is None:
+            return
+        name, category, ingredients = terms
+        self._delete(name, RECIPE, recipe_id)
+        if category:
+            self._count(CATEGORY, category, -1)
+        for ingredient in ingredients:
+            self._count(INGREDIENT, ingredient, -1)
+
+    def add(self, recipe_id, name, category, ingredients):
+        """Index a recipe (after remove, when it was indexed before)"""
+        ingredients = frozenset(ingredients)
+        self.terms[recipe_id] = (name, category, ingredients)
+        self._insert(name, RECIPE, recipe_id)
+        if category:
+            self._count(CATEGORY, category, 1)
+        for ingredient in ingredients:
+            self._count(INGREDIENT, ingredient, 1)
+
+    def load(self, recipes):
+        """Index many (recipe_id, name, category, ingredients) at once, sorting the entries once"""
+        entries = self.entries
+        used = {CATEGORY: Counter(), INGREDIENT: Counter()}
+        for recipe_id, name, category, ingredients in recipes:
+            ingredients = frozenset(ingredients)
+            self.terms[recipe_id] = (name, category, ingredients)
+            entries.extend((key, RECIPE, recipe_id) for key in PrefixIndex.keys(name))
+            if category:
+                used[CATEGORY][category] += 1
+            used[INGREDIENT].update(ingredients)
+        for kind, counter in used.items():
+            for term, count in counter.items():
+                if (kind, term) not in self.counts:
+                    entries.extend((key, kind, term) for key in PrefixIndex.keys(term))
+                self.counts[(kind, term)] = self.counts.get((kind, term), 0) + count
+        entries.sort()
+
+    def suggest(self, prefix, limit, scan_limit=1000):
+        """Up to limit (kind, ref, count) matches of prefix.
+
+        Categories come first, then ingredients and recipes. Within a kind,
+        terms used by more recipes come first. At most scan_limit entries are
+        read, so very short prefixes stay fast.
+        """
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        matches = {}
+        index = bisect_left(self.entries, (prefix,))
+        end = min(len(self.entries), index + scan_limit)
+        while index < end and self.entries[index][0].startswith(prefix):
+            _, kind, ref = self.entries[index]
+            if (kind, ref) not in matches:
+                matches[(kind, ref)] = 1 if kind == RECIPE else self.counts[(kind, ref)]
+            index += 1
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (item[0][0], -item[1], self.text(*item[0]).lower())
+        )
+        return [(kind, ref, count) for (kind, ref), count in ranked[:limit]]
+
+    def text(self, kind, ref):
+        return self.terms[ref][0] if kind == RECIPE else ref
+
+
+class SuggestService:
+    """Search box type-ahead and spelling correction served from memory, without SQL.
+
+    A PrefixIndex (suggestions) and a TrigramIndex (corrections) over the
+    recipe names, categories and ingredients are built when the app starts
+    (or on first use) and follow recipe writes of every worker through
+    CacheService listeners on the 'recipe' namespace: changed recipe ids are
+    queued and reloaded before the next lookup, so lookups only touch the
+    database right after a write.
+    """
+
+    EXTENSION_KEY = 'suggest'
+    DEFAULT_LIMIT = 8
+    MAX_LIMIT = 20
+
+    @staticmethod
+    def _state():
+        state = current_app.extensions.get(SuggestService.EXTENSION_KEY)
+        if state is None:
+            state = current_app.extensions.setdefault(SuggestService.EXTENSION_KEY, {
+                'lock': threading.Lock(),
+                'index': None,
+                'trigrams': None,
+                'pending': set(),
+                'rebuild': False,
+            })
+            CacheService.add_listener(
+                'recipe', lambda key: SuggestService._recipe_changed(state, key)
+            )
+        return state
+
+    @staticmethod
+    def _recipe_changed(state, key):
+        if key is None:
+            state['rebuild'] = True
+        else:
+            state['pending'].add(int(key))
+
+    @staticmethod
+    def _ingredient_names(recipe_ids=None):
+        """recipe_id -> normalized ingredient names, for some or all recipes"""
+        names = {}
+        if not IngredientService.has_ingredient_table():
+            return names
+        query = select(RecipeIngredient.recipe_id, RecipeIngredient.name)
+        if recipe_ids is not None:
+            query = query.where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        for recipe_id, name in db.session.execute(query):
+            names.setdefault(recipe_id, []).append(name)
+        return names
+
+    @staticmethod
+    def _build(state):
+        # Start following invalidations before reading, so no write is missed in between
+        CacheService.sync(force=True)
+        state['pending'].clear()
+        state['rebuild'] = False
+        index = PrefixIndex()
+        ingredients = SuggestService._ingredient_names()
+        index.load(
+            (recipe_id, name or '', category, ingredients.get(recipe_id, ()))
+            for recipe_id, name, category in db.session.execute(select(Recipe.id, Recipe.name, Recipe.category))
+        )
+        # The prefix index keeps each recipe's terms, the trigram vocabulary is counted from them
+        trigram_index = TrigramIndex()
+        trigram_index.load(index.terms.values())
+        state['index'] = index
+        state['trigrams'] = trigram_index
+
+    @staticmethod
+    def _apply_pending(state):
+        recipe_ids = set(state['pending'])
+        state['pending'].difference_update(recipe_ids)
+        ingredients = SuggestService._ingredient_names(recipe_ids)
+        rows = db.session.execute(
+            select(Recipe.id, Recipe.name, Recipe.category).where(Recipe.id.in_(recipe_ids))
+        ).all()
+        index, trigram_index = state['index'], state['trigrams']
+        for recipe_id in recipe_ids:
+            if recipe_id in index.terms:
+                trigram_index.remove(*index.terms[recipe_id])
+            index.remove(recipe_id)
+        for recipe_id, name, category in rows:
+            index.add(recipe_id, name or '', category, ingredients.get(recipe_id, ()))
+            trigram_index.add(*index.terms[recipe_id])
+
+    @staticmethod
+    def _read(lookup):
+        """lookup(state) on this process's indexes, built or brought up to date first.
+
+        Other request threads update the indexes in place, so lookup runs
+        under the same lock as the updates.
+        """
+        CacheService.sync()
+        state = SuggestService._state()
+        with state['lock']:
+            if state['index'] is None or state['rebuild']:
+                SuggestService._build(state)
+            elif state['pending']:
+                SuggestService._apply_pending(state)
+            return lookup(state)
+
+    @staticmethod
+    def index():
+        """This process's PrefixIndex, up to date (updated in place, read it through _read)"""
+        return SuggestService._read(lambda state: state['index'])
+
+    @staticmethod
+    def trigram_index():
+        """This process's TrigramIndex, up to date (updated in place, read it through _read)"""
+        return SuggestService._read(lambda state: state['trigrams'])
+
+    @staticmethod
+    def warm():
+        """Build the index now if the database already has recipes (called at app startup)."""
+        if db.engine.dialect.name != 'sqlite':
+            return
+        # Connecting would create the file (and fix its journal mode) before config overrides apply
+        database = db.engine.url.database
+        if database and database != ':memory:' and not os.path.exists(database):
+            return
+        has_recipes = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'")
+        ).first() is not None
+        if has_recipes:
+            SuggestService.index()
+        db.session.remove()
+
+    @staticmethod
+    def suggest(prefix, limit=None):
+        """Suggestions for a search box prefix as dicts with text, type and recipe_id or count"""
+        limit = min(max(1, limit or SuggestService.DEFAULT_LIMIT), SuggestService.MAX_LIMIT)
+
+        def lookup(state):
+            index = state['index']
+            suggestions = []
+            for kind, ref, count in index.suggest(prefix, limit):
+                suggestion = {'text': index.text(kind, ref), 'type': KIND_NAMES[kind]}
+                if kind == RECIPE:
+                    suggestion['recipe_id'] = ref
+                else:
+                    suggestion['count'] = count
+                suggestions.append(suggestion)
+            return suggestions
+
+        return SuggestService._read(lookup)
+
+    @staticmethod
+    def correct(query):
+        """query with misspelled words replaced by known terms ("spagetti" -> "spaghetti"), or None"""
+        return SuggestService._read(lambda state: state['trigrams'].correct(query))
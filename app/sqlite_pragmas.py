@@ -0,0 +1,54 @@
+"""
+Per-connection SQLite tuning applied by create_app
+
+Every setting can be overridden through app config (set to None to leave the
+SQLite default). Values are read when a connection is opened, so changing the
+config after create_app still applies to new connections.
+"""
+
+from sqlalchemy import event
+
+# app config key -> (pragma name, default value)
+SQLITE_PRAGMA_SETTINGS = {
+    # Readers keep reading while a write is in progress
+    'SQLITE_JOURNAL_MODE': ('journal_mode', 'WAL'),
+    # Safe with WAL (no corruption), only the last commits can be lost on power failure
+    'SQLITE_SYNCHRONOUS': ('synchronous', 'NORMAL'),
+    # Milliseconds to wait for a lock instead of failing with "database is locked"
+    'SQLITE_BUSY_TIMEOUT': ('busy_timeout', 5000),
+    # Negative values are KiB: 20MB page cache per connection
+    'SQLITE_CACHE_SIZE': ('cache_size', -20000),
+    # Bytes of the database file read through memory-mapped I/O
+    'SQLITE_MMAP_SIZE': ('mmap_size', 256 * 1024 * 1024),
+    # Temporary tables and sort spills stay in memory
+    'SQLITE_TEMP_STORE': ('temp_store', 'MEMORY'),
+}
+
+
+def set_default_config(app):
+    """Fill in any SQLite pragma setting the app config does not already have"""
+    for key, (_, default) in SQLITE_PRAGMA_SETTINGS.items():
+        app.config.setdefault(key, default)
+
+
+def pragma_statements(config):
+    """PRAGMA statements for the configured (non-None) settings"""
+    statements = []
+    for key, (pragma, _) in SQLITE_PRAGMA_SETTINGS.items():
+        value = config.get(key)
+        if value is not None:
+            statements.append(f"PRAGMA {pragma} = {value}")
+    return statements
+
+
+def configure_engine(app, engine):
+    """Apply the pragmas from app config to every new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in pragma_statements(app.config):
+            cursor.execute(statement)
+        cursor.close()
@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.cache import CacheService, MemoryCache, SQLiteCache
+from app.service.pagination import PaginationService
+from app.service.recipe import RecipeService
+from app.test.query_count import QueryCounter
+
+class TestCacheService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Two apps on one database file stand in for two worker processes
+        self.tmp = tempfile.TemporaryDirectory()
+        database_uri = f"sqlite:///{os.path.join(self.tmp.name, 'recipes.db')}"
+        self.app = create_app(database_uri=database_uri)
+        self.app.config['TESTING'] = True
+        self.other_app = create_app(database_uri=database_uri)
+        self.other_app.config['TESTING'] = True
+
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='testuser', email='test@example.com', name='Test User', password='testpassword')
+            db.session.add(user)
+            db.session.commit()
+            RecipeService.add_recipe(
+                name='Pancakes', ingredients='Flour', instructions='Mix', category='Breakfast', user_id=user.id
+            )
+            self.recipe_id = RecipeService.search_recipes('pancakes')[0].id
+
+    def tearDown(self):
+        """Run after each test"""
+        for app in (self.app, self.other_app):
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_sqlite_cache_shared_between_instances(self):
+        """Test Case No. 101 - Test SQLiteCache instances on one file see each other's writes and stay within max_bytes"""
+        path = os.path.join(self.tmp.name, 'cache.sqlite')
+        first = SQLiteCache(path, max_bytes=1000, ttl=60)
+        second = SQLiteCache(path, max_bytes=1000, ttl=60)
+
+        first.set('recipe:1', {'name': 'Pancakes'})
+        first.set('recipe:2', {'name': 'Waffles'})
+        first.set('search:1:soup', {'recipes': []})
+        self.assertEqual(second.get('recipe:1'), {'name': 'Pancakes'})
+        self.assertEqual(
+            second.get_many(['recipe:2', 'recipe:3', 'recipe:1']),
+            {'recipe:1': {'name': 'Pancakes'}, 'recipe:2': {'name': 'Waffles'}}
+        )
+
+        second.delete_prefix('recipe:')
+        self.assertIsNone(first.get('recipe:1'))
+        self.assertIsNone(first.get('recipe:2'))
+        self.assertEqual(first.get('search:1:soup'), {'recipes': []})
+
+        # Oldest entries are evicted once the shared total goes over max_bytes
+        for i in range(20):
+            second.set(f'recipe:{i}', {'name': 'x' * 90})
+        stats = first.stats()
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertIsNone(first.get('recipe:0'))
+        self.assertEqual(first.get('recipe:19'), {'name': 'x' * 90})
+        self.assertGreater(second.stats()['evictions'], 0)
+
+    def test_invalidation_broadcast_between_apps(self):
+        """Test Case No. 102 - Test a recipe update in one app drops the recipe from another app's memory cache"""
+        with self.other_app.app_context():
+            self.assertEqual(RecipeService.get_recipe_dict(self.recipe_id)[0]['name'], 'Pancakes')
+
+        with self.app.app_context():
+            RecipeService.update_recipe(self.recipe_id, name='Blueberry Pancakes', user_id=1)
+
+        with self.other_app.app_context():
+            # Still served from this app's cache until it next syncs
+            self.assertEqual(RecipeService.get_recipe_dict(self.recipe_id)[0]['name'], 'Pancakes')
+            CacheService.sync(force=True)
+            self.assertEqual(RecipeService.get_recipe_dict(self.recipe_id)[0]['name'], 'Blueberry Pancakes')
+            self.assertEqual(CacheService.stats()['namespaces']['recipe']['remote_invalidations'], 1)
+
+    def test_search_results_cached_per_catalog_version(self):
+        """Test Case No. 103 - Test repeated /search_results requests are served from cached matches and recipes until a recipe changes"""
+        client = self.app.test_client()
+        with self.app.app_context():
+            self.assertEqual(len(client.get('/search_results?q=pancakes').get_json()['recipes']), 1)
+
+            with QueryCounter(db.engine) as counter:
+                response = client.get('/search_results?q=%20PANCAKES%20')
+            self.assertEqual(len(response.get_json()['recipes']), 1)
+            self.assertEqual(counter.count, 1)  # the catalog version lookup only
+            self.assertNotIn('recipes_fts', ' '.join(counter.statements))
+
+            RecipeService.add_recipe(
+                name='Banana Pancakes', ingredients='Flour', instructions='Mix', category='Breakfast', user_id=1
+            )
+            self.assertEqual(len(client.get('/search_results?q=pancakes').get_json()['recipes']), 2)
+
+            body = client.get('/metrics').get_data(as_text=True)
+            self.assertIn('recipe_box_cache_hits_total{namespace="search"} 1', body)
+            self.assertIn('recipe_box_cache_misses_total{namespace="search"} 2', body)
+            self.assertIn('recipe_box_cache_hit_ratio{namespace="search"} 0.3333', body)
+
+    def test_search_pages_cut_from_cached_matches(self):
+        """Test Case No. 119 - Test search pages cut from the cached matches equal index pages, also past the cached rows"""
+        with self.app.app_context():
+            for n in range(6):
+                RecipeService.add_recipe(
+                    name=f'Pancakes {n}', ingredients='Flour', instructions='Mix', category='Breakfast', user_id=1
+                )
+
+            def all_pages(next_page, item_id=lambda recipe_id: recipe_id):
+                ids, cursor = [], None
+                while True:
+                    page = next_page(cursor)
+                    ids.extend(item_id(item) for item in page.items)
+                    if not page.next_cursor:
+                        return ids
+                    cursor = page.next_cursor
+
+            expected = all_pages(
+                lambda cursor: RecipeService.search_recipe_rows('pancakes', cursor=cursor, limit=2),
+                item_id=lambda row: row.id
+            )
+            self.assertEqual(len(expected), 7)
+
+            original_cap = PaginationService.TOTAL_COUNT_CAP
+            try:
+                for cap in (100, 3):
+                    PaginationService.TOTAL_COUNT_CAP = cap
+                    matches = RecipeService.search_matches('pancakes', catalog_version=f'cap{cap}')
+                    self.assertEqual(matches['complete'], cap > 7)
+                    self.assertEqual([row[-1] for row in matches['rows']], expected[:cap])
+                    self.assertEqual(all_pages(
+                        lambda cursor: RecipeService.search_page('pancakes', matches, cursor=cursor, limit=2)
+                    ), expected)
+
+                page = RecipeService.search_page('pancakes', matches, limit=2, include_total=True)
+                self.assertEqual((page.total, page.total_exact), (3, False))
+            finally:
+                PaginationService.TOTAL_COUNT_CAP = original_cap
+
+    def test_fill_racing_invalidation_is_dropped(self):
+        """Test Case No. 135 - Test a cache fill loaded before an invalidation is not stored, on both backends and through the recipe cache"""
+        backends = [
+            MemoryCache(max_bytes=1000, ttl=60),
+            SQLiteCache(os.path.join(self.tmp.name, 'cache.sqlite'), max_bytes=1000, ttl=60),
+        ]
+        for backend in backends:
+            loaded_at = backend.now()
+            backend.delete('recipe:1')
+            self.assertFalse(backend.set('recipe:1', {'name': 'Pancakes'}, loaded_at=loaded_at))
+            self.assertIsNone(backend.get('recipe:1'))
+
+            loaded_at = backend.now()
+            backend.delete_prefix('recipe:')
+            self.assertFalse(backend.set('recipe:2', {'name': 'Waffles'}, loaded_at=loaded_at))
+            self.assertNotEqual(backend.set('search:1', {'recipes': []}, loaded_at=loaded_at), False)
+
+            # Fills started after the delete are stored
+            loaded_at = backend.now()
+            self.assertNotEqual(backend.set('recipe:1', {'name': 'Pancakes'}, loaded_at=loaded_at), False)
+            self.assertEqual(backend.get('recipe:1'), {'name': 'Pancakes'})
+
+        with self.app.app_context():
+            # The recipe is rewritten and invalidated right after the reader loaded its old row
+            load = RecipeService.get_recipe_summaries
+
+            def load_then_write(recipe_ids, columns):
+                rows = load(recipe_ids, columns=columns)
+                with patch.object(RecipeService, 'get_recipe_summaries', load):
+                    RecipeService.update_recipe(self.recipe_id, name='Blueberry Pancakes', user_id=1)
+                return rows
+
+            with patch.object(RecipeService, 'get_recipe_summaries', load_then_write):
+                self.assertEqual(RecipeService.get_recipe_dict(self.recipe_id)[0]['name'], 'Pancakes')
+            self.assertEqual(RecipeService.get_recipe_dict(self.recipe_id)[0]['name'], 'Blueberry Pancakes')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.facets import REBUILD_RECIPE_FACET_COUNTS, RecipeFacetCount
+from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.facets import FacetService
+from app.service.recipe import RecipeService
+from app.test.query_count import QueryCounter
+
+class TestFacetService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        self.add('Pancakes', 'Breakfast', total_time=20, servings=4)
+        self.add('Omelette', 'Breakfast', total_time=10, servings=1)
+        self.soup = self.add('Tomato Soup', 'Soup', total_time=45, servings=6)
+        self.add('Chicken Soup', 'Soup', total_time=90, servings=None)
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, category, total_time, servings):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients='Water', instructions='Cook', category=category,
+            user_id=self.test_user.id, total_time=total_time, servings=servings
+        )
+        return recipe.id
+
+    def counts_table(self):
+        return sorted(
+            (row.category, row.total_time, row.servings, row.count)
+            for row in RecipeFacetCount.query.filter(RecipeFacetCount.count > 0)
+        )
+
+    def test_triggers_keep_facet_counts(self):
+        """Test Case No. 116 - Test recipe writes move recipes between facet count rows like a full recount would"""
+        self.assertEqual(FacetService.catalog_facets(), {
+            'category': {'Breakfast': 2, 'Soup': 2},
+            'total_time': {'0-15': 1, '15-30': 1, '30-60': 1, '60+': 1},
+            'servings': {'1-2': 1, '3-4': 1, '5-6': 1, 'unknown': 1},
+        })
+        self.assertEqual(FacetService.catalog_facets('soup')['servings'], {'5-6': 1, 'unknown': 1})
+
+        RecipeService.update_recipe(self.soup, category='Dinner', total_time=15, user_id=self.test_user.id)
+        db.session.delete(Recipe.query.filter_by(name='Omelette').one())
+        db.session.commit()
+        maintained = self.counts_table()
+
+        for statement in REBUILD_RECIPE_FACET_COUNTS:
+            db.session.execute(db.text(statement))
+        db.session.commit()
+        self.assertEqual(self.counts_table(), maintained)
+        self.assertEqual(FacetService.catalog_facets()['category'], {'Breakfast': 1, 'Dinner': 1, 'Soup': 1})
+        self.assertEqual(FacetService.catalog_facets()['total_time'], {'15-30': 2, '60+': 1})
+        # Databases without the counts table get the same answer from one grouped query
+        self.assertEqual(FacetService.summarize(FacetService.grouped_counts_query()), FacetService.catalog_facets())
+
+    def test_browse_facets_served_from_cache(self):
+        """Test Case No. 117 - Test /browse_recipes_list?facets=1 returns facet counts without scanning recipes"""
+        data = self.client.get('/browse_recipes_list?category=Breakfast&facets=1&limit=1').get_json()
+        self.assertEqual(data['facets'], {
+            'category': {'Breakfast': 2, 'Soup': 2},
+            'total_time': {'0-15': 1, '15-30': 1},
+            'servings': {'1-2': 1, '3-4': 1},
+        })
+        self.assertNotIn('facets', self.client.get('/browse_recipes_list').get_json())
+        next_page = self.client.get(f"/browse_recipes_list?facets=1&cursor={data['next_cursor']}").get_json()
+        self.assertNotIn('facets', next_page)
+
+        # The count rows are cached per catalog version until a recipe changes
+        CacheService.sync()
+        with QueryCounter(db.engine) as counter:
+            FacetService.catalog_facets(catalog_version=1)
+            FacetService.catalog_facets('Soup', catalog_version=1)
+        self.assertEqual(counter.count, 1)
+        self.assertEqual(self.client.get('/browse_recipes_list?facets=1').get_json()['facets']['category']['Soup'], 2)
+
+    def test_search_facets_count_matches(self):
+        """Test Case No. 118 - Test /search_results?facets=1 counts only the recipes matching the query"""
+        data = self.client.get('/search_results?q=soup&facets=1').get_json()
+        self.assertEqual(len(data['recipes']), 2)
+        self.assertEqual(data['facets'], {
+            'category': {'Soup': 2},
+            'total_time': {'30-60': 1, '60+': 1},
+            'servings': {'5-6': 1, 'unknown': 1},
+        })
+        self.assertNotIn('facets', self.client.get('/search_results?q=soup').get_json())
+        self.assertEqual(FacetService.search_facets('nothing like this')['category'], {})
+
+if __name__ == '__main__':
+    unittest.main()
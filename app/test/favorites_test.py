@@ -1,5 +1,7 @@
 # test_favorite_service.py
 import unittest
+from array import array
+from unittest.mock import patch
 import sys
 import os
 
@@ -12,8 +14,12 @@ from app.service.recipe import RecipeService
 from app.model.users import User
 from app.model.recipes import Recipe
 from app.model.favorites import Favorite
+from app.service.cache import CacheService
+from app.service.favorites import FavoriteSetCache
+from query_count import QueryCountMixin
+from sqlalchemy.exc import IntegrityError
 
-class TestFavoriteService(unittest.TestCase):
+class TestFavoriteService(QueryCountMixin, unittest.TestCase):
     def setUp(self):
         """Run before each test"""
         # Use in-memory database for tests
@@ -306,5 +312,181 @@ class TestFavoriteService(unittest.TestCase):
         favorites_after = FavoriteService.get_user_favorites(user_id)
         self.assertEqual(len(favorites_after), 0)
 
+    def test_get_user_favorite_recipes_hydrated(self):
+        """Test Case No. 76 - get_user_favorite_recipes returns recipe summaries with owners, oldest favorite first"""
+        FavoriteService.add_favorite(self.recipe3.id, self.user1.id)
+        FavoriteService.add_favorite(self.recipe2.id, self.user1.id)
+
+        page = FavoriteService.get_user_favorite_recipes(self.user1.id)
+
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual([r['recipe_id'] for r in page.items], [self.recipe3.id, self.recipe2.id])
+        self.assertEqual(page.items[0]['name'], 'Test Recipe 3')
+        self.assertEqual(page.items[0]['owner'], 'testuser1')
+        self.assertEqual(page.items[1]['owner'], 'testuser2')
+        self.assertEqual(page.items[1]['category'], 'Lunch')
+
+    def test_get_user_favorite_recipes_fields_and_cursor(self):
+        """Test Case No. 77 - get_user_favorite_recipes honours fields and pages with a cursor"""
+        for recipe in (self.recipe1, self.recipe2, self.recipe3):
+            FavoriteService.add_favorite(recipe.id, self.user2.id)
+
+        first = FavoriteService.get_user_favorite_recipes(
+            self.user2.id, fields=['recipe_id', 'favorited_at'], limit=2
+        )
+        self.assertEqual(len(first.items), 2)
+        self.assertEqual(set(first.items[0]), {'recipe_id', 'favorited_at'})
+        self.assertIsNotNone(first.next_cursor)
+
+        second = FavoriteService.get_user_favorite_recipes(
+            self.user2.id, fields=['recipe_id', 'favorited_at'], cursor=first.next_cursor, limit=2
+        )
+        self.assertEqual([r['recipe_id'] for r in second.items], [self.recipe3.id])
+        self.assertIsNone(second.next_cursor)
+
+    def test_favorite_pages_over_raw_sql_rows(self):
+        """Test Case No. 134 - get_user_favorite_recipes pages through favorites written by raw SQL in the same second"""
+        user_id = self.user2.id
+        recipe_ids = []
+        for n in range(6):
+            recipe = Recipe(name=f'Raw {n}', ingredients='x', instructions='y', category='Dinner', user_id=user_id)
+            db.session.add(recipe)
+            db.session.flush()
+            recipe_ids.append(recipe.id)
+            # Seed data and bulk loads store created_at without fractional seconds
+            db.session.execute(db.text(
+                "INSERT INTO favorites (user_id, recipe_id, created_at) VALUES (:user_id, :recipe_id, '2024-01-01 12:00:00')"
+            ), {'user_id': user_id, 'recipe_id': recipe.id})
+        db.session.commit()
+
+        paged, cursor = [], None
+        while True:
+            page = FavoriteService.get_user_favorite_recipes(user_id, fields=['recipe_id'], cursor=cursor, limit=2)
+            paged.extend(item['recipe_id'] for item in page.items)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(paged, recipe_ids)
+
+    def test_get_user_favorite_recipes_unknown_field(self):
+        """Test Case No. 78 - get_user_favorite_recipes rejects unknown fields"""
+        with self.assertRaises(ValueError):
+            FavoriteService.get_user_favorite_recipes(self.user1.id, fields=['password'])
+
+    def test_favorites_unique_per_user_and_recipe(self):
+        """Test Case No. 86 - the database rejects a second favorites row for the same user and recipe"""
+        db.session.add(Favorite(user_id=self.user1.id, recipe_id=self.recipe1.id))
+        db.session.commit()
+
+        db.session.add(Favorite(user_id=self.user1.id, recipe_id=self.recipe1.id))
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_add_favorite_single_statement(self):
+        """Test Case No. 87 - add_favorite writes with one INSERT and does not read first"""
+        recipe_id, user_id = self.recipe2.id, self.user1.id
+
+        # The favorites write plus the invalidation other workers follow, in one transaction
+        with self.assertMaxQueries(3) as queries:
+            FavoriteService.add_favorite(recipe_id, user_id)
+        self.assertIn('ON CONFLICT', queries.statements[0])
+        self.assertIn('DO NOTHING', queries.statements[0])
+        self.assertEqual([statement for statement in queries.statements if 'favorites' in statement], queries.statements[:1])
+
+        with self.assertMaxQueries(2) as queries:
+            self.assertTrue(FavoriteService.remove_favorite(recipe_id, user_id))
+        self.assertTrue(queries.statements[0].startswith('DELETE FROM favorites'))
+
+    def test_bulk_favorites_single_statement(self):
+        """Test Case No. 121 - bulk_add, bulk_remove and are_favorites each need one favorites statement for a whole batch"""
+        FavoriteService.add_favorite(self.recipe1.id, self.user1.id)
+        user1, user2 = self.user1.id, self.user2.id
+        recipe1, recipe2, recipe3 = self.recipe1.id, self.recipe2.id, self.recipe3.id
+        batch = [recipe1, recipe2, recipe3, 9999, recipe2]
+
+        with self.assertMaxQueries(2) as queries:
+            added = FavoriteService.bulk_add(user1, batch)
+        self.assertIn('ON CONFLICT', queries.statements[0])
+        self.assertIn('cache_invalidations', queries.statements[1])
+        # Already favorited and missing recipes are skipped
+        self.assertEqual(added, {recipe2, recipe3})
+        self.assertEqual(Favorite.query.filter_by(user_id=user1).count(), 3)
+
+        CacheService.sync()
+        with self.assertMaxQueries(1):
+            self.assertEqual(FavoriteService.are_favorites(user1, batch),
+                             {recipe1, recipe2, recipe3})
+        self.assertEqual(FavoriteService.are_favorites(user2, batch), set())
+
+        with self.assertMaxQueries(2):
+            removed = FavoriteService.bulk_remove(user1, [recipe1, recipe3, 9999])
+        self.assertEqual(removed, {recipe1, recipe3})
+        self.assertEqual(FavoriteService.are_favorites(user1, batch), {recipe2})
+
+        with self.assertMaxQueries(0):
+            self.assertEqual(FavoriteService.bulk_add(user1, []), set())
+        with self.assertRaises(ValueError):
+            FavoriteService.are_favorites(user1, range(FavoriteService.MAX_BATCH_IDS + 1))
+
+    def test_favorite_set_cache(self):
+        """Test Case No. 123 - favorite checks are answered from a per-user cached set that writes drop after committing"""
+        user1, user2 = self.user1.id, self.user2.id
+        recipe1, recipe2, recipe3 = self.recipe1.id, self.recipe2.id, self.recipe3.id
+        FavoriteService.bulk_add(user1, [recipe3, recipe1])
+        CacheService.sync()
+
+        with self.assertMaxQueries(1):
+            self.assertTrue(FavoriteService.is_favorite(recipe1, user1))
+        self.assertEqual(list(FavoriteService.favorite_ids(user1)), [recipe1, recipe3])
+
+        # Writes in this process drop the set, the next check reloads it once
+        snapshot = FavoriteService.favorite_ids(user1)
+        FavoriteService.add_favorite(recipe2, user1)
+        FavoriteService.remove_favorite(recipe3, user1)
+        # Readers still holding the previous array never see it change
+        self.assertEqual(list(snapshot), [recipe1, recipe3])
+        with self.assertMaxQueries(1):
+            self.assertTrue(FavoriteService.is_favorite(recipe2, user1))
+            self.assertFalse(FavoriteService.is_favorite(str(recipe3), user1))
+            self.assertEqual(FavoriteService.are_favorites(user1, [recipe1, recipe2, recipe3]), {recipe1, recipe2})
+
+        # Another worker's write arrives as an invalidation of the user's set
+        CacheService.invalidate(FavoriteService.CACHE_NAMESPACE, user1)
+        with self.assertMaxQueries(1):
+            self.assertEqual(list(FavoriteService.favorite_ids(user1)), [recipe1, recipe2])
+
+        # Least recently used users go first once the byte limit is reached
+        cache = FavoriteSetCache(max_bytes=2 * FavoriteSetCache.ENTRY_OVERHEAD + 12)
+        cache.put(user1, array('I', [recipe1, recipe2]))
+        cache.put(user2, array('I'))
+        cache.get(user1)
+        cache.put(3, array('I'))
+        self.assertEqual(list(cache.sets), [user1, 3])
+        cache.discard(user1)
+        self.assertIsNone(cache.get(user1))
+        self.assertEqual(cache.bytes, FavoriteSetCache.ENTRY_OVERHEAD)
+
+    def test_set_loaded_before_commit_is_dropped(self):
+        """Test Case No. 137 - a favorite set another request loaded while a write was uncommitted is not kept"""
+        user1, recipe1, recipe2 = self.user1.id, self.recipe1.id, self.recipe2.id
+        FavoriteService.add_favorite(recipe1, user1)
+        state = FavoriteService._state()
+        invalidate = CacheService.invalidate
+
+        def invalidate_then_reload(namespace, key=None):
+            invalidate(namespace, key)
+            # Another thread checks the user's favorites before the write commits
+            with state['lock']:
+                state['sets'].put(user1, array('I', [recipe1]))
+
+        with patch.object(CacheService, 'invalidate', invalidate_then_reload):
+            FavoriteService.add_favorite(recipe2, user1)
+        self.assertEqual(FavoriteService.are_favorites(user1, [recipe1, recipe2]), {recipe1, recipe2})
+
+        with patch.object(CacheService, 'invalidate', invalidate_then_reload):
+            FavoriteService.remove_favorite(recipe1, user1)
+        self.assertFalse(FavoriteService.is_favorite(recipe1, user1))
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
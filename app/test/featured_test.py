@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.service.featured import FeaturedRecipeService
+from app.service.recipe import RecipeService
+from app.model.featured import FeaturedRecipe
+from app.model.users import User
+
+class TestFeaturedRecipeService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        for i in range(20):
+            RecipeService.add_recipe(
+                name=f'Recipe {i}',
+                ingredients='Ingredients',
+                instructions='Instructions',
+                category='Dinner',
+                user_id=self.test_user.id
+            )
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_recipe_of_the_day_is_shared_and_persisted(self):
+        """Test Case No. 83 - Every worker serves the same persisted recipe for a day"""
+        now = datetime(2025, 3, 14, 9, 30)
+        first = FeaturedRecipeService.get_recipe_of_the_day(now=now)
+        self.assertIsNotNone(first)
+
+        # A second worker starts with an empty cache and no stored pick
+        FeaturedRecipeService.invalidate()
+        FeaturedRecipe.query.delete()
+        db.session.commit()
+        second = FeaturedRecipeService.get_recipe_of_the_day(now=now)
+        self.assertEqual(second['recipe_id'], first['recipe_id'])
+
+        stored = db.session.get(FeaturedRecipe, now.date())
+        self.assertEqual(stored.recipe_id, first['recipe_id'])
+
+    def test_recipe_of_the_day_cache_expires_at_midnight(self):
+        """Test Case No. 84 - The cached pick is reused until midnight, then a new day is picked"""
+        FeaturedRecipeService.get_recipe_of_the_day(now=datetime(2025, 3, 14, 9, 30))
+        self.assertEqual(FeaturedRecipe.query.count(), 1)
+
+        FeaturedRecipeService.get_recipe_of_the_day(now=datetime(2025, 3, 14, 23, 59))
+        self.assertEqual(FeaturedRecipe.query.count(), 1)
+
+        FeaturedRecipeService.get_recipe_of_the_day(now=datetime(2025, 3, 15, 0, 0))
+        self.assertEqual(FeaturedRecipe.query.count(), 2)
+
+    def test_recipe_of_the_day_refreshes_after_update(self):
+        """Test Case No. 85 - Editing the featured recipe refreshes the cached copy"""
+        now = datetime(2025, 3, 14, 9, 30)
+        featured = FeaturedRecipeService.get_recipe_of_the_day(now=now)
+
+        RecipeService.update_recipe(
+            featured['recipe_id'],
+            name='Renamed Feature',
+            user_id=self.test_user.id
+        )
+
+        refreshed = FeaturedRecipeService.get_recipe_of_the_day(now=now)
+        self.assertEqual(refreshed['recipe_id'], featured['recipe_id'])
+        self.assertEqual(refreshed['name'], 'Renamed Feature')
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.ingredients import parse_ingredients, parse_line
+from app.model.users import User
+from app.service.ingredients import IngredientService
+from app.service.recipe import RecipeService
+
+class TestIngredientService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_parse_ingredient_lines(self):
+        """Test Case No. 105 - Test ingredient lines are split into quantity, unit and a normalized name"""
+        cases = {
+            '1 1/2 cups all-purpose Flour': (1.5, 'cup', 'all-purpose flour'),
+            '1/2 onion, diced': (0.5, None, 'onion'),
+            '3 ripe bananas, mashed': (3.0, None, 'banana'),
+            '2-3 cloves garlic, minced': (2.0, 'clove', 'garlic'),
+            '½ tsp cinnamon': (0.5, 'tsp', 'cinnamon'),
+            '1 tbsp. olive oil': (1.0, 'tbsp', 'olive oil'),
+            '1/4 cup applesauce (egg replacement)': (0.25, 'cup', 'applesauce'),
+            '- 2 Tomatoes': (2.0, None, 'tomato'),
+            'Salt and pepper to taste': (None, None, 'salt and pepper'),
+        }
+        for line, expected in cases.items():
+            parsed = parse_line(line)
+            self.assertEqual((parsed.quantity, parsed.unit, parsed.name), expected, line)
+            self.assertEqual(parsed.line, line)
+
+        parsed = parse_ingredients('1 cup milk\n\n   \n2 eggs, beaten\n')
+        self.assertEqual([(p.position, p.name) for p in parsed], [(0, 'milk'), (1, 'egg')])
+        self.assertEqual(parse_ingredients(None), [])
+
+    def test_recipe_writes_keep_ingredients_in_sync(self):
+        """Test Case No. 106 - Test add_recipe, update_recipe and duplicates store parsed ingredients that find_recipe_ids can seek"""
+        soup, _ = RecipeService.add_recipe(
+            name='Tomato Soup', ingredients='4 tomatoes, chopped\n1 cup broth\n2 cloves garlic',
+            instructions='Simmer', category='Soup', user_id=self.test_user.id
+        )
+        salad, _ = RecipeService.add_recipe(
+            name='Garden Salad', ingredients='1 head lettuce\n1 Tomato, sliced',
+            instructions='Toss', category='Salads', user_id=self.test_user.id
+        )
+
+        self.assertEqual(IngredientService.find_recipe_ids('tomatoes'), [soup.id, salad.id])
+        self.assertEqual(IngredientService.find_recipe_ids('Garlic'), [soup.id])
+        self.assertEqual(IngredientService.find_recipe_ids('saffron'), [])
+        self.assertEqual(IngredientService.find_recipe_ids(''), [])
+        self.assertEqual(
+            IngredientService.get_recipe_ingredients(soup.id)[0],
+            {'quantity': 4.0, 'unit': None, 'name': 'tomato', 'line': '4 tomatoes, chopped'}
+        )
+
+        RecipeService.update_recipe(soup.id, ingredients='2 cups pumpkin\n1 cup broth', user_id=self.test_user.id)
+        self.assertEqual(IngredientService.find_recipe_ids('tomato'), [salad.id])
+        self.assertEqual(IngredientService.find_recipe_ids('pumpkin'), [soup.id])
+        self.assertEqual(len(IngredientService.get_recipe_ingredients(soup.id)), 2)
+
+        copy, _ = RecipeService.update_recipe_as_duplicate(
+            _id=salad.id, _name='Garden Salad Copy', user_id=self.test_user.id
+        )
+        self.assertEqual(IngredientService.find_recipe_ids('lettuce'), [salad.id, copy.id])
+
+    def test_owner_edit_route_replaces_ingredients(self):
+        """Test Case No. 107 - Test the owner edit in /update_recipe re-parses the changed ingredients"""
+        recipe, _ = RecipeService.add_recipe(
+            name='Pancakes', ingredients='1 cup flour\n2 eggs',
+            instructions='Mix', category='Breakfast', user_id=self.test_user.id
+        )
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['logged_in'] = True
+            session['user_id'] = self.test_user.id
+
+        response = client.post(f'/update_recipe/{recipe.id}', data={
+            'name': 'Pancakes', 'ingredients': '1 cup oat flour\n1 banana', 'instructions': 'Mix',
+            'category': 'Breakfast',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in IngredientService.get_recipe_ingredients(recipe.id)],
+            ['oat flour', 'banana']
+        )
+        self.assertEqual(IngredientService.find_recipe_ids('egg'), [])
+
+if __name__ == '__main__':
+    unittest.main()
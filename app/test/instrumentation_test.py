@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.recipe import RecipeService
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        for i in range(5):
+            RecipeService.add_recipe(
+                name=f'Recipe {i}',
+                ingredients='Ingredients',
+                instructions='Instructions',
+                category='Dinner',
+                user_id=self.test_user.id
+            )
+        # Count request queries after the cache's one-time read of the invalidation version stamp
+        CacheService.sync()
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_server_timing_header(self):
+        """Test Case No. 91 - Responses carry the query count and SQL/wall time as Server-Timing"""
+        response = self.client.get('/get_recipe/1')
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[0-9.]+;desc="1 queries", app;dur=[0-9.]+$')
+
+        self.app.config['SERVER_TIMING'] = False
+        response = self.client.get('/get_recipe/1')
+        self.assertNotIn('Server-Timing', response.headers)
+
+    def test_slow_request_log(self):
+        """Test Case No. 92 - Requests over SLOW_REQUEST_MS are logged with their slowest statement"""
+        with self.assertNoLogs(self.app.logger, level='WARNING'):
+            self.client.get('/browse_recipes_list?category=Dinner')
+
+        self.app.config['SLOW_REQUEST_MS'] = 0
+        with self.assertLogs(self.app.logger, level='WARNING') as logs:
+            self.client.get('/get_recipe/1')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Slow request GET /get_recipe/1', logs.output[0])
+        self.assertIn('1 queries', logs.output[0])
+        self.assertIn('slowest', logs.output[0])
+        self.assertIn('SELECT recipes.id', logs.output[0])
+
+    def test_metrics_endpoint(self):
+        """Test Case No. 93 - /metrics reports per-endpoint totals in the Prometheus text format"""
+        self.client.get('/get_recipe/1')
+        self.client.get('/get_recipe/2')
+        self.client.get('/browse_recipes_list?category=Dinner')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE recipe_box_requests_total counter', body)
+        self.assertIn('recipe_box_requests_total{endpoint="get_recipe"} 2', body)
+        self.assertIn('recipe_box_sql_queries_total{endpoint="get_recipe"} 2', body)
+        self.assertIn('recipe_box_requests_total{endpoint="browse_recipes_list"} 1', body)
+        self.assertIn('recipe_box_request_duration_seconds_bucket{endpoint="browse_recipes_list",le="+Inf"} 1', body)
+
+        # Work outside a request is not counted
+        RecipeService.get_recipe_details(1)
+        body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('recipe_box_sql_queries_total{endpoint="get_recipe"} 2', body)
+
+if __name__ == '__main__':
+    unittest.main()
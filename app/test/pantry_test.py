@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.pantry import PantryIndex, PantryService
+from app.service.recipe import RecipeService
+from app.test.query_count import QueryCounter
+
+class TestPantryService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        self.pancakes = self.add('Pancakes', '1 cup all-purpose flour\n2 eggs\n1 cup milk', 'Breakfast')
+        self.omelette = self.add('Omelette', '3 eggs\n1/4 cup milk\n1/2 cup cheddar cheese', 'Breakfast')
+        self.soup = self.add('Tomato Soup', '4 tomatoes\n1 onion\n2 cups vegetable broth\n1 tsp salt', 'Soup')
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, ingredients, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients=ingredients, instructions='Cook', category=category, user_id=self.test_user.id
+        )
+        return recipe.id
+
+    def test_pantry_index_ranking(self):
+        """Test Case No. 108 - Test PantryIndex ranks by fewest missing ingredients and updates posting lists in place"""
+        rows = [(1, 'egg'), (2, 'egg'), (3, 'flour'), (1, 'milk'), (2, 'milk'), (1, 'oat flour'), (3, 'sugar')]
+        index = PantryIndex()
+        index.load(rows)
+        self.assertEqual(list(index.postings['egg']), [1, 2])
+        self.assertEqual(index.matching_names('flour'), ['flour', 'oat flour'])
+
+        # Recipe 2 (egg, milk) is complete, recipe 1 lacks oat flour, recipe 3 lacks flour and sugar
+        self.assertEqual(index.rank(['egg', 'milk'], limit=10), [(2, 2, 0), (1, 2, 1)])
+        self.assertEqual(index.rank(['egg', 'milk', 'flour'], limit=2), [(1, 3, 0), (2, 2, 0)])
+        self.assertEqual(index.rank(['sugar'], limit=10, max_missing=0), [])
+        self.assertEqual(index.rank(['saffron'], limit=10), [])
+
+        index.remove(2)
+        index.add(2, ['sugar', 'sugar'])
+        self.assertEqual(list(index.postings['egg']), [1])
+        self.assertEqual(index.names[2], ['sugar'])
+        self.assertEqual(sorted(index.names[1]), ['egg', 'milk', 'oat flour'])
+        self.assertEqual(index.rank(['sugar'], limit=10), [(2, 1, 0), (3, 1, 1)])
+        self.assertEqual(len(index), 3)
+
+        # Bitmaps evicted from a tiny LRU are rebuilt from the posting lists
+        small = PantryIndex(max_bitmap_bytes=1)
+        small.load(rows)
+        self.assertEqual(small.rank(['egg', 'milk', 'flour'], limit=10), [(1, 3, 0), (2, 2, 0), (3, 1, 1)])
+        self.assertEqual(len(small.bitmaps), 1)
+
+    def test_pantry_search_endpoint(self):
+        """Test Case No. 109 - Test /pantry_search returns recipes by coverage with the ingredients still missing"""
+        response = self.client.get('/pantry_search?items=Eggs,milk&item=flour')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['items'], ['flour', 'egg', 'milk'])
+        self.assertEqual([r['recipe_id'] for r in data['recipes']], [self.pancakes, self.omelette])
+        self.assertEqual((data['recipes'][0]['matched'], data['recipes'][0]['missing']), (3, 0))
+        self.assertEqual(data['recipes'][1]['missing_ingredients'], ['1/2 cup cheddar cheese'])
+        self.assertEqual(data['recipes'][1]['owner'], 'testuser')
+
+        data = self.client.get('/pantry_search?items=eggs&max_missing=1').get_json()
+        self.assertEqual(data['recipes'], [])
+
+        self.assertEqual(self.client.get('/pantry_search?items=,').status_code, 400)
+
+    def test_index_follows_recipe_writes(self):
+        """Test Case No. 110 - Test the pantry index reloads only recipes written since the last search"""
+        PantryService.find_recipes(['egg'])
+
+        RecipeService.update_recipe(self.soup, ingredients='2 eggs\n1 cup milk', user_id=self.test_user.id)
+        new_id = self.add('Scrambled Eggs', '2 eggs', 'Breakfast')
+        with QueryCounter(db.engine) as counter:
+            _, ranked = PantryService.find_recipes(['eggs', 'milk'])
+        # One read of the new invalidations, one read of the two changed recipes' ingredients
+        self.assertEqual(counter.count, 2)
+        self.assertEqual([recipe_id for recipe_id, _, _ in ranked], [self.soup, new_id, self.pancakes, self.omelette])
+        self.assertEqual(PantryService.find_recipes(['tomato'])[1], [])
+
+if __name__ == '__main__':
+    unittest.main()
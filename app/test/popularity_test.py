@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.catalog import CatalogVersion
+from app.model.popularity import FAVORITE_COUNT_INDEX
+from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.favorites import FavoriteService
+from app.service.popularity import PopularityService
+from app.service.recipe import RecipeService
+from app.test.query_count import QueryCounter
+
+class TestPopularityService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.users = []
+        for n in range(3):
+            user = User(username=f'user{n}', email=f'user{n}@example.com', name=f'User {n}', password='testpassword')
+            db.session.add(user)
+            self.users.append(user)
+        db.session.commit()
+        self.users = [user.id for user in self.users]
+
+        self.pancakes = self.add('Pancakes', 'Breakfast')
+        self.waffles = self.add('Waffles', 'Breakfast')
+        self.omelette = self.add('Omelette', 'Breakfast')
+        self.brownies = self.add('Brownies', 'Dessert')
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients='Flour', instructions='Cook', category=category, user_id=self.users[0]
+        )
+        return recipe.id
+
+    def favorite_counts(self):
+        return dict(db.session.execute(db.select(Recipe.id, Recipe.favorite_count)).all())
+
+    def test_triggers_keep_favorite_counts(self):
+        """Test Case No. 124 - Test favorite writes move recipes.favorite_count without bumping the catalog version"""
+        version = db.session.get(CatalogVersion, 1).version
+        for user_id in self.users:
+            FavoriteService.add_favorite(self.waffles, user_id)
+        FavoriteService.bulk_add(self.users[0], [self.pancakes, self.brownies, self.waffles])
+        FavoriteService.bulk_add(self.users[1], [self.pancakes])
+        FavoriteService.remove_favorite(self.waffles, self.users[2])
+
+        self.assertEqual(self.favorite_counts(), {
+            self.pancakes: 2, self.waffles: 2, self.omelette: 0, self.brownies: 1
+        })
+        db.session.expire_all()
+        self.assertEqual(db.session.get(CatalogVersion, 1).version, version)
+
+        # Counts written around the triggers are repaired by the reconciliation
+        db.session.execute(db.text("UPDATE recipes SET favorite_count = 7 WHERE id = :id"), {'id': self.omelette})
+        db.session.commit()
+        self.assertEqual(PopularityService.reconcile(), 1)
+        self.assertEqual(self.favorite_counts()[self.omelette], 0)
+        self.assertEqual(PopularityService.reconcile(), 0)
+
+    def test_top_recipes_read_from_index(self):
+        """Test Case No. 125 - Test PopularityService.top_recipes reads each category's leaderboard from the index in one query"""
+        FavoriteService.bulk_add(self.users[0], [self.pancakes, self.waffles, self.brownies])
+        FavoriteService.bulk_add(self.users[1], [self.waffles])
+
+        with QueryCounter(db.engine) as counter:
+            leaderboards = PopularityService.top_recipes()
+        self.assertEqual(counter.count, 1)
+        self.assertEqual(list(leaderboards), ['Breakfast', 'Dessert'])
+        self.assertEqual(
+            [(r['recipe_id'], r['favorite_count']) for r in leaderboards['Breakfast']],
+            [(self.waffles, 2), (self.pancakes, 1)]
+        )
+        self.assertEqual(leaderboards['Dessert'][0]['owner'], 'user0')
+        self.assertEqual([r['recipe_id'] for r in PopularityService.top_recipes('breakfast', limit=1)], [self.waffles])
+        self.assertEqual(PopularityService.top_recipes('Soup'), [])
+        self.assertEqual(PopularityService.top_recipes('Pastries'), [])
+
+        # A backwards range read of (category, favorite_count), no sort and no scan of favorites
+        statement = PopularityService._top_query('Breakfast', 10).compile(compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {statement}")))
+        self.assertIn(FAVORITE_COUNT_INDEX, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotIn('favorites', plan)
+
+    def test_popular_endpoint(self):
+        """Test Case No. 126 - Test GET /popular lists the most favorited recipes overall and per category"""
+        FavoriteService.bulk_add(self.users[0], [self.omelette, self.brownies])
+
+        data = self.client.get('/popular').get_json()
+        self.assertEqual(list(data['categories']), ['Breakfast', 'Dessert'])
+        self.assertEqual(data['categories']['Breakfast'][0]['name'], 'Omelette')
+
+        data = self.client.get('/popular?category=dessert&limit=5').get_json()
+        self.assertEqual(data['category'], 'Dessert')
+        self.assertEqual([(r['name'], r['favorite_count']) for r in data['recipes']], [('Brownies', 1)])
+        self.assertIn('Dessert', self.client.get('/popular?category=all').get_json()['categories'])
+
+if __name__ == '__main__':
+    unittest.main()
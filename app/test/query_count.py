@@ -0,0 +1,44 @@
+"""
+Test helper for asserting how many SQL statements a block of code issues
+"""
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """Records every SQL statement sent to an engine while it is active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class QueryCountMixin:
+    """Adds assertMaxQueries to a unittest.TestCase that has an app context pushed"""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries):
+        with QueryCounter(db.engine) as counter:
+            yield counter
+        self.assertLessEqual(
+            counter.count, max_queries,
+            f"Expected at most {max_queries} SQL statements, got {counter.count}:\n"
+            + "\n".join(counter.statements)
+        )
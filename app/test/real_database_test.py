@@ -9,8 +9,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
 from app import create_app, db
 from app.model.recipes import Recipe
+from app.model.popularity import DROP_FAVORITE_COUNT_TRIGGERS
 from app.model.users import User
-from table_creation import create_tables
+from table_creation import create_tables, generate_synthetic_data, rebuild_search_index, upgrade_tables
 
 class TestRealDatabaseRequirements(unittest.TestCase):
     """Test requirements using real database with actual seed data from table_creation.py script"""
@@ -55,10 +56,13 @@ class TestRealDatabaseRequirements(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         """Clean up after all tests"""
+        db.session.remove()
+        db.engine.dispose()
         cls.app_context.pop()
-        # Clean up test database file
-        if os.path.exists(cls.test_db_path):
-            os.remove(cls.test_db_path)
+        # Clean up test database file (and WAL side files, if any)
+        for path in (cls.test_db_path, cls.test_db_path + '-wal', cls.test_db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
         print("🧹 Test database cleaned up")
     
     # ==========================================
@@ -131,5 +135,210 @@ class TestRealDatabaseRequirements(unittest.TestCase):
             for category, count in sorted(category_counts.items()):
                 print(f"   {category}: {count} recipes")
 
+    def test_search_index_matches_seed_data(self):
+        """Test Case No. 69 - Full-text search returns the same recipes as a substring scan after a rebuild"""
+        from app import db
+        from app.service.recipe import RecipeService
+
+        rebuild_search_index(self.test_db_path)
+
+        with self.app.app_context():
+            for term in ('chicken', 'soup', 'almond milk'):
+                pattern = f"%{term}%"
+                expected = {
+                    r.id for r in Recipe.query.filter(
+                        db.or_(
+                            Recipe.ingredients.ilike(pattern),
+                            Recipe.category.ilike(pattern),
+                            Recipe.name.ilike(pattern)
+                        )
+                    ).all()
+                }
+                found = {r.id for r in RecipeService.search_recipes(query=term)}
+
+                self.assertGreater(len(expected), 0, f"Seed data should contain '{term}'")
+                self.assertEqual(found, expected, f"Search results for '{term}' should match a substring scan")
+
+    def test_upgrade_removes_duplicate_favorites(self):
+        """Test Case No. 88 - Upgrading an old database removes duplicate favorites and adds the unique index"""
+        import sqlite3
+
+        db_path = os.path.join(self.test_dir, 'test_upgrade_recipe_box.db')
+        try:
+            create_tables(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.execute("DROP INDEX ix_favorites_user_recipe;")
+            conn.executemany(
+                "INSERT INTO favorites (user_id, recipe_id) VALUES (?, ?)",
+                [(1, 1), (1, 1), (1, 2)]
+            )
+            conn.commit()
+            conn.close()
+
+            upgrade_tables(db_path)
+
+            conn = sqlite3.connect(db_path)
+            rows = conn.execute("SELECT user_id, recipe_id FROM favorites ORDER BY id").fetchall()
+            self.assertEqual(rows, [(1, 1), (1, 2)])
+            with self.assertRaises(sqlite3.IntegrityError):
+                conn.execute("INSERT INTO favorites (user_id, recipe_id) VALUES (1, 2)")
+            conn.close()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+    def test_upgrade_backfills_recipe_ingredients(self):
+        """Test Case No. 104 - Upgrading a database without recipe_ingredients parses every seed recipe's ingredients"""
+        import sqlite3
+
+        db_path = os.path.join(self.test_dir, 'test_ingredients_recipe_box.db')
+        try:
+            create_tables(db_path)
+            conn = sqlite3.connect(db_path)
+            expected = conn.execute("SELECT COUNT(*), COUNT(DISTINCT recipe_id) FROM recipe_ingredients").fetchone()
+            conn.execute("DROP TABLE recipe_ingredients;")
+            conn.commit()
+            conn.close()
+
+            upgrade_tables(db_path)
+            upgrade_tables(db_path)  # a second run adds nothing
+
+            conn = sqlite3.connect(db_path)
+            count = lambda query: conn.execute(query).fetchone()[0]
+            self.assertEqual(
+                conn.execute("SELECT COUNT(*), COUNT(DISTINCT recipe_id) FROM recipe_ingredients").fetchone(), expected
+            )
+            self.assertEqual(expected[1], count("SELECT COUNT(*) FROM recipes"))
+            # "1 banana, sliced" and "3 ripe bananas, mashed" are both stored as banana
+            self.assertEqual(
+                count("SELECT COUNT(DISTINCT recipe_id) FROM recipe_ingredients WHERE name = 'banana'"),
+                count("SELECT COUNT(*) FROM recipes WHERE lower(ingredients) LIKE '%banana%'")
+            )
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT recipe_id FROM recipe_ingredients WHERE name = 'garlic'"
+            ).fetchall()
+            self.assertIn('ix_recipe_ingredients_name', plan[0][-1])
+            conn.close()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+    def test_upgrade_adds_favorite_counts(self):
+        """Test Case No. 127 - Upgrading a database without recipes.favorite_count adds, fills and maintains it"""
+        import sqlite3
+
+        db_path = os.path.join(self.test_dir, 'test_favorite_counts_recipe_box.db')
+        try:
+            create_tables(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.executemany("INSERT INTO favorites (user_id, recipe_id) VALUES (?, ?)", [(1, 1), (1, 2)])
+            for statement in DROP_FAVORITE_COUNT_TRIGGERS:
+                conn.execute(statement)
+            conn.execute("DROP INDEX ix_recipes_category_favorite_count;")
+            conn.execute("ALTER TABLE recipes DROP COLUMN favorite_count;")
+            # The old catalog trigger fired on updates of any column
+            conn.execute("DROP TRIGGER catalog_version_au;")
+            conn.execute("CREATE TRIGGER catalog_version_au AFTER UPDATE ON recipes BEGIN "
+                         "UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;")
+            conn.commit()
+            conn.close()
+
+            upgrade_tables(db_path)
+            upgrade_tables(db_path)  # a second run changes nothing
+
+            conn = sqlite3.connect(db_path)
+            count = lambda query: conn.execute(query).fetchone()[0]
+            self.assertEqual(count("SELECT SUM(favorite_count) FROM recipes"), 2)
+            version = count("SELECT version FROM catalog_version")
+            conn.execute("INSERT INTO favorites (user_id, recipe_id) VALUES (1, 3)")
+            self.assertEqual(count("SELECT favorite_count FROM recipes WHERE id = 3"), 1)
+            self.assertEqual(count("SELECT version FROM catalog_version"), version)
+            conn.execute("UPDATE recipes SET name = 'Renamed' WHERE id = 3")
+            self.assertEqual(count("SELECT version FROM catalog_version"), version + 1)
+            conn.close()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+    def test_synthetic_data_generator(self):
+        """Test Case No. 94 - Synthetic data is added to the seed data with unique names, distinct favorites and a search index"""
+        import sqlite3
+
+        db_path = os.path.join(self.test_dir, 'test_synthetic_recipe_box.db')
+        try:
+            generate_synthetic_data(db_path, recipes=500, users=20, favorites=1000, seed=7)
+            generate_synthetic_data(db_path, recipes=100, users=5, favorites=50, seed=8)
+
+            conn = sqlite3.connect(db_path)
+            count = lambda query: conn.execute(query).fetchone()[0]
+            seed_recipes = len(Recipe.query.all())
+            self.assertEqual(count("SELECT COUNT(*) FROM recipes"), seed_recipes + 600)
+            self.assertEqual(count("SELECT COUNT(*) FROM users"), 1 + 25)
+            self.assertEqual(count("SELECT COUNT(DISTINCT name) FROM recipes"), seed_recipes + 600)
+            # The second run skips pairs the first one already added
+            self.assertGreater(count("SELECT COUNT(*) FROM favorites"), 1000)
+            self.assertLessEqual(count("SELECT COUNT(*) FROM favorites"), 1050)
+            self.assertEqual(
+                count("SELECT COUNT(*) FROM (SELECT DISTINCT user_id, recipe_id FROM favorites)"),
+                count("SELECT COUNT(*) FROM favorites")
+            )
+            self.assertEqual(count("SELECT COUNT(*) FROM recipes WHERE total_time != prep_time + cook_time"), 0)
+            self.assertEqual(
+                count("SELECT COUNT(*) FROM recipes_fts WHERE recipes_fts MATCH '\"garlic\"'"),
+                count("SELECT COUNT(*) FROM recipes WHERE lower(ingredients) LIKE '%garlic%' "
+                      "OR lower(name) LIKE '%garlic%' OR lower(category) LIKE '%garlic%'")
+            )
+            self.assertEqual(
+                count("SELECT COUNT(DISTINCT recipe_id) FROM recipe_ingredients"), count("SELECT COUNT(*) FROM recipes")
+            )
+            self.assertEqual(
+                count("SELECT SUM(favorite_count) FROM recipes"), count("SELECT COUNT(*) FROM favorites")
+            )
+            # The index triggers are back for normal writes
+            conn.execute("INSERT INTO recipes (name, ingredients, instructions, category, user_id) "
+                         "VALUES ('Zzyzx Stew', 'water', 'boil', 'Soup', 1)")
+            self.assertEqual(count("SELECT COUNT(*) FROM recipes_fts WHERE recipes_fts MATCH 'zzyzx'"), 1)
+            conn.close()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+    # ==========================================
+    # CONNECTION SETTINGS TESTS
+    # ==========================================
+
+    def test_sqlite_pragmas_applied(self):
+        """Test Case No. 89 - App connections use WAL and the tuned pragmas"""
+        with self.app.app_context():
+            pragma = lambda name: db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+            self.assertEqual(pragma('busy_timeout'), 5000)
+            self.assertEqual(pragma('cache_size'), -20000)
+            self.assertEqual(pragma('temp_store'), 2)  # MEMORY
+
+    def test_sqlite_pragmas_overridable(self):
+        """Test Case No. 90 - Each pragma can be overridden or disabled through app config"""
+        db_path = os.path.join(self.test_dir, 'test_pragmas_recipe_box.db')
+        app = create_app(database_uri=f'sqlite:///{db_path}')
+        app.config.update({
+            'SQLITE_JOURNAL_MODE': None,
+            'SQLITE_SYNCHRONOUS': 'FULL',
+            'SQLITE_BUSY_TIMEOUT': 250,
+        })
+        try:
+            with app.app_context():
+                pragma = lambda name: db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+                self.assertEqual(pragma('journal_mode'), 'delete')
+                self.assertEqual(pragma('synchronous'), 2)  # FULL
+                self.assertEqual(pragma('busy_timeout'), 250)
+                db.session.remove()
+                db.engine.dispose()
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
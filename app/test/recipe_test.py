@@ -1,6 +1,7 @@
 import unittest
 import sys
 import os
+from unittest.mock import patch
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
@@ -325,4 +326,194 @@ class TestRecipeService(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].name, 'Chocolate Dessert')
 
-        
\ No newline at end of file
+    def test_search_index_follows_recipe_updates(self):
+        """Test Case No. 66 - Test the full-text index is kept in sync when a recipe is updated"""
+        recipe, msg = RecipeService.add_recipe(
+            name='Weeknight Stew',
+            ingredients='Beef, Carrots, Potatoes',
+            instructions='Simmer everything',
+            category='Dinner',
+            user_id=self.test_user.id
+        )
+        self.assertIsNotNone(recipe, msg)
+
+        self.assertEqual(len(RecipeService.search_recipes(query='carrots')), 1)
+
+        RecipeService.update_recipe(
+            recipe.id,
+            ingredients='Lentils, Celery, Potatoes',
+            user_id=self.test_user.id
+        )
+
+        self.assertEqual(len(RecipeService.search_recipes(query='carrots')), 0)
+        results = RecipeService.search_recipes(query='lentils')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].name, 'Weeknight Stew')
+
+    def test_search_recipes_ranks_name_matches_first(self):
+        """Test Case No. 67 - Test search results are ranked with name matches ahead of ingredient matches"""
+        RecipeService.add_recipe(
+            name='Herb Roasted Potatoes',
+            ingredients='Potatoes, Rosemary, Basil, Olive Oil',
+            instructions='Roast until crispy',
+            category='Dinner',
+            user_id=self.test_user.id
+        )
+        RecipeService.add_recipe(
+            name='Basil Pesto',
+            ingredients='Pine Nuts, Parmesan, Garlic',
+            instructions='Blend until smooth',
+            category='Snacks',
+            user_id=self.test_user.id
+        )
+
+        results = RecipeService.search_recipes(query='basil')
+        self.assertEqual([r.name for r in results], ['Basil Pesto', 'Herb Roasted Potatoes'])
+
+    def test_search_recipes_short_term(self):
+        """Test Case No. 68 - Test search terms shorter than three characters still match substrings"""
+        RecipeService.add_recipe(
+            name='Fig Jam',
+            ingredients='Figs, Sugar, Lemon',
+            instructions='Cook down slowly',
+            category='Snacks',
+            user_id=self.test_user.id
+        )
+
+        results = RecipeService.search_recipes(query='ja')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].name, 'Fig Jam')
+
+    # ==========================================
+    # RANDOM RECIPE TESTS
+    # ==========================================
+
+    def add_numbered_recipes(self, count):
+        """Helper method to add count simple recipes and return their ids"""
+        ids = []
+        for i in range(count):
+            recipe, msg = RecipeService.add_recipe(
+                name=f'Recipe {i}',
+                ingredients='Ingredients',
+                instructions='Instructions',
+                category='Dinner',
+                user_id=self.test_user.id
+            )
+            ids.append(recipe.id)
+        return ids
+
+    def test_random_recipe_respects_exclusions(self):
+        """Test Case No. 80 - Test get_random_recipe never returns an excluded recipe"""
+        ids = self.add_numbered_recipes(6)
+        allowed = ids[3]
+        excluded = [i for i in ids if i != allowed]
+
+        for _ in range(20):
+            recipe, msg = RecipeService.get_random_recipe(exclude_ids=excluded)
+            self.assertEqual(recipe.id, allowed)
+
+        recipe, msg = RecipeService.get_random_recipe(exclude_ids=ids)
+        self.assertIsNone(recipe)
+        self.assertEqual(msg, "No recipes found.")
+
+        # The fallback walks ids in fixed batches past the excluded ones, wrapping around
+        with patch.object(RecipeService, 'RANDOM_PROBE_ATTEMPTS', 0), \
+                patch.object(RecipeService, 'RANDOM_SCAN_BATCH', 2):
+            for _ in range(10):
+                recipe, msg = RecipeService.get_random_recipe(exclude_ids=excluded)
+                self.assertEqual(recipe.id, allowed)
+            recipe, msg = RecipeService.get_random_recipe(exclude_ids=ids)
+            self.assertIsNone(recipe)
+
+    def test_random_recipe_skips_id_gaps(self):
+        """Test Case No. 81 - Test get_random_recipe reaches every recipe when ids have gaps"""
+        ids = self.add_numbered_recipes(8)
+        for recipe_id in ids[1:7]:
+            db.session.delete(db.session.get(Recipe, recipe_id))
+        db.session.commit()
+
+        seen = set()
+        for _ in range(200):
+            recipe, msg = RecipeService.get_random_recipe()
+            seen.add(recipe.id)
+        self.assertEqual(seen, {ids[0], ids[7]})
+
+    def test_random_recipe_empty_table(self):
+        """Test Case No. 82 - Test get_random_recipe with no recipes"""
+        recipe, msg = RecipeService.get_random_recipe()
+        self.assertIsNone(recipe)
+        self.assertEqual(msg, "No recipes found.")
+
+        
+    def test_recipe_cache_lru_byte_limit(self):
+        """Test Case No. 98 - Test MemoryCache evicts least recently used entries to stay within max_bytes"""
+        from app.service.cache import MemoryCache
+
+        value = {'name': 'x' * 90}
+        size = MemoryCache.size_of(value)
+        cache = MemoryCache(max_bytes=size * 3, ttl=60)
+        for key in (1, 2, 3):
+            self.assertTrue(cache.set(key, value))
+        cache.get(1)  # 2 is now the least recently used
+        cache.set(4, value)
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), value)
+        self.assertEqual(len(cache), 3)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+        # Values larger than the whole cache are not stored
+        self.assertFalse(cache.set(5, {'name': 'x' * (size * 3)}))
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['entries'], 3)
+
+    def test_recipe_cache_ttl(self):
+        """Test Case No. 99 - Test MemoryCache treats entries older than the TTL as misses"""
+        from app.service.cache import MemoryCache
+
+        now = [100.0]
+        cache = MemoryCache(max_bytes=10000, ttl=30, clock=lambda: now[0])
+        cache.set('a', {'n': 1})
+        now[0] += 29
+        self.assertEqual(cache.get('a'), {'n': 1})
+        now[0] += 1
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(cache.bytes, 0)
+
+    def test_get_recipe_dict_cached_and_invalidated(self):
+        """Test Case No. 100 - Test get_recipe_dict serves repeat reads without SQL and sees every write"""
+        sys.path.insert(0, os.path.dirname(__file__))
+        from query_count import QueryCounter
+
+        recipe, _ = RecipeService.add_recipe(
+            name='Cached Recipe', ingredients='Flour', instructions='Bake',
+            category='Dessert', user_id=self.test_user.id
+        )
+        recipe_id = recipe.id
+        first, updated_at = RecipeService.get_recipe_dict(recipe_id)
+        self.assertEqual(first['owner'], 'testuser')
+        self.assertIsNotNone(updated_at)
+
+        with QueryCounter(db.engine) as counter:
+            again, _ = RecipeService.get_recipe_dict(recipe_id)  # within CACHE_SYNC_INTERVAL of the first read
+        self.assertEqual(counter.count, 0)
+        self.assertEqual(again, first)
+
+        # Callers get their own copy
+        again['name'] = 'Changed by caller'
+        self.assertEqual(RecipeService.get_recipe_dict(recipe_id)[0]['name'], 'Cached Recipe')
+
+        RecipeService.update_recipe(recipe_id, user_id=self.test_user.id, ingredients='Rye flour')
+        updated, _ = RecipeService.get_recipe_dict(recipe_id)
+        self.assertEqual(updated['ingredients'], 'Rye flour')
+
+        self.assertEqual(RecipeService.get_recipe_dict(9999), (None, None))
+        from app.service.cache import CacheService
+        stats = CacheService.stats()['namespaces']['recipe']
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['invalidations'], 2)  # add_recipe and update_recipe
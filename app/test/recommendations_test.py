@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+from array import array
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.cofavorites import co_favorite_counts, group_favorites, merge_neighbor, similarity, top_neighbors
+from app.model.recommendations import RecipeNeighbor, RecipeNeighborPending
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.favorites import FavoriteService
+from app.service.recipe import RecipeService
+from app.service.recommendations import RecommendationService
+from app.test.query_count import QueryCounter
+
+class TestRecommendationService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.users = []
+        for n in range(4):
+            user = User(username=f'user{n}', email=f'user{n}@example.com', name=f'User {n}', password='testpassword')
+            db.session.add(user)
+            self.users.append(user)
+        db.session.commit()
+        self.users = [user.id for user in self.users]
+
+        self.pancakes = self.add('Pancakes', 'Breakfast')
+        self.waffles = self.add('Waffles', 'Breakfast')
+        self.omelette = self.add('Omelette', 'Breakfast')
+        self.brownies = self.add('Brownies', 'Dessert')
+
+        # user0: pancakes, waffles, brownies; user1: pancakes, waffles; user2: pancakes, omelette
+        FavoriteService.bulk_add(self.users[0], [self.pancakes, self.waffles, self.brownies])
+        FavoriteService.bulk_add(self.users[1], [self.pancakes, self.waffles])
+        FavoriteService.bulk_add(self.users[2], [self.pancakes, self.omelette])
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients='Flour', instructions='Cook', category=category, user_id=self.users[0]
+        )
+        return recipe.id
+
+    def stored_neighbors(self):
+        neighbors = {}
+        for row in RecipeNeighbor.query.order_by(RecipeNeighbor.recipe_id, RecipeNeighbor.rank):
+            neighbors.setdefault(row.recipe_id, []).append((row.neighbor_id, round(row.score, 6), row.co_count))
+        return neighbors
+
+    def test_cofavorite_helpers(self):
+        """Test Case No. 128 - Test co-favorite counts, cosine scores and top neighbor lists from favorite arrays"""
+        favorites_of = group_favorites([(1, 10), (1, 11), (2, 10), (2, 11), (2, 12), (3, 12)])
+        self.assertEqual(favorites_of, {1: array('I', [10, 11]), 2: array('I', [10, 11, 12]), 3: array('I', [12])})
+
+        co_counts = co_favorite_counts(10, [1, 2], favorites_of)
+        self.assertEqual(co_counts, {11: 2, 12: 1})
+        self.assertAlmostEqual(similarity(1, 2, 2), 0.5)
+        self.assertEqual(similarity(0, 2, 2), 0.0)
+
+        neighbors = top_neighbors(10, co_counts, {10: 2, 11: 2, 12: 2})
+        self.assertEqual([(other, round(score, 3), co) for other, score, co in neighbors], [(11, 1.0, 2), (12, 0.5, 1)])
+        self.assertEqual(top_neighbors(10, co_counts, {10: 2, 11: 2, 12: 2}, k=1)[0][0], 11)
+
+        # Rescoring an entry keeps the list ordered, a zero score drops it
+        self.assertEqual(merge_neighbor(neighbors, 12, 2.0, 3)[0], (12, 2.0, 3))
+        self.assertEqual([entry[0] for entry in merge_neighbor(neighbors, 11, 0.0, 0)], [12])
+
+    def test_refresh_matches_rebuild(self):
+        """Test Case No. 129 - Test refreshing the recipes queued by favorite writes gives the same lists as a full rebuild"""
+        self.assertEqual(RecommendationService.rebuild(), 4)
+        self.assertEqual(RecipeNeighborPending.query.count(), 0)
+        neighbors = self.stored_neighbors()
+        # pancakes and waffles share two fans out of three and two
+        self.assertEqual(neighbors[self.waffles][0][:1], (self.pancakes,))
+        self.assertEqual(neighbors[self.waffles][0][2], 2)
+        self.assertNotIn(self.omelette, [entry[0] for entry in neighbors[self.waffles]])
+
+        # Favorite writes queue only the recipes they touch
+        FavoriteService.remove_favorite(self.waffles, self.users[1])
+        FavoriteService.bulk_add(self.users[3], [self.omelette, self.brownies])
+        self.assertEqual(
+            {row.recipe_id for row in RecipeNeighborPending.query}, {self.waffles, self.omelette, self.brownies}
+        )
+        self.assertEqual(RecommendationService.refresh(), 3)
+        self.assertEqual(RecommendationService.refresh(), 0)
+        refreshed = self.stored_neighbors()
+
+        RecommendationService.rebuild()
+        self.assertEqual(refreshed, self.stored_neighbors())
+        self.assertIn(self.brownies, [entry[0] for entry in refreshed[self.omelette]])
+
+    def test_recommendation_endpoints(self):
+        """Test Case No. 130 - Test /recommendations/<id> and /recommendations read the stored neighbors in few queries"""
+        RecommendationService.rebuild()
+
+        # The neighbor range read and one batched recipe lookup
+        CacheService.sync()
+        with QueryCounter(db.engine) as counter:
+            similar = RecommendationService.similar_recipes(self.waffles, limit=2)
+        self.assertLessEqual(counter.count, 2)
+        self.assertEqual([recipe['recipe_id'] for recipe in similar], [self.pancakes, self.brownies])
+        self.assertEqual(similar[0]['co_count'], 2)
+        self.assertEqual(similar[0]['name'], 'Pancakes')
+
+        response = self.client.get(f'/recommendations/{self.waffles}?limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([recipe['recipe_id'] for recipe in response.get_json()['recipes']], [self.pancakes])
+        self.assertEqual(self.client.get('/recommendations/9999').status_code, 404)
+
+        # Logged in users get the neighbors of their favorites they have not favorited yet
+        self.assertEqual(self.client.get('/recommendations').status_code, 401)
+        with self.client.session_transaction() as sess:
+            sess['logged_in'] = True
+            sess['user_id'] = self.users[1]
+        recipes = self.client.get('/recommendations').get_json()['recipes']
+        ids = [recipe['recipe_id'] for recipe in recipes]
+        self.assertEqual(sorted(ids), sorted([self.brownies, self.omelette]))
+        self.assertNotIn(self.pancakes, ids)
+
+if __name__ == '__main__':
+    unittest.main()
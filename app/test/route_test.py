@@ -1,13 +1,25 @@
 import unittest
+import base64
 import json
 import os
+import sys
 import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
 from app import create_app, db
+from app.model.favorites import Favorite
 from app.model.users import User
 from app.model.recipes import Recipe
+from app.service.cache import CacheService
+from app.service.catalog import CatalogService
+from app.service.favorites import FavoriteService
+from app.service.pagination import PaginationService
+from sqlalchemy import text
 from werkzeug.security import generate_password_hash
+from query_count import QueryCountMixin
 
-class TestFlaskRoutes(unittest.TestCase):
+class TestFlaskRoutes(QueryCountMixin, unittest.TestCase):
     
     def setUp(self):
         """Set up test database and client before each test"""
@@ -71,6 +83,26 @@ class TestFlaskRoutes(unittest.TestCase):
             sess['name'] = 'Test User'
             sess['logged_in'] = True
         return True
+
+    def add_recipes_from_other_users(self, count=10):
+        """Helper method to add recipes owned by several different users"""
+        for i in range(count):
+            owner = User(
+                username=f'owner{i}',
+                email=f'owner{i}@example.com',
+                name=f'Owner {i}',
+                password=generate_password_hash('ownerpass')
+            )
+            db.session.add(owner)
+            db.session.flush()
+            db.session.add(Recipe(
+                name=f'Owner Recipe {i}',
+                ingredients='Some ingredients',
+                instructions='Some instructions',
+                category='Dinner',
+                user_id=owner.id
+            ))
+        db.session.commit()
     
     # ==========================================
     # 1. ABOUT/FAQ/HOME PAGE ROUTE TESTS
@@ -211,6 +243,26 @@ class TestFlaskRoutes(unittest.TestCase):
         # Should redirect when no favorite action is provided
         self.assertEqual(response.status_code, 302)
 
+    def test_search_favorite_toggle_follows_database(self):
+        """Test Case No. 136 - Test POST /search favorite toggle flips the stored favorite even when the cached set is behind"""
+        self.login_test_user()
+        recipe_id = self.test_recipe.id
+        form = {'favorite': '1', 'recipe_id': recipe_id}
+
+        self.assertFalse(FavoriteService.is_favorite(recipe_id, self.user_id))
+        self.assertEqual(self.client.post('/search?q=test', data=form).status_code, 200)
+        self.assertTrue(FavoriteService.is_favorite(recipe_id, self.user_id))
+
+        # Another worker removed it and this process has not synced yet: the toggle adds it back
+        db.session.execute(text("DELETE FROM favorites WHERE recipe_id = :recipe_id"), {'recipe_id': recipe_id})
+        db.session.commit()
+        self.client.post('/search?q=test', data=form)
+        self.assertEqual(Favorite.query.filter_by(user_id=self.user_id, recipe_id=recipe_id).count(), 1)
+
+        self.client.post('/search?q=test', data=form)
+        self.assertEqual(Favorite.query.filter_by(user_id=self.user_id, recipe_id=recipe_id).count(), 0)
+        self.assertFalse(FavoriteService.is_favorite(recipe_id, self.user_id))
+
     # ==========================================
     # 4. API ENDPOINT TESTS  
     # ==========================================
@@ -353,6 +405,324 @@ class TestFlaskRoutes(unittest.TestCase):
         
         self.assertEqual(response.status_code, 405)
 
+    # ==========================================
+    # 8. QUERY COUNT TESTS
+    # ==========================================
+
+    def test_browse_recipes_list_single_query(self):
+        """Test Case No. 70 - Test GET /browse_recipes_list - Owners are loaded without a query per recipe"""
+        self.add_recipes_from_other_users()
+        CatalogService.has_version_table()
+
+        # One query for the recipes and owners, one for the catalog version (ETag)
+        with self.assertMaxQueries(2):
+            response = self.client.get('/browse_recipes_list')
+
+        self.assertEqual(response.status_code, 200)
+        recipes = response.get_json()['recipes']
+        self.assertEqual(len(recipes), 11)
+        owners = {r['name']: r['owner'] for r in recipes}
+        self.assertEqual(owners['Test Recipe'], 'testuser')
+        self.assertEqual(owners['Owner Recipe 3'], 'owner3')
+
+    def test_get_recipe_single_query(self):
+        """Test Case No. 71 - Test GET /get_recipe/<id> - Recipe and owner come from one query"""
+        CacheService.sync()  # one-time read of the invalidation version stamp
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(f'/get_recipe/{self.recipe_id}')
+
+        self.assertEqual(response.status_code, 200)
+        recipe = response.get_json()['recipe']
+        self.assertEqual(recipe['name'], 'Test Recipe')
+        self.assertEqual(recipe['owner'], 'testuser')
+
+        response = self.client.get('/get_recipe/999999')
+        self.assertEqual(response.status_code, 404)
+
+    def test_random_recipe_served_from_cache(self):
+        """Test Case No. 72 - Test GET /random_recipe - Recipe of the day is cached, repeat requests run no SQL"""
+        self.add_recipes_from_other_users()
+
+        first = self.client.get('/random_recipe')
+        self.assertEqual(first.status_code, 200)
+        recipe = first.get_json()['recipe']
+        self.assertNotEqual(recipe['owner'], 'Anonymous')
+
+        with self.assertMaxQueries(0):
+            second = self.client.get('/random_recipe')
+            featured = self.client.get('/featured')
+
+        self.assertEqual(second.get_json()['recipe']['recipe_id'], recipe['recipe_id'])
+        self.assertEqual(featured.status_code, 200)
+
+    # ==========================================
+    # 9. PAGINATION TESTS
+    # ==========================================
+
+    def test_browse_recipes_list_cursor_pagination(self):
+        """Test Case No. 73 - Test GET /browse_recipes_list?limit=N - Following next_cursor visits every recipe once"""
+        self.add_recipes_from_other_users()
+
+        CatalogService.has_version_table()
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            url = '/browse_recipes_list?limit=4' + (f'&cursor={cursor}' if cursor else '')
+            # The page itself plus the catalog version lookup for the ETag
+            with self.assertMaxQueries(2):
+                data = self.client.get(url).get_json()
+            pages += 1
+            self.assertLessEqual(len(data['recipes']), 4)
+            seen.extend(r['recipe_id'] for r in data['recipes'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 11)
+        self.assertEqual(seen, sorted(set(seen)))
+
+    def test_search_results_cursor_pagination(self):
+        """Test Case No. 74 - Test GET /search_results?q=X&limit=N - Ranked results page without repeats"""
+        for i in range(7):
+            db.session.add(Recipe(
+                name=f'Soup Number {i}',
+                ingredients='Broth, Carrots' + ', Soup Bones' * (i % 3),
+                instructions='Simmer',
+                category='Soup',
+                user_id=self.user_id
+            ))
+        db.session.commit()
+
+        full = self.client.get('/search_results?q=soup&limit=100').get_json()
+        self.assertEqual(len(full['recipes']), 7)
+        self.assertIsNone(full['next_cursor'])
+
+        paged = []
+        cursor = None
+        while True:
+            url = '/search_results?q=soup&limit=3' + (f'&cursor={cursor}' if cursor else '')
+            data = self.client.get(url).get_json()
+            paged.extend(r['recipe_id'] for r in data['recipes'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(paged, [r['recipe_id'] for r in full['recipes']])
+
+    def test_pagination_total_and_invalid_cursor(self):
+        """Test Case No. 75 - Test include_total returns a count and a bad cursor returns 400"""
+        self.add_recipes_from_other_users()
+
+        data = self.client.get('/browse_recipes_list?limit=2&include_total=1').get_json()
+        self.assertEqual(data['total'], 11)
+        self.assertTrue(data['total_exact'])
+
+        data = self.client.get('/browse_recipes_list?limit=2').get_json()
+        self.assertNotIn('total', data)
+
+        response = self.client.get('/browse_recipes_list?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+        # Tampered values of the right shape are rejected too, not bound into the query
+        key_names = json.loads(base64.urlsafe_b64decode(data['next_cursor'] + '==='))['k']
+        for value in ([1], None, True, {'a': 1}):
+            cursor = PaginationService.encode_cursor(key_names, [value] * len(key_names))
+            response = self.client.get(f'/browse_recipes_list?cursor={cursor}')
+            self.assertEqual(response.status_code, 400)
+
+        # A browse cursor cannot be replayed against the ranked search listing
+        response = self.client.get(f"/search_results?q=recipe&cursor={data['next_cursor']}")
+        self.assertEqual(response.status_code, 400)
+
+        # Search cursors must carry numbers to be compared with the cached matches
+        self.assertEqual(self.client.get('/search_results?q=recipe').status_code, 200)
+        for values in (['x', 1], [None, None], [1, 'x']):
+            cursor = PaginationService.encode_cursor(['rank', 'id'], values)
+            response = self.client.get(f'/search_results?q=recipe&cursor={cursor}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_favorites_list_single_query(self):
+        """Test Case No. 79 - Test GET /favorites_list - Every favorite card comes from one query"""
+        from app.model.favorites import Favorite
+
+        self.add_recipes_from_other_users()
+        for recipe in Recipe.query.all():
+            db.session.add(Favorite(user_id=self.user_id, recipe_id=recipe.id))
+        db.session.commit()
+        self.login_test_user()
+
+        with self.assertMaxQueries(1):
+            response = self.client.get('/favorites_list')
+
+        self.assertEqual(response.status_code, 200)
+        recipes = response.get_json()['recipes']
+        self.assertEqual(len(recipes), 11)
+        self.assertEqual(recipes[0]['owner'], 'testuser')
+        self.assertIn('image_location', recipes[0])
+        self.assertEqual(recipes[0]['image'], recipes[0]['image_location'])
+        self.assertIn('servings', recipes[0])
+
+        response = self.client.get('/favorites_list?fields=name,password')
+        self.assertEqual(response.status_code, 400)
+
+    # ==========================================
+    # 10. CONDITIONAL REQUEST TESTS
+    # ==========================================
+
+    def test_get_recipe_etag_revalidation(self):
+        """Test Case No. 95 - Test GET /get_recipe/<id> with If-None-Match - 304 until the recipe is updated"""
+        response = self.client.get(f'/get_recipe/{self.recipe_id}')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/"recipe-'))
+        self.assertIn('Last-Modified', response.headers)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        # Answered from the cached recipe without any SQL
+        with self.assertMaxQueries(0):
+            response = self.client.get(f'/get_recipe/{self.recipe_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+        # Or from updated_at alone, without loading the recipe, when it is not cached
+        CacheService.backend().clear()
+        with self.assertMaxQueries(1) as queries:
+            response = self.client.get(f'/get_recipe/{self.recipe_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('recipes.ingredients', queries.statements[0])
+
+        self.login_test_user()
+        response = self.client.post(f'/update_recipe/{self.recipe_id}', data={
+            'name': 'Test Recipe',
+            'ingredients': 'New ingredients',
+            'instructions': 'Test instructions',
+            'category': 'Dinner'
+        })
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(f'/get_recipe/{self.recipe_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.get_json()['recipe']['ingredients'], 'New ingredients')
+
+    def test_recipe_if_modified_since(self):
+        """Test Case No. 96 - Test GET /get_recipe/<id> and /show_recipe with If-Modified-Since"""
+        response = self.client.get(f'/show_recipe?recipe_id={self.recipe_id}')
+        self.assertEqual(response.status_code, 200)
+        last_modified = response.headers['Last-Modified']
+
+        for url in (f'/get_recipe/{self.recipe_id}', f'/show_recipe?recipe_id={self.recipe_id}'):
+            response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.get(url, headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+            self.assertEqual(response.status_code, 200)
+
+        # Missing recipes are still reported as missing
+        response = self.client.get('/get_recipe/9999', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 404)
+
+    def test_listing_etag_follows_catalog_version(self):
+        """Test Case No. 97 - Test GET /browse_recipes_list and /search_results - 304 until any recipe is written"""
+        self.add_recipes_from_other_users(3)
+        CatalogService.has_version_table()
+
+        for url in ('/browse_recipes_list', '/search_results?q=recipe'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers['ETag']
+            self.assertTrue(etag.startswith('W/"catalog-'))
+
+            with self.assertMaxQueries(1) as queries:
+                response = self.client.get(url, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertIn('catalog_version', queries.statements[0])
+
+        etag = self.client.get('/browse_recipes_list').headers['ETag']
+
+        recipe = Recipe(name='New Recipe', ingredients='x', instructions='y', category='Lunch', user_id=self.user_id)
+        db.session.add(recipe)
+        db.session.commit()
+        response = self.client.get('/browse_recipes_list', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['recipes']), 5)
+        etag = response.headers['ETag']
+
+        # Writes from outside the app (scripts, other workers) bump the version too
+        db.session.execute(db.text("UPDATE recipes SET servings = 3 WHERE id = :id"), {'id': recipe.id})
+        db.session.commit()
+        response = self.client.get('/browse_recipes_list', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        db.session.delete(recipe)
+        db.session.commit()
+        response = self.client.get('/browse_recipes_list', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['recipes']), 4)
+
+    def test_batch_recipe_lookup(self):
+        """Test Case No. 120 - Test GET /recipes?ids= - recipes in request order with not-found markers from one IN query"""
+        self.add_recipes_from_other_users(3)
+        ids = [recipe.id for recipe in Recipe.query.order_by(Recipe.id.desc())]
+        from app.service.cache import CacheService
+        CacheService.sync()
+
+        url = f"/recipes?ids={ids[0]},9999,{ids[2]},{ids[0]}"
+        with self.assertMaxQueries(1) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(' IN (', queries.statements[0])
+        recipes = response.get_json()['recipes']
+        self.assertEqual([recipe['recipe_id'] for recipe in recipes], [ids[0], 9999, ids[2], ids[0]])
+        self.assertEqual(recipes[1], {'recipe_id': 9999, 'error': 'Recipe not found'})
+        self.assertEqual(recipes[0]['owner'], 'owner2')
+        self.assertEqual(recipes[0], self.client.get(f'/get_recipe/{ids[0]}').get_json()['recipe'])
+
+        # Served from the recipe cache /get_recipe shares
+        with self.assertMaxQueries(0):
+            response = self.client.get(f"/recipes?ids={ids[2]},{ids[0]}&fields=name,owner")
+        self.assertEqual(response.get_json()['recipes'], [
+            {'name': 'Owner Recipe 0', 'owner': 'owner0'}, {'name': 'Owner Recipe 2', 'owner': 'owner2'}
+        ])
+
+        self.assertEqual(self.client.get('/recipes').status_code, 400)
+        self.assertEqual(self.client.get('/recipes?ids=1,abc').status_code, 400)
+        self.assertEqual(self.client.get('/recipes?ids=1&fields=password').status_code, 400)
+        self.assertEqual(self.client.get('/recipes?ids=' + ','.join(['1'] * 101)).status_code, 400)
+
+    def test_bulk_favorite_endpoints(self):
+        """Test Case No. 122 - Test /bulk_add_favorites, /bulk_remove_favorites and /are_favorites for a page of recipes"""
+        self.add_recipes_from_other_users(3)
+        ids = [recipe.id for recipe in Recipe.query.order_by(Recipe.id)]
+        page = ','.join(str(recipe_id) for recipe_id in ids)
+
+        # Logged out: nothing is a favorite and nothing can be changed
+        self.assertEqual(self.client.get(f'/are_favorites?ids={page}').get_json(), {'favorite_ids': []})
+        self.assertEqual(self.client.post('/bulk_add_favorites', json={'recipe_ids': ids}).status_code, 401)
+
+        self.login_test_user()
+        response = self.client.post('/bulk_add_favorites', json={'recipe_ids': ids[1:]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['recipe_ids'], ids[1:])
+        response = self.client.post('/bulk_remove_favorites', data={'recipe_ids': f'{ids[2]},{ids[0]}'})
+        self.assertEqual(response.get_json()['recipe_ids'], [ids[2]])
+
+        from app.service.cache import CacheService
+        CacheService.sync()
+        with self.assertMaxQueries(1):
+            response = self.client.get(f'/are_favorites?ids={page}')
+        self.assertEqual(response.get_json(), {'favorite_ids': [ids[1], ids[3]]})
+
+        self.assertEqual(self.client.get('/are_favorites?ids=1,abc').status_code, 400)
+        self.assertEqual(self.client.post('/bulk_add_favorites', json={'recipe_ids': 'x'}).status_code, 400)
+        self.assertEqual(self.client.post('/bulk_remove_favorites', json={'recipe_ids': list(range(1, 102))}).status_code, 400)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
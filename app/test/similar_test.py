@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.recipe import RecipeService
+from app.service.similar import SimilarService
+from app.test.query_count import QueryCounter
+from app.tfidf import TfidfIndex, document_terms
+
+class TestSimilarService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        self.soup = self.add('Tomato Basil Soup', '2 cups tomatoes\n1 bunch basil\n1 onion, diced', 'Soup')
+        self.pasta = self.add('Tomato Pasta', '8 oz spaghetti\n2 cups tomatoes\nbasil leaves', 'Dinner')
+        self.salad = self.add('Caprese Salad', '2 tomatoes\nfresh mozzarella\nbasil', 'Lunch')
+        self.brownies = self.add('Fudge Brownies', '1 cup flour\n2 eggs\n1/2 cup cocoa', 'Dessert')
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, ingredients, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients=ingredients, instructions='Cook', category=category, user_id=self.test_user.id
+        )
+        return recipe.id
+
+    def test_tfidf_index(self):
+        """Test Case No. 131 - Test TF-IDF vectors rank recipes sharing rarer terms first and follow adds and removes"""
+        self.assertEqual(document_terms('The Best Chick Pea Curry', ['chick pea']), {'chick pea', 'chick', 'pea', 'curry'})
+
+        index = TfidfIndex()
+        index.load([(1, {'tomato', 'basil', 'soup'}), (2, {'tomato', 'basil', 'pasta'}), (3, {'tomato', 'cheese'})])
+        self.assertEqual(len(index), 3)
+        similar = index.similar(1, 5)
+        self.assertEqual([recipe_id for recipe_id, _ in similar], [2, 3])
+        self.assertGreater(similar[0][1], similar[1][1])
+        self.assertAlmostEqual(index.similar(2, 1)[0][1], similar[0][1], places=5)
+
+        # Added recipes get weights from the loaded idf values, removed ones stop matching
+        index.add(4, {'basil', 'soup', 'pesto'})
+        self.assertEqual(index.similar(1, 1)[0][0], 4)
+        index.remove(2)
+        self.assertNotIn(2, index)
+        self.assertEqual([recipe_id for recipe_id, _ in index.similar(1, 5)], [4, 3])
+        self.assertEqual(index.similar(99, 5), [])
+        self.assertFalse(index.stale())
+
+    def test_add_recipe_appends_vector(self):
+        """Test Case No. 132 - Test recipes added through add_recipe are appended to the index without a rebuild"""
+        similar = SimilarService.similar_recipes(self.soup)
+        self.assertEqual({recipe['recipe_id'] for recipe in similar[:2]}, {self.pasta, self.salad})
+        self.assertNotIn(self.brownies, [recipe['recipe_id'] for recipe in similar])
+        index = SimilarService._state()['index']
+
+        gazpacho = self.add('Tomato Gazpacho Soup', '4 tomatoes\n1 cucumber\n1 onion', 'Soup')
+        similar = SimilarService.similar_recipes(self.soup, limit=1)
+        self.assertIs(SimilarService._state()['index'], index)
+        self.assertEqual(similar[0]['recipe_id'], gazpacho)
+        self.assertEqual(similar[0]['name'], 'Tomato Gazpacho Soup')
+
+        # Rewritten recipes are re-indexed from their new ingredients
+        RecipeService.update_recipe(self.brownies, ingredients='2 cups tomatoes\nbasil', user_id=self.test_user.id)
+        self.assertIn(self.brownies, [recipe['recipe_id'] for recipe in SimilarService.similar_recipes(self.soup)])
+        self.assertIsNone(SimilarService.similar_recipes(9999))
+
+        # Lookups on an up to date index read nothing but cached recipes
+        CacheService.sync()
+        with QueryCounter(db.engine) as counter:
+            SimilarService.similar_recipes(self.soup)
+        self.assertEqual(counter.count, 0)
+
+    def test_similar_route(self):
+        """Test Case No. 133 - Test /similar/<recipe_id> returns scored similar recipes and 404 for missing recipes"""
+        response = self.client.get(f'/similar/{self.pasta}?limit=2')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['recipe_id'], self.pasta)
+        self.assertEqual([recipe['recipe_id'] for recipe in data['recipes']], [self.soup, self.salad])
+        self.assertTrue(0 < data['recipes'][0]['score'] <= 1)
+        self.assertEqual(data['recipes'][0]['owner'], 'testuser')
+        self.assertEqual(self.client.get('/similar/9999').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
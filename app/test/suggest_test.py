@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.cache import CacheService
+from app.service.recipe import RecipeService
+from app.service.suggest import CATEGORY, INGREDIENT, RECIPE, PrefixIndex, SuggestService
+from app.test.query_count import QueryCounter
+
+class TestSuggestService(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Two apps on one database file stand in for two worker processes
+        self.tmp = tempfile.TemporaryDirectory()
+        database_uri = f"sqlite:///{os.path.join(self.tmp.name, 'recipes.db')}"
+        self.app = create_app(database_uri=database_uri)
+        self.app.config['TESTING'] = True
+        self.other_app = create_app(database_uri=database_uri)
+        self.other_app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            user = User(username='testuser', email='test@example.com', name='Test User', password='testpassword')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.soup = self.add('Tomato Basil Soup', '4 tomatoes\n1 bunch basil', 'Soup')
+            self.salad = self.add('Caprese Salad', '2 tomatoes\n1 ball mozzarella', 'Salads')
+
+    def tearDown(self):
+        """Run after each test"""
+        for app in (self.app, self.other_app):
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+        self.tmp.cleanup()
+
+    def add(self, name, ingredients, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients=ingredients, instructions='Cook', category=category, user_id=self.user_id
+        )
+        return recipe.id
+
+    def test_prefix_index_matches_word_starts(self):
+        """Test Case No. 111 - Test PrefixIndex matches the start of any word and counts shared terms"""
+        index = PrefixIndex()
+        index.add(1, 'Tomato Basil Soup', 'Soup', ['tomato', 'basil'])
+        index.add(2, 'Sweet Tomato Jam', 'Preserves', ['tomato', 'sugar'])
+        index.add(3, 'Sourdough', 'Bread', ['flour'])
+
+        self.assertEqual(index.suggest('tom', 10), [(INGREDIENT, 'tomato', 2), (RECIPE, 2, 1), (RECIPE, 1, 1)])
+        self.assertEqual(index.suggest('  BASIL   so', 10), [(RECIPE, 1, 1)])
+        self.assertEqual(index.suggest('so', 10), [(CATEGORY, 'Soup', 1), (RECIPE, 3, 1), (RECIPE, 1, 1)])
+        self.assertEqual(index.suggest('so', 1), [(CATEGORY, 'Soup', 1)])
+        self.assertEqual(index.suggest('', 10), [])
+
+        # Rewriting a recipe takes back exactly what it contributed
+        index.remove(1)
+        index.add(1, 'Basil Pesto', 'Sauces', ['basil'])
+        self.assertEqual(index.suggest('tom', 10), [(INGREDIENT, 'tomato', 1), (RECIPE, 2, 1)])
+        self.assertEqual(index.suggest('soup', 10), [])
+        self.assertEqual(index.text(RECIPE, 1), 'Basil Pesto')
+        index.remove(42)
+        self.assertEqual(len(index), 3)
+
+    def test_suggest_endpoint_served_from_memory(self):
+        """Test Case No. 112 - Test /search_suggest lists categories, ingredients and recipes without SQL once warm"""
+        with self.app.app_context():
+            SuggestService.warm()
+            CacheService.sync()
+            with QueryCounter(db.engine) as counter:
+                response = self.client.get('/search_suggest?prefix=Sa')
+            self.assertEqual(counter.count, 0)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['prefix'], 'Sa')
+        self.assertEqual(data['suggestions'], [
+            {'text': 'Salads', 'type': 'category', 'count': 1},
+            {'text': 'Caprese Salad', 'type': 'recipe', 'recipe_id': self.salad},
+        ])
+
+        data = self.client.get('/search_suggest?prefix=to&limit=1').get_json()
+        self.assertEqual(data['suggestions'], [{'text': 'tomato', 'type': 'ingredient', 'count': 2}])
+        self.assertEqual(self.client.get('/search_suggest').get_json()['suggestions'], [])
+
+    def test_index_follows_recipe_writes(self):
+        """Test Case No. 113 - Test the suggestion index picks up writes made by this app and by another app"""
+        with self.other_app.app_context():
+            self.assertEqual(len(SuggestService.index()), 2)
+
+        with self.app.app_context():
+            SuggestService.index()
+            RecipeService.update_recipe(self.soup, name='Pumpkin Soup', ingredients='1 pumpkin', user_id=self.user_id)
+            pie = self.add('Pumpkin Pie', '1 pumpkin\n1 pie crust', 'Dessert')
+            texts = [suggestion['text'] for suggestion in SuggestService.suggest('pump')]
+            self.assertEqual(texts, ['pumpkin', 'Pumpkin Pie', 'Pumpkin Soup'])
+
+        with self.other_app.app_context():
+            CacheService.sync(force=True)
+            suggestions = SuggestService.suggest('pump')
+            self.assertEqual(suggestions[0], {'text': 'pumpkin', 'type': 'ingredient', 'count': 2})
+            self.assertIn({'text': 'Pumpkin Pie', 'type': 'recipe', 'recipe_id': pie}, suggestions)
+            self.assertEqual([s['text'] for s in SuggestService.suggest('basil')], [])
+            self.assertEqual(SuggestService.suggest('tomato')[0]['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from app import create_app, db
+from app.model.users import User
+from app.service.recipe import RecipeService
+from app.test.query_count import QueryCounter
+from app.trigrams import TrigramIndex, similarity, trigrams
+
+class TestTrigramSearch(unittest.TestCase):
+    def setUp(self):
+        """Run before each test"""
+        # Use in-memory database for tests
+        self.app = create_app(database_uri='sqlite:///:memory:')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.test_user = User(
+            username='testuser',
+            email='test@example.com',
+            name='Test User',
+            password='testpassword'
+        )
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        self.spaghetti = self.add('Spaghetti Bolognese', '1 lb spaghetti\n1 lb ground beef', 'Dinner')
+        self.hummus = self.add('Hummus', '1 can chick peas\n2 tbsp tahini', 'Snacks')
+
+    def tearDown(self):
+        """Run after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, name, ingredients, category):
+        recipe, _ = RecipeService.add_recipe(
+            name=name, ingredients=ingredients, instructions='Cook', category=category, user_id=self.test_user.id
+        )
+        return recipe.id
+
+    def test_trigram_index_corrects_queries(self):
+        """Test Case No. 114 - Test TrigramIndex ranks vocabulary by trigram similarity and corrects misspelled queries"""
+        self.assertEqual(trigrams('Ab-c'), {'  a', ' ab', 'abc', 'bc '})
+        self.assertEqual(similarity('chick peas', 'Chickpeas'), 1.0)
+        self.assertEqual(similarity('', 'pea'), 0.0)
+
+        index = TrigramIndex()
+        index.load([
+            ('Spaghetti Bolognese', 'Dinner', ['spaghetti', 'ground beef']),
+            ('Chickpea Curry', 'Dinner', ['chickpea', 'coconut milk']),
+            ('Chicken Curry', 'Dinner', ['chicken']),
+        ])
+        self.assertIn('ground beef', index)
+        self.assertIn('beef', index)
+        self.assertEqual(index.matches('spagetti', limit=1)[0][0], 'spaghetti')
+        self.assertEqual(index.matches('xyz'), [])
+
+        self.assertEqual(index.correct('Spagetti bolognaise'), 'spaghetti bolognese')
+        self.assertEqual(index.correct('chick peas'), 'chickpea')
+        self.assertIsNone(index.correct('chicken curry'))
+        self.assertIsNone(index.correct('zzzzzz'))
+
+        # Terms no recipe uses anymore stop matching
+        index.remove('Chickpea Curry', 'Dinner', ['chickpea', 'coconut milk'])
+        self.assertNotIn('chickpea', index)
+        self.assertEqual(index.matches('chickpea', limit=1)[0][0], 'chicken')
+        self.assertIn('curry', index)
+
+    def test_search_results_falls_back_to_correction(self):
+        """Test Case No. 115 - Test /search_results answers a misspelled query with the corrected query's recipes"""
+        data = self.client.get('/search_results?q=spagetti').get_json()
+        self.assertEqual(data['corrected_query'], 'spaghetti')
+        self.assertEqual([r['recipe_id'] for r in data['recipes']], [self.spaghetti])
+
+        data = self.client.get('/search_results?q=chickpeas').get_json()
+        self.assertEqual(data['corrected_query'], 'chick pea')
+        self.assertEqual([r['recipe_id'] for r in data['recipes']], [self.hummus])
+
+        # Exact matches and hopeless queries are returned as they are
+        data = self.client.get('/search_results?q=hummus').get_json()
+        self.assertNotIn('corrected_query', data)
+        data = self.client.get('/search_results?q=qqqqqq').get_json()
+        self.assertEqual((data['recipes'], 'corrected_query' in data), ([], False))
+
+        # New recipes join the vocabulary, and a correction costs no more than the two searches
+        waffles = self.add('Belgian Waffles', '2 cups flour', 'Breakfast')
+        self.client.get('/search_results?q=wafles')
+        with QueryCounter(db.engine) as counter:
+            data = self.client.get('/search_results?q=belgain').get_json()
+        self.assertEqual([r['recipe_id'] for r in data['recipes']], [waffles])
+        self.assertLessEqual(counter.count, 4)
+
+if __name__ == '__main__':
+    unittest.main()
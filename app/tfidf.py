@@ -0,0 +1,135 @@
+"""Content-based recipe similarity: TF-IDF over recipe names and ingredients.
+
+Recipes nobody favorited yet have no co-favorite neighbors (see
+app/cofavorites.py), so they are compared by what they are made of. Each
+recipe is a set of terms, the words of its name plus its ingredient names
+whole and word by word (trigrams.recipe_terms), weighted by inverse
+document frequency and L2-normalized. Similarity is the dot product of two
+vectors (their cosine), accumulated from the posting lists of the query
+recipe's terms, so only recipes sharing a term are ever scored.
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from app.trigrams import recipe_terms
+
+# Name words that say nothing about a recipe
+STOP_WORDS = frozenset({'and', 'the', 'with', 'for', 'from', 'best', 'easy', 'homemade', 'recipe'})
+# Terms used by more than this share of the recipes are left out (salt, water, ...)
+MAX_DF = 0.5
+# Catalogs smaller than this keep every term, shares are meaningless there
+MIN_RECIPES_FOR_MAX_DF = 100
+# Recipes added or rewritten since the last load, as a share of the recipes
+# loaded, after which the idf weights are recomputed from scratch
+REBUILD_GROWTH = 0.25
+
+
+def document_terms(name, ingredients):
+    """Terms of a recipe: name words and ingredient names, without STOP_WORDS."""
+    return recipe_terms(name or '', None, ingredients) - STOP_WORDS
+
+
+def idf(recipes, df):
+    """Smoothed inverse document frequency of a term in df of recipes."""
+    return math.log((1 + recipes) / (1 + df)) + 1
+
+
+class TfidfIndex:
+    """Posting lists from term to (recipe ids, weights) with each recipe's vector.
+
+    Weights are fixed when a recipe is indexed: load computes the idf of
+    every term from the whole catalog, add reuses those idf values (terms
+    never seen get one from the current counts) and appends to the posting
+    lists, so a new recipe is searchable without touching the others. The
+    weights drift as the catalog grows; stale() tells when a reload is due.
+    """
+
+    def __init__(self):
+        self.idf = {}
+        self.df = {}
+        self.stop = set()
+        self.postings = {}
+        self.vectors = {}
+        self.loaded = 0
+        self.changes = 0
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.vectors
+
+    def _vector(self, terms):
+        weights = {term: self.idf[term] for term in terms if term in self.idf}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return tuple(sorted((term, weight / norm) for term, weight in weights.items())) if norm else ()
+
+    def load(self, recipes):
+        """Index many (recipe_id, terms) at once, computing the idf weights from them"""
+        documents = sorted((recipe_id, set(terms)) for recipe_id, terms in recipes)
+        for _, terms in documents:
+            for term in terms:
+                self.df[term] = self.df.get(term, 0) + 1
+        total = len(documents)
+        if total >= MIN_RECIPES_FOR_MAX_DF:
+            self.stop = {term for term, df in self.df.items() if df > MAX_DF * total}
+        self.idf = {term: idf(total, df) for term, df in self.df.items() if term not in self.stop}
+
+        for recipe_id, terms in documents:
+            vector = self._vector(terms)
+            self.vectors[recipe_id] = vector
+            for term, weight in vector:
+                ids, weights = self.postings.setdefault(term, (array('I'), array('f')))
+                ids.append(recipe_id)
+                weights.append(weight)
+        self.loaded = total
+        self.changes = 0
+
+    def remove(self, recipe_id):
+        """Take a recipe out of the posting lists"""
+        vector = self.vectors.pop(recipe_id, None)
+        if vector is None:
+            return
+        for term, _ in vector:
+            self.df[term] -= 1
+            ids, weights = self.postings[term]
+            index = bisect_left(ids, recipe_id)
+            if index < len(ids) and ids[index] == recipe_id:
+                del ids[index]
+                del weights[index]
+            if not ids:
+                del self.postings[term]
+        self.changes += 1
+
+    def add(self, recipe_id, terms):
+        """Index a recipe (after remove, when it was indexed before)"""
+        terms = set(terms) - self.stop
+        for term in terms:
+            self.df[term] = self.df.get(term, 0) + 1
+            if term not in self.idf:
+                self.idf[term] = idf(len(self.vectors) + 1, self.df[term])
+        vector = self._vector(terms)
+        self.vectors[recipe_id] = vector
+        for term, weight in vector:
+            ids, weights = self.postings.setdefault(term, (array('I'), array('f')))
+            # New recipes have the highest id, so this is an append unless a recipe is rewritten
+            index = bisect_left(ids, recipe_id)
+            ids.insert(index, recipe_id)
+            weights.insert(index, weight)
+        self.changes += 1
+
+    def stale(self):
+        """Whether enough recipes changed since load for the idf weights to be recomputed"""
+        return self.changes > REBUILD_GROWTH * max(self.loaded, MIN_RECIPES_FOR_MAX_DF)
+
+    def similar(self, recipe_id, limit):
+        """Up to limit (recipe_id, score) most similar to recipe_id, best first (ties to the lower id)"""
+        scores = {}
+        for term, weight in self.vectors.get(recipe_id, ()):
+            ids, weights = self.postings[term]
+            for other, other_weight in zip(ids, weights):
+                scores[other] = scores.get(other, 0.0) + weight * other_weight
+        scores.pop(recipe_id, None)
+        best = heapq.nsmallest(limit, ((-score, other) for other, score in scores.items()))
+        return [(other, -score) for score, other in best]
@@ -0,0 +1,163 @@
+"""Trigram similarity over the search vocabulary, for typo tolerant search.
+
+Terms are compared by their letters and digits only, so "chick peas",
+"chickpeas" and "Chick-Peas" share all their trigrams. Similarity is the
+share of distinct trigrams two terms have in common (as in pg_trgm), with the
+start of the term padded so the first letters weigh more than the rest.
+"""
+import heapq
+import re
+from array import array
+from collections import Counter
+
+# Words shorter than this are never indexed or corrected
+MIN_WORD_LENGTH = 3
+# Corrections below this similarity are not trusted (pg_trgm's default limit)
+DEFAULT_THRESHOLD = 0.3
+
+WORD = re.compile(r'[^\W\d_]+')
+
+
+def trigrams(text):
+    """Set of trigrams of text, ignoring case, spaces and punctuation."""
+    key = ''.join(ch for ch in text.lower() if ch.isalnum())
+    if not key:
+        return set()
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(first, second):
+    """Jaccard similarity of the trigram sets of two texts, from 0 to 1."""
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+def words(text):
+    """Lowercase words of text worth indexing (letters only, MIN_WORD_LENGTH or longer)."""
+    return [word for word in WORD.findall((text or '').lower()) if len(word) >= MIN_WORD_LENGTH]
+
+
+def recipe_terms(name, category, ingredients):
+    """Vocabulary a recipe contributes: its name's words, its category, and each
+    ingredient name both whole ("chick pea") and word by word."""
+    terms = set(words(name))
+    if category:
+        terms.add(category.lower())
+    for ingredient in ingredients:
+        terms.add(ingredient)
+        terms.update(words(ingredient))
+    return terms
+
+
+class TrigramIndex:
+    """Posting lists from trigram to term ids over the search vocabulary.
+
+    Only the vocabulary is indexed (a few tens of thousands of terms even for
+    a million recipes), not the recipes themselves. Terms are counted per
+    recipe and stop matching when no recipe uses them anymore; their ids are
+    kept so posting lists only ever grow by appending.
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.ids = {}
+        self.sizes = array('H')
+        self.counts = array('I')
+        self.postings = {}
+
+    def __len__(self):
+        return sum(1 for count in self.counts if count)
+
+    def __contains__(self, term):
+        term_id = self.ids.get(term)
+        return term_id is not None and self.counts[term_id] > 0
+
+    def _term_id(self, term):
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            grams = trigrams(term)
+            self.terms.append(term)
+            self.ids[term] = term_id
+            self.sizes.append(min(len(grams), 0xFFFF))
+            self.counts.append(0)
+            for gram in grams:
+                self.postings.setdefault(gram, array('I')).append(term_id)
+        return term_id
+
+    def _change(self, terms, change):
+        for term in terms:
+            if change < 0 and term not in self.ids:
+                continue
+            term_id = self._term_id(term)
+            self.counts[term_id] = max(0, self.counts[term_id] + change)
+
+    def add(self, name, category, ingredients):
+        """Count the terms of a recipe"""
+        self._change(recipe_terms(name, category, ingredients), 1)
+
+    def remove(self, name, category, ingredients):
+        """Uncount the terms a recipe was added with"""
+        self._change(recipe_terms(name, category, ingredients), -1)
+
+    def load(self, recipes):
+        """Count the terms of many (name, category, ingredients) at once"""
+        used = Counter()
+        for name, category, ingredients in recipes:
+            used.update(recipe_terms(name, category, ingredients))
+        for term, count in used.items():
+            term_id = self._term_id(term)
+            self.counts[term_id] += count
+
+    def matches(self, text, limit=5, threshold=DEFAULT_THRESHOLD):
+        """Up to limit (term, similarity) pairs for text, most similar first.
+
+        Candidates are the terms sharing a trigram with text, counted from the
+        posting lists, so only similar terms are ever scored. Among equally
+        similar terms the one used by more recipes wins.
+        """
+        grams = trigrams(text)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is not None:
+                shared.update(posting)
+        scored = []
+        for term_id, common in shared.items():
+            if not self.counts[term_id]:
+                continue
+            score = common / (len(grams) + self.sizes[term_id] - common)
+            if score >= threshold:
+                scored.append((-score, -self.counts[term_id], self.terms[term_id]))
+        return [(term, -score) for score, _, term in heapq.nsmallest(limit, scored)]
+
+    def _best(self, word, threshold):
+        if len(word) < MIN_WORD_LENGTH or word in self:
+            return word, 1.0
+        found = self.matches(word, limit=1, threshold=threshold)
+        return found[0] if found else (word, 0.0)
+
+    def correct(self, query, threshold=DEFAULT_THRESHOLD):
+        """query with misspelled words replaced by their closest terms, or None
+        when nothing needed (or could be) corrected.
+
+        Each word is corrected on its own, and a query of several words is also
+        tried as one term ("chick peas" -> "chickpea"), keeping whichever reads
+        closer on average.
+        """
+        query_words = query.lower().split()
+        if not query_words:
+            return None
+        best = [self._best(word, threshold) for word in query_words]
+        corrected = ' '.join(term for term, _ in best)
+        if len(query_words) > 1:
+            joined = self.matches(''.join(query_words), limit=1, threshold=threshold)
+            if joined and joined[0][1] > sum(score for _, score in best) / len(best):
+                corrected = joined[0][0]
+        return corrected if corrected != ' '.join(query_words) else None
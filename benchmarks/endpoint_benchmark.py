@@ -0,0 +1,194 @@
+"""
+Benchmark every JSON endpoint through the Flask test client
+
+Builds a synthetic database (table_creation.py --synthetic) or uses an
+existing one, then sends requests to the search, pantry, browse, favorites, random,
+get_recipe and update routes as a logged in user. Reports p50/p95/p99 latency
+and SQL statements per request (read from the Server-Timing header), and
+writes the results as JSON so runs from different commits can be compared.
+
+Usage: python benchmarks/endpoint_benchmark.py [--recipes 100000] [--users 5000] [--favorites 500000]
+                                               [--db_path existing.db] [--requests 200] [--output results.json]
+                                               [--baseline previous_results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from table_creation import SYNTHETIC_INGREDIENTS, generate_synthetic_data
+
+SEARCH_TERMS = ['chicken', 'garlic', 'soup', 'pancakes', 'rice', 'cheddar', 'honey', 'chickpeas']
+CATEGORIES = ['Breakfast', 'Dessert', 'Dinner', 'Lunch', 'Salads', 'Soup', 'Snacks']
+PANTRY_ITEMS = [name for _, name in SYNTHETIC_INGREDIENTS]
+
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def scenarios(rng, recipe_count, owned_recipe_id):
+    """(name, method, url builder, form data builder) for every benchmarked route"""
+    return [
+        ('search', 'GET', lambda: f"/search_results?q={rng.choice(SEARCH_TERMS)}", None),
+        ('search_page', 'GET', lambda: f"/search?q={rng.choice(SEARCH_TERMS)}&page={rng.randint(1, 5)}", None),
+        ('pantry', 'GET', lambda: f"/pantry_search?items={','.join(rng.sample(PANTRY_ITEMS, 20))}", None),
+        ('browse', 'GET', lambda: f"/browse_recipes_list?category={rng.choice(CATEGORIES)}", None),
+        ('favorites', 'GET', lambda: "/favorites_list", None),
+        ('random', 'GET', lambda: "/random_recipe", None),
+        ('get_recipe', 'GET', lambda: f"/get_recipe/{rng.randint(1, recipe_count)}", None),
+        ('update', 'POST', lambda: f"/update_recipe/{owned_recipe_id}", lambda: {
+            'name': f"Benchmark Update {rng.randint(1, 10 ** 9)}",
+            'ingredients': '1 cup flour\n2 eggs',
+            'instructions': '1. Mix.\n2. Bake.',
+            'category': 'Dessert',
+            'prep_time': '10',
+            'cook_time': '20',
+            'total_time': '30',
+            'servings': '4',
+        }),
+    ]
+
+
+def run_scenario(client, method, url, data, requests):
+    latencies, queries, statuses = [], [], {}
+    for _ in range(requests):
+        started = time.perf_counter()
+        if method == 'GET':
+            response = client.get(url())
+        else:
+            response = client.post(url(), data=data())
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        match = QUERIES_PATTERN.search(response.headers.get('Server-Timing', ''))
+        if match:
+            queries.append(int(match.group(1)))
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(db_path, args):
+    app = create_app(database_uri=f"sqlite:///{db_path}")
+    app.config.update({'TESTING': True, 'SLOW_REQUEST_MS': None})
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        recipe_count = db.session.execute(db.text("SELECT MAX(id) FROM recipes")).scalar()
+        # The user with the most favorites, so /favorites_list has real work to do
+        user_id, owned_recipe_id = db.session.execute(db.text(
+            "SELECT users.id, (SELECT MIN(id) FROM recipes WHERE recipes.user_id = users.id) "
+            "FROM users JOIN favorites ON favorites.user_id = users.id "
+            "GROUP BY users.id ORDER BY COUNT(*) DESC LIMIT 1"
+        )).one()
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['user_id'] = user_id
+        session['username'] = 'benchmark'
+
+    results = {}
+    for name, method, url, data in scenarios(rng, recipe_count, owned_recipe_id or 1):
+        if args.routes and name not in args.routes:
+            continue
+        # Warm up connections, caches and the search index pages
+        run_scenario(client, method, url, data, max(1, args.requests // 10))
+        results[name] = run_scenario(client, method, url, data, args.requests)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every JSON endpoint through the Flask test client')
+    parser.add_argument('--db_path', default=None,
+                        help="Benchmark a copy of this database instead of generating one")
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--favorites', type=int, default=500000)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per route")
+    parser.add_argument('--routes', nargs='+', default=None, help="Only benchmark these routes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument('--baseline', default=None, help="Results file of an earlier run to compare p95 against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        if args.db_path:
+            # Copy so update requests do not change the original
+            shutil.copyfile(args.db_path, db_path)
+            dataset = {'db_path': args.db_path}
+        else:
+            generate_synthetic_data(db_path, args.recipes, args.users, args.favorites, args.seed)
+            dataset = {'recipes': args.recipes, 'users': args.users, 'favorites': args.favorites, 'seed': args.seed}
+        results = benchmark(db_path, args)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'dataset': dataset,
+        'requests_per_route': args.requests,
+        'routes': results,
+    }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['routes']
+
+    print(f"{'route':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"
+          + (f" {'p95 vs baseline':>16}" if baseline else ''), file=sys.stderr)
+    for name, result in results.items():
+        queries = result['queries_per_request']
+        line = (f"{name:<14} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                f"{queries if queries is not None else '-':>8}")
+        if name in baseline and baseline[name]['p95_ms']:
+            change = (result['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100
+            line += f" {change:>+15.1f}%"
+        print(line, file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
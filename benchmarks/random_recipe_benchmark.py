@@ -0,0 +1,81 @@
+"""
+Benchmark random recipe selection as the recipes table grows
+
+Compares RecipeService.get_random_recipe (random primary key probe) with the
+previous ORDER BY random() LIMIT 1 query on databases of increasing size.
+
+Usage: python benchmarks/random_recipe_benchmark.py [--sizes 1000 10000 100000 1000000] [--runs 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import insert
+from app import create_app, db
+from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.recipe import RecipeService
+
+
+def populate(count):
+    """Bulk insert one user and count recipes in a single transaction"""
+    user = User(username='bench', email='bench@example.com', name='Bench')
+    db.session.add(user)
+    db.session.flush()
+    batch = 10000
+    for start in range(0, count, batch):
+        db.session.execute(insert(Recipe.__table__), [
+            {
+                'name': f'Benchmark Recipe {i}',
+                'ingredients': 'flour\nsugar\neggs',
+                'instructions': 'Mix and bake',
+                'category': 'Dessert',
+                'user_id': user.id,
+            } for i in range(start, min(start + batch, count))
+        ])
+    db.session.commit()
+
+
+def time_per_call(func, runs):
+    """Average milliseconds per call over runs calls"""
+    started = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - started) * 1000 / runs
+
+
+def legacy_random_recipe():
+    return Recipe.query.order_by(db.func.random()).first()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark random recipe selection')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'recipes':>10} {'probe ms':>10} {'probe+excl ms':>14} {'ORDER BY random() ms':>22}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(database_uri=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            with app.app_context():
+                db.create_all()
+                populate(size)
+                exclude_ids = set(range(1, 51))
+
+                probe = time_per_call(RecipeService.get_random_recipe, args.runs)
+                probe_excluding = time_per_call(
+                    lambda: RecipeService.get_random_recipe(exclude_ids=exclude_ids), args.runs
+                )
+                legacy = time_per_call(legacy_random_recipe, max(1, args.runs // 20))
+                print(f"{size:>10} {probe:>10.3f} {probe_excluding:>14.3f} {legacy:>22.3f}")
+                db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark read throughput while writes are happening
+
+Runs reader threads (recipe detail lookups) next to one writer thread (recipe
+updates and favorite toggles) against a file database, once with SQLite's
+default settings (rollback journal) and once with the pragmas create_app
+applies (WAL, synchronous=NORMAL, busy_timeout, ...).
+
+Usage: python benchmarks/wal_benchmark.py [--recipes 20000] [--readers 4] [--seconds 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.model.recipes import Recipe
+from app.model.users import User
+from app.service.favorites import FavoriteService
+from app.service.recipe import RecipeService
+from app.sqlite_pragmas import SQLITE_PRAGMA_SETTINGS
+
+# SQLite defaults: rollback journal, synchronous=FULL, no busy timeout
+DEFAULT_SQLITE_CONFIG = {key: None for key in SQLITE_PRAGMA_SETTINGS}
+
+
+def populate(app, count):
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', name='Bench')
+        db.session.add(user)
+        db.session.flush()
+        db.session.execute(insert(Recipe.__table__), [
+            {
+                'name': f'Benchmark Recipe {i}',
+                'ingredients': 'flour\nsugar\neggs',
+                'instructions': 'Mix and bake',
+                'category': 'Dessert',
+                'user_id': user.id,
+            } for i in range(count)
+        ])
+        db.session.commit()
+        return user.id
+
+
+def reader(app, count, stop, results):
+    reads = errors = 0
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                RecipeService.get_recipe_details(random.randint(1, count))
+                db.session.rollback()  # end the read transaction, like the end of a request
+                reads += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+        db.session.remove()
+    results.append((reads, errors))
+
+
+def writer(app, count, user_id, stop, results):
+    writes = errors = 0
+    with app.app_context():
+        while not stop.is_set():
+            recipe_id = random.randint(1, count)
+            try:
+                recipe = db.session.get(Recipe, recipe_id)
+                recipe.servings = random.randint(1, 12)
+                db.session.commit()
+                if not FavoriteService.remove_favorite(recipe_id, user_id):
+                    FavoriteService.add_favorite(recipe_id, user_id)
+                writes += 2
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+        db.session.remove()
+    results.append((writes, errors))
+
+
+def run(label, config, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(database_uri=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        app.config.update(config)
+        user_id = populate(app, args.recipes)
+
+        stop = threading.Event()
+        read_results, write_results = [], []
+        threads = [
+            threading.Thread(target=reader, args=(app, args.recipes, stop, read_results))
+            for _ in range(args.readers)
+        ]
+        threads.append(threading.Thread(target=writer, args=(app, args.recipes, user_id, stop, write_results)))
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            db.engine.dispose()
+
+        reads = sum(r for r, _ in read_results)
+        read_errors = sum(e for _, e in read_results)
+        writes, write_errors = write_results[0]
+        print(f"{label:<22} {reads / args.seconds:>12.0f} {read_errors:>12} "
+              f"{writes / args.seconds:>12.0f} {write_errors:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark reads during writes with and without WAL')
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'settings':<22} {'reads/s':>12} {'read errors':>12} {'writes/s':>12} {'write errors':>12}")
+    run('SQLite defaults', DEFAULT_SQLITE_CONFIG, args)
+    run('create_app pragmas', {}, args)
+
+
+if __name__ == '__main__':
+    main()
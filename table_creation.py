@@ -3,10 +3,73 @@ Create the database tables for the recipe box application
 """
 
 import sqlite3
+import random
 from datetime import datetime
 from app.enums import Category
+from app.model.recipe_search import CREATE_RECIPES_FTS, DROP_RECIPES_FTS, REBUILD_RECIPES_FTS
+from app.model.catalog import CREATE_CATALOG_VERSION, DROP_CATALOG_VERSION_TRIGGERS
+from app.model.cache import CREATE_CACHE_INVALIDATIONS
+from app.model.ingredients import CREATE_RECIPE_INGREDIENTS
+from app.model.facets import CREATE_RECIPE_FACET_COUNTS, DROP_RECIPE_FACET_COUNTS, REBUILD_RECIPE_FACET_COUNTS
+from app.model.recommendations import (
+    CREATE_RECIPE_NEIGHBORS, CREATE_RECIPE_NEIGHBORS_TRIGGERS, DROP_RECIPE_NEIGHBORS, DROP_RECIPE_NEIGHBORS_TRIGGERS,
+    QUEUE_ALL_RECIPE_NEIGHBORS
+)
+from app.model.popularity import (
+    ADD_FAVORITE_COUNT_COLUMN, CREATE_FAVORITE_COUNTS, DROP_FAVORITE_COUNT_TRIGGERS, RECONCILE_FAVORITE_COUNTS
+)
+from app.ingredients import parse_ingredients
+import argparse
 import os
 
+def create_featured_recipes_table(cursor):
+    """Create the table that stores the daily "Recipe of the Day" picks"""
+    featured_recipes_table_creation_query = """
+    CREATE TABLE IF NOT EXISTS featured_recipes (
+        feature_date DATE PRIMARY KEY,
+        recipe_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (recipe_id) REFERENCES recipes (id)
+    );
+    """
+    cursor.execute(featured_recipes_table_creation_query)
+
+def backfill_recipe_ingredients(cursor):
+    """Parse the ingredients of every recipe that has no recipe_ingredients rows yet"""
+    cursor.execute(
+        "SELECT id, ingredients FROM recipes WHERE NOT EXISTS "
+        "(SELECT 1 FROM recipe_ingredients WHERE recipe_ingredients.recipe_id = recipes.id)"
+    )
+    recipes = cursor.fetchall()
+    cursor.executemany(
+        "INSERT INTO recipe_ingredients (recipe_id, position, quantity, unit, name, line) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (recipe_id, parsed.position, parsed.quantity, parsed.unit, parsed.name, parsed.line)
+            for recipe_id, ingredients in recipes
+            for parsed in parse_ingredients(ingredients)
+        )
+    )
+    return len(recipes)
+
+def create_favorites_indexes(cursor):
+    """
+    Index favorites by (user_id, recipe_id), unique so a recipe can only be
+    favorited once per user, and by recipe_id for popularity queries.
+    Duplicate rows left by older versions are removed first (oldest row kept).
+    """
+    cursor.execute(
+        """
+        DELETE FROM favorites
+        WHERE id NOT IN (SELECT MIN(id) FROM favorites GROUP BY user_id, recipe_id);
+        """
+    )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_favorites_user_recipe ON favorites (user_id, recipe_id);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_favorites_recipe_id ON favorites (recipe_id);"
+    )
+
 def create_tables(db_path=None):
     """
     Create the database tables, and seed data to the table
@@ -30,6 +93,16 @@ def create_tables(db_path=None):
     cursor.execute("PRAGMA foreign_keys = ON;")
 
     # Drop existing tables (be careful with this in production!)
+    for statement in DROP_RECIPES_FTS:
+        cursor.execute(statement)
+    for statement in DROP_RECIPE_FACET_COUNTS:
+        cursor.execute(statement)
+    for statement in DROP_RECIPE_NEIGHBORS:
+        cursor.execute(statement)
+    cursor.execute("DROP TABLE IF EXISTS cache_invalidations;")
+    cursor.execute("DROP TABLE IF EXISTS recipe_ingredients;")
+    cursor.execute("DROP TABLE IF EXISTS catalog_version;")
+    cursor.execute("DROP TABLE IF EXISTS featured_recipes;")
     cursor.execute("DROP TABLE IF EXISTS favorites;")
     cursor.execute("DROP TABLE IF EXISTS recipes;")
     cursor.execute("DROP TABLE IF EXISTS users;")
@@ -61,11 +134,16 @@ def create_tables(db_path=None):
         servings INTEGER,
         image_location VARCHAR(255),
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        favorite_count INTEGER NOT NULL DEFAULT 0,
         FOREIGN KEY (user_id) REFERENCES users (id)
     );
     """
     cursor.execute(recipes_table_creation_query)
 
+    # Full-text search index on recipes, kept in sync by triggers
+    for statement in CREATE_RECIPES_FTS:
+        cursor.execute(statement)
+
     favorites_table_creation_query = """
     CREATE TABLE IF NOT EXISTS favorites (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -77,6 +155,33 @@ def create_tables(db_path=None):
     );
     """
     cursor.execute(favorites_table_creation_query)
+    create_favorites_indexes(cursor)
+
+    # Favorites per recipe in recipes.favorite_count, kept by triggers (popular recipes)
+    for statement in CREATE_FAVORITE_COUNTS:
+        cursor.execute(statement)
+
+    # Co-favorite neighbors per recipe, favorites triggers queue the recipes to recompute
+    for statement in CREATE_RECIPE_NEIGHBORS + CREATE_RECIPE_NEIGHBORS_TRIGGERS:
+        cursor.execute(statement)
+
+    create_featured_recipes_table(cursor)
+
+    # Parsed ingredient lines, indexed by normalized name
+    for statement in CREATE_RECIPE_INGREDIENTS:
+        cursor.execute(statement)
+
+    # Version stamp bumped by triggers on every recipe write (HTTP cache validators)
+    for statement in CREATE_CATALOG_VERSION:
+        cursor.execute(statement)
+
+    # Recipe counts per category, time and servings bucket, kept by triggers (facets)
+    for statement in CREATE_RECIPE_FACET_COUNTS:
+        cursor.execute(statement)
+
+    # Cache invalidations read by every worker process (CacheService.sync)
+    for statement in CREATE_CACHE_INVALIDATIONS:
+        cursor.execute(statement)
 
   # Add a default admin user==
     cursor.execute(
@@ -523,10 +628,327 @@ def create_tables(db_path=None):
                 """,
                 (name, ingredients, instructions, category, user_id, prep_time, cook_time, total_time, servings)
             )
+    backfill_recipe_ingredients(cursor)
 
     conn.commit()
     conn.close()
     print("Database tables created successfully with default admin user and recipes")
 
+def rebuild_search_index(db_path=None):
+    """
+    Create the recipes full-text search index if it is missing and
+    rebuild its contents from the recipes table
+
+    Args: db_path (str): Path to the SQLite database file.
+
+    If db_path is None, defaults to 'recipe_box.db'
+
+    """
+
+    if db_path is None:
+        db_path = 'recipe_box.db'
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    for statement in CREATE_RECIPES_FTS:
+        cursor.execute(statement)
+    cursor.execute(REBUILD_RECIPES_FTS)
+
+    conn.commit()
+    conn.close()
+    print("Recipe search index rebuilt successfully")
+
+def reconcile_favorite_counts(db_path=None):
+    """
+    Recount the favorites of every recipe and repair recipes.favorite_count
+    where it drifted from the favorites table
+
+    Args: db_path (str): Path to the SQLite database file.
+
+    If db_path is None, defaults to 'recipe_box.db'
+
+    """
+
+    if db_path is None:
+        db_path = 'recipe_box.db'
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute(RECONCILE_FAVORITE_COUNTS)
+    repaired = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    print(f"Favorite counts reconciled ({repaired} recipes repaired)")
+    return repaired
+
+def refresh_recommendations(db_path=None, rebuild=False):
+    """
+    Recompute the co-favorite neighbors of the recipes whose favorites
+    changed since the last refresh (or of every recipe with rebuild)
+
+    Args: db_path (str): Path to the SQLite database file.
+          rebuild (bool): Drop every neighbor list and recompute them all.
+
+    If db_path is None, defaults to 'recipe_box.db'
+
+    """
+
+    if db_path is None:
+        db_path = 'recipe_box.db'
+
+    from app import create_app
+    from app.service.recommendations import RecommendationService
+
+    app = create_app(database_uri=f"sqlite:///{os.path.abspath(db_path)}")
+    started = datetime.now()
+    with app.app_context():
+        refreshed = RecommendationService.rebuild() if rebuild else RecommendationService.refresh()
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Recommendations refreshed for {refreshed} recipes in {elapsed:.1f}s")
+    return refreshed
+
+def upgrade_tables(db_path=None):
+    """
+    Bring an existing database up to the current schema, adding any
+    missing tables, indexes and triggers. Existing data is kept.
+
+    Args: db_path (str): Path to the SQLite database file.
+
+    If db_path is None, defaults to 'recipe_box.db'
+
+    """
+
+    if db_path is None:
+        db_path = 'recipe_box.db'
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes_fts'")
+    has_search_index = cursor.fetchone() is not None
+    for statement in CREATE_RECIPES_FTS:
+        cursor.execute(statement)
+    if not has_search_index:
+        cursor.execute(REBUILD_RECIPES_FTS)
+
+    create_featured_recipes_table(cursor)
+    create_favorites_indexes(cursor)
+    # Recreated so catalog_version_au ignores favorite_count updates
+    for statement in DROP_CATALOG_VERSION_TRIGGERS + CREATE_CATALOG_VERSION:
+        cursor.execute(statement)
+    for statement in CREATE_CACHE_INVALIDATIONS:
+        cursor.execute(statement)
+    for statement in CREATE_RECIPE_INGREDIENTS:
+        cursor.execute(statement)
+    parsed = backfill_recipe_ingredients(cursor)
+    for statement in CREATE_RECIPE_FACET_COUNTS + REBUILD_RECIPE_FACET_COUNTS:
+        cursor.execute(statement)
+    cursor.execute("SELECT 1 FROM pragma_table_info('recipes') WHERE name = 'favorite_count'")
+    if cursor.fetchone() is None:
+        cursor.execute(ADD_FAVORITE_COUNT_COLUMN)
+    for statement in CREATE_FAVORITE_COUNTS:
+        cursor.execute(statement)
+    cursor.execute(RECONCILE_FAVORITE_COUNTS)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_neighbors'")
+    has_neighbors = cursor.fetchone() is not None
+    for statement in CREATE_RECIPE_NEIGHBORS + CREATE_RECIPE_NEIGHBORS_TRIGGERS:
+        cursor.execute(statement)
+    if not has_neighbors:
+        # Favorites from before the triggers existed, computed by the next --refresh-recommendations
+        cursor.execute(QUEUE_ALL_RECIPE_NEIGHBORS)
+
+    conn.commit()
+    conn.close()
+    print(f"Database schema upgraded successfully ({parsed} recipes had their ingredients parsed)")
+
+# Vocabulary for --synthetic recipes
+SYNTHETIC_ADJECTIVES = [
+    'Classic', 'Spicy', 'Creamy', 'Quick', 'Rustic', 'Smoky', 'Zesty', 'Hearty', 'Crispy', 'Garlic',
+    'Herbed', 'Lemon', 'Honey', 'Roasted', 'Grilled', 'Slow Cooked', 'Vegan', 'Easy', 'Sweet', 'Tangy',
+]
+SYNTHETIC_DISHES = [
+    'Pancakes', 'Omelette', 'Chicken Curry', 'Beef Stew', 'Tomato Soup', 'Caesar Salad', 'Lasagna',
+    'Tacos', 'Fried Rice', 'Chili', 'Risotto', 'Banana Bread', 'Brownies', 'Granola', 'Quiche',
+    'Stir Fry', 'Meatballs', 'Falafel', 'Noodle Bowl', 'Apple Pie', 'Burrito', 'Frittata', 'Hummus',
+]
+SYNTHETIC_INGREDIENTS = [
+    ('cup', 'flour'), ('cup', 'sugar'), ('tbsp', 'olive oil'), ('tsp', 'salt'), ('tsp', 'black pepper'),
+    ('clove', 'garlic'), ('', 'onion'), ('cup', 'milk'), ('', 'eggs'), ('tbsp', 'butter'),
+    ('lb', 'chicken breast'), ('lb', 'ground beef'), ('cup', 'rice'), ('can', 'diced tomatoes'),
+    ('cup', 'spinach'), ('tsp', 'cumin'), ('tsp', 'paprika'), ('cup', 'cheddar cheese'), ('', 'lemon'),
+    ('tbsp', 'soy sauce'), ('cup', 'broth'), ('', 'carrots'), ('cup', 'oats'), ('tbsp', 'honey'),
+    ('', 'bell pepper'), ('cup', 'chickpeas'), ('tsp', 'baking powder'), ('', 'bananas'), ('oz', 'pasta'),
+]
+SYNTHETIC_STEPS = [
+    'Preheat the oven to 375F.', 'Chop the vegetables.', 'Whisk the wet ingredients together.',
+    'Combine the dry ingredients in a large bowl.', 'Heat the oil in a skillet over medium heat.',
+    'Simmer for 20 minutes, stirring occasionally.', 'Season to taste.', 'Bake until golden brown.',
+    'Let rest for 5 minutes before serving.', 'Garnish and serve warm.',
+]
+SYNTHETIC_QUANTITIES = ['1/4', '1/2', '1', '1 1/2', '2', '3', '4']
+
+def synthetic_users(start, count):
+    """Rows for the users table, numbered from start"""
+    for n in range(start, start + count):
+        yield (f'synthetic_user_{n}', f'synthetic_user_{n}@example.com', f'User {n}', None)
+
+def synthetic_recipes(rng, start, count, user_ids):
+    """Rows for the recipes table with names unique across runs (numbered from start)"""
+    categories = [category.value for category in Category if category is not Category.UNCATEGORIZED]
+    for n in range(start, start + count):
+        ingredients = '\n'.join(
+            f"{rng.choice(SYNTHETIC_QUANTITIES)} {unit} {name}".replace('  ', ' ')
+            for unit, name in rng.sample(SYNTHETIC_INGREDIENTS, rng.randint(3, 10))
+        )
+        instructions = '\n'.join(
+            f"{step}. {text}" for step, text in enumerate(rng.sample(SYNTHETIC_STEPS, rng.randint(2, 6)), 1)
+        )
+        prep_time = rng.choice([5, 10, 15, 20, 30, 45])
+        cook_time = rng.choice([0, 10, 15, 20, 30, 45, 60, 90, 120])
+        yield (
+            f"{rng.choice(SYNTHETIC_ADJECTIVES)} {rng.choice(SYNTHETIC_DISHES)} {n}",
+            ingredients,
+            instructions,
+            rng.choice(categories),
+            rng.choice(user_ids),
+            prep_time,
+            cook_time,
+            prep_time + cook_time,
+            rng.choice([1, 2, 4, 6, 8, 12]),
+        )
+
+def synthetic_favorites(rng, count, user_ids, recipe_ids):
+    """
+    Distinct (user_id, recipe_id) rows spread over every user. Popular
+    recipes are favorited more often (skewed towards the start of recipe_ids).
+    """
+    per_user, extra = divmod(count, len(user_ids))
+    for index, user_id in enumerate(user_ids):
+        wanted = min(per_user + (1 if index < extra else 0), len(recipe_ids))
+        chosen = set()
+        while len(chosen) < wanted:
+            chosen.add(recipe_ids[int(len(recipe_ids) * rng.random() ** 2)])
+        for recipe_id in chosen:
+            yield (user_id, recipe_id)
+
+def generate_synthetic_data(db_path=None, recipes=0, users=0, favorites=0, seed=0):
+    """
+    Bulk load synthetic users, recipes and favorites for performance testing.
+    Rows are added to the existing data (tables are created first if the
+    database is empty) with executemany inside a single transaction.
+
+    Args: db_path (str): Path to the SQLite database file.
+          recipes, users, favorites (int): How many rows of each to add.
+          seed (int): Random seed, the same seed generates the same data.
+
+    If db_path is None, defaults to 'recipe_box.db'
+
+    """
+
+    if db_path is None:
+        db_path = 'recipe_box.db'
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'")
+    if cursor.fetchone() is None:
+        conn.close()
+        create_tables(db_path)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+    rng = random.Random(seed)
+    started = datetime.now()
+
+    # Index and count the recipes once at the end instead of once per row through the triggers
+    for statement in (DROP_RECIPES_FTS + DROP_RECIPE_FACET_COUNTS + DROP_FAVORITE_COUNT_TRIGGERS
+                      + DROP_RECIPE_NEIGHBORS_TRIGGERS):
+        cursor.execute(statement)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+    first_user = cursor.fetchone()[0] + 1
+    cursor.executemany(
+        "INSERT INTO users (username, email, name, password) VALUES (?, ?, ?, ?)",
+        synthetic_users(first_user, users)
+    )
+    cursor.execute("SELECT id FROM users")
+    user_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM recipes")
+    first_recipe = cursor.fetchone()[0] + 1
+    cursor.executemany(
+        """
+        INSERT INTO recipes
+        (name, ingredients, instructions, category, user_id, prep_time, cook_time, total_time, servings)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        synthetic_recipes(rng, first_recipe, recipes, user_ids)
+    )
+    cursor.execute("SELECT id FROM recipes")
+    recipe_ids = [row[0] for row in cursor.fetchall()]
+
+    if favorites and recipe_ids:
+        # Written like the app writes DateTime columns (CURRENT_TIMESTAMP would drop the fraction)
+        created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        cursor.executemany(
+            "INSERT OR IGNORE INTO favorites (user_id, recipe_id, created_at) VALUES (?, ?, ?)",
+            ((user_id, recipe_id, created_at)
+             for user_id, recipe_id in synthetic_favorites(rng, favorites, user_ids, recipe_ids))
+        )
+
+    for statement in CREATE_RECIPES_FTS:
+        cursor.execute(statement)
+    cursor.execute(REBUILD_RECIPES_FTS)
+    for statement in CREATE_RECIPE_FACET_COUNTS + REBUILD_RECIPE_FACET_COUNTS:
+        cursor.execute(statement)
+    for statement in CREATE_FAVORITE_COUNTS:
+        cursor.execute(statement)
+    cursor.execute(RECONCILE_FAVORITE_COUNTS)
+    for statement in CREATE_RECIPE_NEIGHBORS + CREATE_RECIPE_NEIGHBORS_TRIGGERS:
+        cursor.execute(statement)
+    cursor.execute(QUEUE_ALL_RECIPE_NEIGHBORS)
+    for statement in CREATE_RECIPE_INGREDIENTS:
+        cursor.execute(statement)
+    backfill_recipe_ingredients(cursor)
+
+    conn.commit()
+    conn.close()
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Added {users} users, {recipes} recipes and up to {favorites} favorites in {elapsed:.1f}s")
+
 if __name__ == '__main__':
-    create_tables()
+    parser = argparse.ArgumentParser(description='Create and seed the recipe box database')
+    parser.add_argument('--db_path', default=None, help="SQLite database file (default: recipe_box.db)")
+    parser.add_argument('--rebuild-search-index', action='store_true',
+                        help="Rebuild the recipe full-text search index without touching any data")
+    parser.add_argument('--upgrade', action='store_true',
+                        help="Add missing tables and indexes to an existing database without touching any data")
+    parser.add_argument('--reconcile-favorite-counts', action='store_true',
+                        help="Recount favorites per recipe and repair drifted recipes.favorite_count values")
+    parser.add_argument('--refresh-recommendations', action='store_true',
+                        help="Recompute co-favorite recommendations for recipes whose favorites changed")
+    parser.add_argument('--rebuild-recommendations', action='store_true',
+                        help="Recompute co-favorite recommendations for every recipe")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Bulk load generated users, recipes and favorites for performance testing")
+    parser.add_argument('--recipes', type=int, default=10000, help="Synthetic recipes to add (default: 10000)")
+    parser.add_argument('--users', type=int, default=1000, help="Synthetic users to add (default: 1000)")
+    parser.add_argument('--favorites', type=int, default=50000, help="Synthetic favorites to add (default: 50000)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for synthetic data (default: 0)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        generate_synthetic_data(args.db_path, args.recipes, args.users, args.favorites, args.seed)
+    elif args.upgrade:
+        upgrade_tables(args.db_path)
+    elif args.rebuild_search_index:
+        rebuild_search_index(args.db_path)
+    elif args.reconcile_favorite_counts:
+        reconcile_favorite_counts(args.db_path)
+    elif args.refresh_recommendations or args.rebuild_recommendations:
+        refresh_recommendations(args.db_path, rebuild=args.rebuild_recommendations)
+    else:
+        create_tables(args.db_path)